@@ -3,6 +3,8 @@ import sys
 import traceback
 from config.settings import APP_CONFIG
 from config.database import get_database_connection
+from models.base_model import BaseModel
+from models.counter_store import TABLAS_ESTADISTICAS_RAPIDAS
 
 # Configurar manejo de errores global
 def handle_exception(exc_type, exc_value, exc_traceback):
@@ -199,10 +201,18 @@ if verificar_conexion_db():
 else:
     st.sidebar.error("❌ Conexión a BD: Error")
 
+# Cantidad de registros (una sola consulta de conteos, cacheada entre escrituras)
+conteos = BaseModel().get_counts(TABLAS_ESTADISTICAS_RAPIDAS)
+
 # Información del sistema
 st.sidebar.markdown("""
 ### 📊 Estadísticas Rápidas
 
+**Apicultores:** {}
+**Analistas:** {}
+**Especies:** {}
+**Tambores:** {}
+
 Para ver estadísticas detalladas, visite la página de **Reportes Palinológicos**.
 
 ### 🔧 Configuración
@@ -218,7 +228,12 @@ Para soporte técnico o consultas:
 - Revisar la documentación
 - Verificar configuración de BD
 - Consultar logs de errores
-""")
+""".format(
+    conteos['apicultor'],
+    conteos['analista'],
+    conteos['especies'],
+    conteos['muestra_tambor']
+))
 
 # Footer
 st.markdown("---")
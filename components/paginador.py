@@ -0,0 +1,57 @@
+import streamlit as st
+from typing import Any, Dict, Optional, Tuple
+from config.settings import PAGINATION_CONFIG
+
+class Paginador:
+    """Componente para navegar listados paginados por cursor (keyset)"""
+
+    def __init__(self, key: str, page_size: int = None):
+        """
+        Inicializar paginador
+
+        Args:
+            key: Clave única del listado en el estado de la sesión
+            page_size: Registros por página
+        """
+        self.key = f"paginador_{key}"
+        self.page_size = page_size or PAGINATION_CONFIG['default_page_size']
+
+        # Pila de cursores: el último es el cursor de la página actual
+        if self.key not in st.session_state:
+            st.session_state[self.key] = [None]
+
+    @property
+    def cursor_actual(self) -> Optional[Tuple]:
+        """Cursor con el que debe consultarse la página actual"""
+        return st.session_state[self.key][-1]
+
+    @property
+    def numero_pagina(self) -> int:
+        """Número de la página actual (comenzando en 1)"""
+        return len(st.session_state[self.key])
+
+    def reiniciar(self):
+        """Volver a la primera página"""
+        st.session_state[self.key] = [None]
+
+    def render_controles(self, pagina: Dict[str, Any]):
+        """
+        Renderizar botones de navegación
+
+        Args:
+            pagina: Resultado de BaseModel.get_page para la página actual
+        """
+        col1, col2, col3 = st.columns([1, 2, 1])
+
+        with col1:
+            if st.button("⬅️ Anterior", key=f"{self.key}_anterior", disabled=self.numero_pagina == 1):
+                st.session_state[self.key].pop()
+                st.rerun()
+
+        with col2:
+            st.caption(f"Página {self.numero_pagina} - {len(pagina['rows'])} registros")
+
+        with col3:
+            if st.button("Siguiente ➡️", key=f"{self.key}_siguiente", disabled=not pagina['has_more']):
+                st.session_state[self.key].append(pagina['next_cursor'])
+                st.rerun()
@@ -1,9 +1,13 @@
 import streamlit as st
 from typing import List, Dict, Any, Optional
 from models.analista import Analista
+from models.apicultor import Apicultor
 from models.muestra_tambor import MuestraTambor
 from models.pool import Pool
 from datetime import datetime
+from components.paginador import Paginador
+from components.selector_busqueda import SelectorBusqueda
+from config.settings import PAGINATION_CONFIG
 from utils.formatters import formatear_fecha_simple
 
 class PoolManager:
@@ -11,6 +15,7 @@ class PoolManager:
     
     def __init__(self):
         self.analista_model = Analista()
+        self.apicultor_model = Apicultor()
         self.tambor_model = MuestraTambor()
         self.pool_model = Pool()
     
@@ -18,19 +23,13 @@ class PoolManager:
         """Renderizar selector de analista"""
         st.subheader("👨‍🔬 Seleccionar Analista")
         
-        # Obtener analistas
-        analistas = self.analista_model.get_all_analistas()
+        # Obtener opciones de analistas (nombre completo -> ID) desde el caché de catálogos
+        opciones_analistas = self.analista_model.get_opciones_analistas()
         
-        if not analistas:
+        if not opciones_analistas:
             st.warning("No hay analistas registrados. Por favor, agregue analistas en la página de Administración.")
             return None
         
-        # Crear opciones para el selector
-        opciones_analistas = {}
-        for analista in analistas:
-            nombre_completo = f"{analista['nombres']} {analista['apellidos']}"
-            opciones_analistas[nombre_completo] = analista['id_analista']
-        
         # Selector de analista
         analista_seleccionado = st.selectbox(
             "Seleccione el analista que realizará el análisis:",
@@ -40,32 +39,95 @@ class PoolManager:
         
         return opciones_analistas[analista_seleccionado] if analista_seleccionado else None
     
+    def render_filtros_tambores(self) -> Dict[str, Any]:
+        """Renderizar filtros del selector de tambores (apicultor, fecha de extracción y registro)"""
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            id_apicultor = SelectorBusqueda(
+                "tambores_apicultor",
+                buscar=self.apicultor_model.buscar_opciones_apicultores,
+                todas=self.apicultor_model.get_opciones_apicultores
+            ).render_selectbox("Apicultor:", opcion_todos="Todos")
+        
+        with col2:
+            rango = st.date_input("Fecha de extracción:", value=(), key="filtro_tambores_fecha",
+                                  help="Seleccione una fecha o un rango")
+        
+        with col3:
+            busqueda = st.text_input("Número de registro:", key="filtro_tambores_busqueda",
+                                     placeholder="Buscar...")
+        
+        fecha_desde = rango[0].strftime("%Y-%m-%d") if len(rango) > 0 else None
+        fecha_hasta = rango[-1].strftime("%Y-%m-%d") if len(rango) > 0 else None
+        
+        return {
+            'id_apicultor': id_apicultor,
+            'fecha_desde': fecha_desde,
+            'fecha_hasta': fecha_hasta,
+            'busqueda': busqueda or None
+        }
+    
     def render_selector_tambores(self):
-        """Renderizar selector de tambores"""
+        """
+        Renderizar selector de tambores disponibles, filtrado y paginado
+        
+        Se renderiza fuera del formulario para que los filtros y la paginación
+        respondan al instante. La selección se conserva al cambiar de página o
+        de filtro.
+        """
         st.subheader("🍯 Seleccionar Tambores")
         
-        # Obtener tambores disponibles
-        tambores_disponibles = self.tambor_model.get_tambores_disponibles()
+        filtros = self.render_filtros_tambores()
+        paginador = Paginador("tambores_disponibles", PAGINATION_CONFIG['tambores_selector_page_size'])
+        
+        # Al cambiar los filtros se vuelve a la primera página
+        if st.session_state.get('tambores_disponibles_filtros') != filtros:
+            st.session_state['tambores_disponibles_filtros'] = filtros
+            paginador.reiniciar()
+        
+        pagina = self.tambor_model.get_tambores_disponibles_page(
+            after=paginador.cursor_actual, page_size=paginador.page_size, **filtros
+        )
         
-        if not tambores_disponibles:
-            st.warning("No hay tambores disponibles. Por favor, agregue tambores en la página de Administración.")
+        # Selección acumulada: etiqueta -> id_tambor
+        if st.session_state.pop('tambores_pool_limpiar', False):
+            st.session_state.pop('tambores_pool_seleccion', None)
+            st.session_state.pop('tambores_pool_multiselect', None)
+        seleccion = st.session_state.setdefault('tambores_pool_seleccion', {})
+        
+        if not pagina['rows'] and not seleccion:
+            st.warning("No hay tambores disponibles con estos filtros. Puede agregar tambores en la página de Administración.")
             return []
         
-        # Crear opciones para el multiselect
-        opciones_tambores = {}
-        for tambor in tambores_disponibles:
+        opciones_tambores = dict(seleccion)
+        for tambor in pagina['rows']:
             nombre_apicultor = f"{tambor['apicultor_nombre']} {tambor['apicultor_apellido']}"
             opcion = f"{tambor['num_registro']} - {nombre_apicultor}"
             opciones_tambores[opcion] = tambor['id_tambor']
         
-        # Multiselect de tambores
+        # Multiselect de tambores (los ya elegidos siguen visibles aunque no estén en la página).
+        # Si cambiaron las opciones (otra página u otro filtro) se restaura la selección acumulada.
+        if st.session_state.get('tambores_pool_opciones') != list(opciones_tambores.keys()):
+            st.session_state['tambores_pool_opciones'] = list(opciones_tambores.keys())
+            st.session_state['tambores_pool_multiselect'] = list(seleccion.keys())
         tambores_seleccionados = st.multiselect(
             "Seleccione los tambores para el análisis:",
             options=list(opciones_tambores.keys()),
+            key='tambores_pool_multiselect',
             help="Puede seleccionar múltiples tambores para crear un pool"
         )
         
-        return [opciones_tambores[t] for t in tambores_seleccionados]
+        st.session_state['tambores_pool_seleccion'] = {t: opciones_tambores[t] for t in tambores_seleccionados}
+        
+        if pagina['rows'] or paginador.numero_pagina > 1:
+            paginador.render_controles(pagina)
+        
+        return list(st.session_state['tambores_pool_seleccion'].values())
+    
+    def limpiar_seleccion_tambores(self):
+        """Vaciar la selección de tambores en la próxima ejecución (tras crear el pool)"""
+        st.session_state['tambores_pool_limpiar'] = True
     
     def render_fecha_analisis(self):
         """Renderizar selector de fecha de análisis"""
@@ -94,27 +156,29 @@ class PoolManager:
     def crear_pool(self, id_analista: int, fecha_analisis: str, tambores_ids: List[int], observaciones: str = None):
         """Crear un nuevo pool con los tambores seleccionados"""
         try:
-            # Crear el pool
-            pool_id = self.pool_model.create_pool(
+            # Crear el pool y asociar los tambores en una sola transacción
+            resultado = self.pool_model.create_pool_with_tambores(
                 id_analista=id_analista,
                 fecha_analisis=fecha_analisis,
+                tambores_ids=tambores_ids,
                 observaciones=observaciones
             )
             
-            if not pool_id:
-                st.error("Error al crear el pool")
+            if resultado['ocupados']:
+                tambores = ", ".join(f"#{t}" for t in resultado['ocupados'])
+                st.error(f"No se creó el pool: los tambores {tambores} ya pertenecen a otro pool")
                 return None
             
-            # Agregar tambores al pool
-            tambores_agregados = 0
-            for tambor_id in tambores_ids:
-                if self.pool_model.add_tambor_to_pool(pool_id, tambor_id):
-                    tambores_agregados += 1
+            if resultado['inexistentes']:
+                tambores = ", ".join(f"#{t}" for t in resultado['inexistentes'])
+                st.error(f"No se creó el pool: los tambores {tambores} no existen")
+                return None
             
-            if tambores_agregados != len(tambores_ids):
-                st.warning(f"Se agregaron {tambores_agregados} de {len(tambores_ids)} tambores al pool")
+            if not resultado['id_pool']:
+                st.error("Error al crear el pool")
+                return None
             
-            return pool_id
+            return resultado['id_pool']
             
         except Exception as e:
             st.error(f"Error al crear el pool: {str(e)}")
@@ -152,13 +216,13 @@ class PoolManager:
         st.header("🏗️ Crear Nuevo Pool de Análisis")
         st.markdown("---")
         
+        # Selector de tambores (fuera del formulario: filtros y paginación interactivos)
+        tambores_ids = self.render_selector_tambores()
+        
         with st.form("crear_pool_form"):
             # Selector de analista
             id_analista = self.render_selector_analista()
             
-            # Selector de tambores
-            tambores_ids = self.render_selector_tambores()
-            
             # Fecha de análisis
             fecha_analisis = self.render_fecha_analisis()
             
@@ -185,6 +249,7 @@ class PoolManager:
                 pool_id = self.crear_pool(id_analista, fecha_analisis, tambores_ids, observaciones)
                 
                 if pool_id:
+                    self.limpiar_seleccion_tambores()
                     self.mostrar_resumen_pool(pool_id)
                     return pool_id
         
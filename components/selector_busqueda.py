@@ -0,0 +1,97 @@
+import streamlit as st
+from typing import Any, Callable, Dict, List, Optional
+
+class SelectorBusqueda:
+    """Selector con búsqueda por texto (type-ahead) para catálogos grandes"""
+
+    def __init__(self, key: str, buscar: Callable[[str], Dict[str, Any]], todas: Callable[[], Dict[str, Any]]):
+        """
+        Inicializar selector
+
+        Args:
+            key: Clave única del selector en el estado de la sesión
+            buscar: Función término -> {etiqueta: id} ordenado por relevancia
+            todas: Función que devuelve todas las opciones {etiqueta: id} (sin término de búsqueda)
+        """
+        self.key = f"selector_{key}"
+        self.buscar = buscar
+        self.todas = todas
+
+    def _opciones(self, termino: str) -> Dict[str, Any]:
+        """Opciones que corresponden al término (todas si está vacío)"""
+        termino = (termino or '').strip()
+        return self.buscar(termino) if termino else self.todas()
+
+    def render_multiselect(self, label: str, help: str = None, placeholder: str = "Buscar...") -> List[str]:
+        """
+        Renderizar buscador + multiselect
+
+        Las opciones ya elegidas se conservan aunque dejen de coincidir con la búsqueda.
+
+        Returns:
+            Etiquetas seleccionadas
+        """
+        termino = st.text_input(f"🔍 {label}", key=f"{self.key}_termino", placeholder=placeholder)
+        seleccion = st.session_state.setdefault(f"{self.key}_seleccion", {})
+
+        opciones = dict(seleccion)
+        opciones.update(self._opciones(termino))
+
+        # Si cambiaron las opciones (otra búsqueda) se restaura la selección acumulada
+        clave_widget = f"{self.key}_multiselect"
+        if st.session_state.get(f"{self.key}_opciones") != list(opciones.keys()):
+            st.session_state[f"{self.key}_opciones"] = list(opciones.keys())
+            st.session_state[clave_widget] = list(seleccion.keys())
+
+        elegidas = st.multiselect(label, options=list(opciones.keys()), key=clave_widget, help=help)
+
+        st.session_state[f"{self.key}_seleccion"] = {etiqueta: opciones[etiqueta] for etiqueta in elegidas}
+        return elegidas
+
+    def seleccion_ids(self) -> List[Any]:
+        """IDs de las opciones elegidas en el multiselect, en el orden de selección"""
+        return list(st.session_state.get(f"{self.key}_seleccion", {}).values())
+
+    def limpiar(self):
+        """Vaciar la selección acumulada (multiselect o selectbox; se aplica en la próxima ejecución)"""
+        st.session_state.pop(f"{self.key}_seleccion", None)
+        st.session_state.pop(f"{self.key}_opciones", None)
+        st.session_state.pop(f"{self.key}_elegido", None)
+
+    def render_selectbox(self, label: str, opcion_todos: str, help: str = None, contenedor=None,
+                         placeholder: str = "Buscar...") -> Optional[Any]:
+        """
+        Renderizar buscador + selectbox con una opción inicial que no filtra
+
+        Args:
+            label: Texto del selector
+            opcion_todos: Opción que representa "sin filtro" (devuelve None)
+            help: Ayuda del selector
+            contenedor: Dónde renderizar (por ejemplo st.sidebar); por defecto la página
+
+        Returns:
+            ID seleccionado o None si se eligió opcion_todos
+        """
+        contenedor = contenedor or st
+        termino = contenedor.text_input(f"🔍 {label}", key=f"{self.key}_termino", placeholder=placeholder)
+        elegido = st.session_state.get(f"{self.key}_elegido")
+
+        opciones = self._opciones(termino)
+        if elegido and elegido[0] not in opciones:
+            # Mantener visible la opción elegida aunque no coincida con la nueva búsqueda
+            opciones = {elegido[0]: elegido[1], **opciones}
+
+        etiquetas = [opcion_todos] + list(opciones.keys())
+        seleccionada = contenedor.selectbox(
+            label,
+            options=etiquetas,
+            index=etiquetas.index(elegido[0]) if elegido else 0,
+            help=help
+        )
+
+        if seleccionada == opcion_todos:
+            st.session_state[f"{self.key}_elegido"] = None
+            return None
+
+        st.session_state[f"{self.key}_elegido"] = (seleccionada, opciones[seleccionada])
+        return opciones[seleccionada]
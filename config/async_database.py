@@ -0,0 +1,252 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Dict, List
+import psycopg2
+import streamlit as st
+from config.settings import DATABASE_CONFIG
+from config.database import get_db, is_read_query
+from config.columnar_result import ColumnarResult
+
+try:
+    # psycopg 3 es opcional: sin él las consultas corren en hilos sobre los pools de psycopg2
+    from psycopg.conninfo import make_conninfo
+    from psycopg.rows import dict_row, tuple_row
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:
+    AsyncConnectionPool = None
+
+# Errores de las consultas de una llamada a run(); se muestran en el hilo de la página
+_errores_consulta: contextvars.ContextVar = contextvars.ContextVar('errores_consulta', default=None)
+
+
+class AsyncDatabaseConnection:
+    """
+    Acceso asíncrono a la base de datos para ejecutar consultas independientes a la vez
+
+    Un bucle de asyncio corre en un hilo propio, compartido por todas las
+    sesiones. Con psycopg 3 instalado las consultas usan un AsyncConnectionPool;
+    sin él, cada consulta se ejecuta en un ThreadPoolExecutor sobre los pools de
+    psycopg2 de DatabaseConnection. En ambos casos una página que lanza varias
+    consultas con gather() espera lo que tarda la más lenta y no la suma.
+
+    Uso desde una página:
+        agregados, filas = get_async_db().gather(
+            analisis_model.get_reporte_agregados_async(**filtros),
+            analisis_model.get_reporte_async(**filtros),
+        )
+
+    Cada consulta corre en su propia conexión en autocommit: no ve lo que una
+    transacción abierta con db.transaction() todavía no confirmó.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.pool = None
+        self._executor = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-database", daemon=True)
+        self._thread.start()
+
+        if DATABASE_CONFIG['async_pool_enabled'] and AsyncConnectionPool is not None:
+            self._create_async_pool()
+        if self.pool is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=DATABASE_CONFIG['async_pool_max_connections'],
+                thread_name_prefix="async-database"
+            )
+
+    def _create_async_pool(self):
+        """Crear el pool asíncrono de psycopg 3 dentro del bucle de eventos"""
+        conninfo = make_conninfo(
+            host=DATABASE_CONFIG['host'],
+            port=DATABASE_CONFIG['port'],
+            dbname=DATABASE_CONFIG['database'],
+            user=DATABASE_CONFIG['user'],
+            password=DATABASE_CONFIG['password'],
+            sslmode=DATABASE_CONFIG.get('sslmode', 'prefer')
+        )
+
+        async def abrir():
+            pool = AsyncConnectionPool(
+                conninfo,
+                min_size=DATABASE_CONFIG['async_pool_min_connections'],
+                max_size=DATABASE_CONFIG['async_pool_max_connections'],
+                timeout=DATABASE_CONFIG['pool_timeout'],
+                max_idle=DATABASE_CONFIG['pool_health_check_interval'],
+                kwargs={
+                    'row_factory': dict_row,
+                    'autocommit': True,
+                    # psycopg 3 prepara sola una sentencia tras varias ejecuciones
+                    'prepare_threshold': 5 if DATABASE_CONFIG['prepared_statements'] else None,
+                },
+                open=False
+            )
+            await pool.open(wait=True, timeout=DATABASE_CONFIG['pool_timeout'])
+            return pool
+
+        try:
+            self.pool = asyncio.run_coroutine_threadsafe(abrir(), self._loop).result()
+        except Exception:
+            # Sin pool asíncrono las consultas siguen funcionando en hilos sobre psycopg2
+            self.pool = None
+
+    @property
+    def backend(self) -> str:
+        """Implementación en uso: 'psycopg3' o 'threads'"""
+        return 'psycopg3' if self.pool is not None else 'threads'
+
+    def run(self, awaitable: Awaitable) -> Any:
+        """
+        Ejecutar una corrutina en el bucle de eventos y esperar su resultado
+
+        Se llama desde el hilo de la página. Los errores de las consultas se
+        muestran con st.error y la consulta que falló devuelve None, como en
+        DatabaseConnection.execute_query.
+        """
+        async def con_errores():
+            errores = []
+            _errores_consulta.set(errores)
+            return await awaitable, errores
+
+        resultado, errores = asyncio.run_coroutine_threadsafe(con_errores(), self._loop).result()
+        for mensaje in errores:
+            st.error(mensaje)
+        return resultado
+
+    def gather(self, *awaitables: Awaitable) -> List[Any]:
+        """Ejecutar varias corrutinas a la vez y devolver sus resultados en el mismo orden"""
+        async def todas():
+            return await asyncio.gather(*awaitables)
+
+        return self.run(todas())
+
+    async def execute_query(self, query, params=None, fetch=True, statement=None, columnar=False):
+        """
+        Ejecutar una consulta SQL sin bloquear el bucle de eventos
+
+        Devuelve lo mismo que DatabaseConnection.execute_query (lista de filas
+        como diccionarios o ColumnarResult, o filas afectadas si fetch=False),
+        o None si falló.
+        """
+        try:
+            if self.pool is not None:
+                return await self._execute_async(query, params, fetch, columnar)
+            return await self._loop.run_in_executor(
+                self._executor, self._execute_in_thread, query, params, fetch, statement, columnar
+            )
+        except Exception as e:
+            errores = _errores_consulta.get()
+            if errores is not None:
+                errores.append(f"Error en la consulta: {str(e)}")
+            return None
+
+    async def execute_prepared(self, name, params=None, fetch=True, columnar=False):
+        """Ejecutar una consulta registrada en db.statements por su nombre"""
+        statement = self.db.statements.get(name)
+        return await self.execute_query(statement.query, params, fetch, statement=statement, columnar=columnar)
+
+    async def _execute_async(self, query, params, fetch, columnar=False):
+        """Ejecutar la consulta en una conexión del pool de psycopg 3"""
+        checkout_wait = 0.0
+        start = None
+        rows = None
+        error = None
+        try:
+            checkout_start = time.perf_counter()
+            async with self.pool.connection() as connection:
+                checkout_wait = time.perf_counter() - checkout_start
+                start = time.perf_counter()
+                if columnar:
+                    cursor = connection.cursor(row_factory=tuple_row)
+                    await cursor.execute(query, params)
+                else:
+                    cursor = await connection.execute(query, params)
+                if fetch and columnar:
+                    result = ColumnarResult.desde_bloques(cursor.description, [await cursor.fetchall()])
+                    rows = len(result)
+                elif fetch:
+                    result = await cursor.fetchall()
+                    rows = len(result)
+                else:
+                    result = cursor.rowcount
+                    rows = result
+                return result
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.db._record_metrics(query, start, rows, checkout_wait, error,
+                                   read_only=fetch and is_read_query(query))
+
+    def _execute_in_thread(self, query, params, fetch, statement, columnar=False):
+        """Ejecutar la consulta en un hilo del executor con los pools de psycopg2"""
+        read_only = fetch and self.db.read_pool is not None and is_read_query(query)
+        pool = self.db.read_pool if read_only else self.db.connection_pool
+        if pool is None:
+            raise psycopg2.OperationalError("No hay conexión disponible con la base de datos")
+
+        connection = None
+        checkout_wait = 0.0
+        start = None
+        rows = None
+        error = None
+        try:
+            checkout_start = time.perf_counter()
+            connection = pool.getconn()
+            checkout_wait = time.perf_counter() - checkout_start
+            start = time.perf_counter()
+            cursor = self.db._cursor(connection, columnar)
+            self.db.statements.execute(cursor, statement, query, params)
+            if fetch:
+                result = self.db._fetch(cursor, columnar)
+                rows = len(result)
+            else:
+                result = cursor.rowcount
+                rows = result
+            if not connection.autocommit:
+                connection.commit()
+            cursor.close()
+            return result
+        except Exception as e:
+            error = str(e)
+            if connection and not connection.autocommit:
+                connection.rollback()
+            raise
+        finally:
+            if connection:
+                pool.putconn(connection)
+            self.db._record_metrics(query, start, rows, checkout_wait, error, read_only=read_only)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtener el estado del acceso asíncrono (implementación y ocupación del pool)"""
+        stats = {'backend': self.backend, 'max_connections': DATABASE_CONFIG['async_pool_max_connections']}
+        if self.pool is not None:
+            pool_stats = self.pool.get_stats()
+            stats.update({
+                'pool_size': pool_stats.get('pool_size', 0),
+                'idle': pool_stats.get('pool_available', 0),
+                'waiters': pool_stats.get('requests_waiting', 0),
+            })
+        return stats
+
+    def close(self):
+        """Cerrar el pool asíncrono y detener el bucle de eventos"""
+        if self.pool is not None:
+            asyncio.run_coroutine_threadsafe(self.pool.close(), self._loop).result()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+# Instancia global del acceso asíncrono
+@st.cache_resource
+def get_async_database_connection():
+    """Obtener instancia del acceso asíncrono a la base de datos (cached)"""
+    return AsyncDatabaseConnection(get_db())
+
+# Función helper para obtener el acceso asíncrono
+def get_async_db():
+    """Función helper para obtener el acceso asíncrono a la base de datos"""
+    return get_async_database_connection()
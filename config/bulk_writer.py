@@ -0,0 +1,233 @@
+import io
+import time
+from typing import Any, Dict, List, Optional, Sequence
+import psycopg2.extras
+import streamlit as st
+
+
+def _copy_value(value: Any) -> str:
+    """Convertir un valor al formato de texto de COPY"""
+    if value is None:
+        return '\\N'
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+class BulkWriter:
+    """
+    Motor de escritura masiva con semántica de upsert (INSERT ... ON CONFLICT)
+
+    Para cargas chicas usa INSERT multi-fila (psycopg2.extras.execute_values)
+    en lotes de batch_size filas. A partir de copy_threshold filas carga los
+    datos con COPY FROM STDIN en una tabla temporal y los combina con un único
+    INSERT ... SELECT ... ON CONFLICT. Todo ocurre en una sola transacción.
+    Si la tabla no tiene índice único sobre las columnas de conflicto, se
+    combina desde la tabla temporal con UPDATE + INSERT (ver _write).
+    """
+
+    def __init__(self, db, batch_size: int = 1000, copy_threshold: int = 5000):
+        self.db = db
+        self.batch_size = batch_size
+        self.copy_threshold = copy_threshold
+        # (tabla, columnas) con índice único verificado, para no consultar el catálogo en cada escritura
+        self._unique_indexes = set()
+
+    def upsert(self, table_name: str, columns: Sequence[str], rows: List[tuple],
+               conflict_columns: Sequence[str], update_columns: Sequence[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Insertar o actualizar filas en bloque
+
+        Args:
+            table_name: Tabla destino
+            columns: Columnas en el orden de cada fila
+            rows: Filas a escribir (tuplas)
+            conflict_columns: Columnas de la restricción única usada para detectar conflictos
+            update_columns: Columnas a actualizar ante conflicto (por defecto, el resto)
+
+        Returns:
+            Diccionario con 'rows', 'strategy', 'batches' (filas y ms por lote) y 'total_ms',
+            o None si la operación falló (en cuyo caso no se escribe nada)
+        """
+        columns = list(columns)
+        update_columns = list(update_columns) if update_columns is not None else \
+            [c for c in columns if c not in conflict_columns]
+        rows = self._deduplicate(rows, [columns.index(c) for c in conflict_columns])
+
+        if not rows:
+            return {'rows': 0, 'strategy': None, 'batches': [], 'total_ms': 0.0}
+
+        strategy = 'copy' if len(rows) >= self.copy_threshold else 'values'
+        start = time.perf_counter()
+        
+        # Dentro de una transacción activa se escribe sobre su conexión, sin COMMIT propio
+        tx = self.db.current_transaction()
+        if tx is not None:
+            cursor = tx.connection.cursor()
+            strategy, batches = self._write(cursor, strategy, table_name, columns, rows,
+                                            conflict_columns, update_columns, 0.0)
+            cursor.close()
+            return {
+                'rows': len(rows),
+                'strategy': strategy,
+                'batches': batches,
+                'total_ms': round((time.perf_counter() - start) * 1000, 2)
+            }
+        
+        connection = None
+        try:
+            checkout_start = time.perf_counter()
+            connection = self.db.get_connection()
+            checkout_wait = time.perf_counter() - checkout_start
+            if not connection:
+                return None
+
+            cursor = connection.cursor()
+            strategy, batches = self._write(cursor, strategy, table_name, columns, rows,
+                                            conflict_columns, update_columns, checkout_wait)
+            connection.commit()
+            cursor.close()
+
+            return {
+                'rows': len(rows),
+                'strategy': strategy,
+                'batches': batches,
+                'total_ms': round((time.perf_counter() - start) * 1000, 2)
+            }
+        except Exception as e:
+            if connection:
+                connection.rollback()
+            st.error(f"Error en la escritura masiva: {str(e)}")
+            return None
+        finally:
+            if connection:
+                self.db.return_connection(connection)
+
+    def _write(self, cursor, strategy, table_name, columns, rows, conflict_columns, update_columns, checkout_wait):
+        """
+        Escribir las filas con la estrategia indicada
+
+        Si la tabla todavía no tiene un índice único sobre conflict_columns
+        (por ejemplo, sin aplicar la migración que lo crea), ON CONFLICT no es
+        válido: las filas se cargan en la tabla temporal y se combinan con
+        UPDATE + INSERT ... WHERE NOT EXISTS (estrategia 'merge'). El llamador
+        debe serializar las escrituras sobre las mismas claves.
+        """
+        if not self._has_unique_index(cursor, table_name, conflict_columns):
+            return 'merge', self._write_copy(cursor, table_name, columns, rows, checkout_wait,
+                                             merge_query=self._merge_sin_restriccion(
+                                                 table_name, columns, conflict_columns, update_columns))
+
+        conflict_clause = f"ON CONFLICT ({', '.join(conflict_columns)}) "
+        if update_columns:
+            conflict_clause += "DO UPDATE SET " + ', '.join(f"{c} = EXCLUDED.{c}" for c in update_columns)
+        else:
+            conflict_clause += "DO NOTHING"
+
+        if strategy == 'copy':
+            column_list = ', '.join(columns)
+            merge_query = (f"INSERT INTO {table_name} ({column_list}) "
+                           f"SELECT {column_list} FROM {{staging}} {conflict_clause}")
+            return strategy, self._write_copy(cursor, table_name, columns, rows, checkout_wait, merge_query)
+        return strategy, self._write_values(cursor, table_name, columns, rows, conflict_clause, checkout_wait)
+
+    def _has_unique_index(self, cursor, table_name: str, conflict_columns: Sequence[str]) -> bool:
+        """Indicar si hay un índice único (no parcial) exactamente sobre conflict_columns"""
+        clave = (table_name, tuple(sorted(conflict_columns)))
+        if clave in self._unique_indexes:
+            return True
+        cursor.execute("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_index i
+                WHERE i.indrelid = %s::regclass
+                  AND i.indisunique
+                  AND i.indpred IS NULL
+                  AND i.indnatts = %s
+                  AND (SELECT array_agg(att.attname::text ORDER BY att.attname)
+                       FROM pg_attribute att
+                       WHERE att.attrelid = i.indrelid AND att.attnum = ANY(i.indkey)) = %s
+            )
+        """, (table_name, len(conflict_columns), list(clave[1])))
+        existe = cursor.fetchone()[0]
+        if existe:
+            # Solo se recuerda el caso positivo: el índice puede crearse con la aplicación en marcha
+            self._unique_indexes.add(clave)
+        return existe
+
+    @staticmethod
+    def _merge_sin_restriccion(table_name, columns, conflict_columns, update_columns) -> str:
+        """UPDATE de las claves existentes e INSERT del resto, desde la tabla temporal"""
+        coincide = ' AND '.join(f"t.{c} = s.{c}" for c in conflict_columns)
+        column_list = ', '.join(columns)
+        insert = (f"INSERT INTO {table_name} ({column_list}) "
+                  f"SELECT {', '.join(f's.{c}' for c in columns)} FROM {{staging}} s "
+                  f"WHERE NOT EXISTS (SELECT 1 FROM {table_name} t WHERE {coincide})")
+        if not update_columns:
+            return insert
+        update = (f"UPDATE {table_name} t SET {', '.join(f'{c} = s.{c}' for c in update_columns)} "
+                  f"FROM {{staging}} s WHERE {coincide}")
+        return f"{update}; {insert}"
+
+    @staticmethod
+    def _deduplicate(rows: List[tuple], key_indexes: List[int]) -> List[tuple]:
+        """Quitar filas repetidas por clave de conflicto (gana la última)"""
+        unicas = {}
+        for row in rows:
+            unicas[tuple(row[i] for i in key_indexes)] = tuple(row)
+        return list(unicas.values())
+
+    def _chunks(self, rows: List[tuple]):
+        for i in range(0, len(rows), self.batch_size):
+            yield rows[i:i + self.batch_size]
+
+    def _write_values(self, cursor, table_name, columns, rows, conflict_clause, checkout_wait):
+        """Escribir con INSERT multi-fila por lotes"""
+        query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES %s {conflict_clause}"
+        batches = []
+        for numero, lote in enumerate(self._chunks(rows), 1):
+            batch_start = time.perf_counter()
+            psycopg2.extras.execute_values(cursor, query, lote, page_size=len(lote))
+            duration = time.perf_counter() - batch_start
+            self.db.metrics.record(query, duration, len(lote), checkout_wait if numero == 1 else 0.0)
+            batches.append({'batch': numero, 'rows': len(lote), 'ms': round(duration * 1000, 2)})
+        return batches
+
+    def _write_copy(self, cursor, table_name, columns, rows, checkout_wait, merge_query):
+        """
+        Escribir con COPY FROM STDIN a una tabla temporal y combinarla con merge_query
+
+        merge_query referencia la tabla temporal como {staging}. La tabla se
+        elimina al terminar, de modo que la misma transacción puede volver a
+        cargar otro bloque.
+        """
+        staging = f"_carga_{table_name}"
+        column_list = ', '.join(columns)
+        cursor.execute(
+            f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {table_name} WITH NO DATA"
+        )
+
+        batches = []
+        copy_query = f"COPY {staging} ({column_list}) FROM STDIN"
+        for numero, lote in enumerate(self._chunks(rows), 1):
+            batch_start = time.perf_counter()
+            buffer = io.StringIO()
+            for row in lote:
+                buffer.write('\t'.join(_copy_value(v) for v in row))
+                buffer.write('\n')
+            buffer.seek(0)
+            cursor.copy_expert(copy_query, buffer)
+            duration = time.perf_counter() - batch_start
+            self.db.metrics.record(copy_query, duration, len(lote), checkout_wait if numero == 1 else 0.0)
+            batches.append({'batch': numero, 'rows': len(lote), 'ms': round(duration * 1000, 2)})
+
+        merge_query = merge_query.format(staging=staging)
+        merge_start = time.perf_counter()
+        cursor.execute(merge_query)
+        duration = time.perf_counter() - merge_start
+        self.db.metrics.record(merge_query, duration, cursor.rowcount)
+        batches.append({'batch': 'merge', 'rows': cursor.rowcount, 'ms': round(duration * 1000, 2)})
+        cursor.execute(f"DROP TABLE {staging}")
+        return batches
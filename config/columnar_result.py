@@ -0,0 +1,341 @@
+import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+import numpy as np
+
+# Tipos de PostgreSQL (OID de pg_type) agrupados según cómo se almacenan
+_OID_ENTEROS = {20, 21, 23, 26}             # int8, int2, int4, oid
+_OID_REALES = {700, 701, 1700}              # float4, float8, numeric (se convierte a float64)
+_OID_BOOLEANOS = {16}
+_OID_FECHAS = {1082}                        # date
+_OID_TIMESTAMPS = {1114}                    # timestamp sin zona horaria
+_OID_TEXTOS = {25, 1043, 1042, 19}          # text, varchar, bpchar, name
+
+# Filas leídas por bloque al construir el resultado desde un cursor
+FILAS_POR_BLOQUE = 10000
+
+
+class _Columna:
+    """Columna tipada: valores en un arreglo de NumPy y, si hace falta, máscara de nulos"""
+    __slots__ = ('tipo', 'valores', 'nulos', 'categorias')
+
+    def __init__(self, tipo: str, valores: np.ndarray, nulos: Optional[np.ndarray] = None,
+                 categorias: Optional[np.ndarray] = None):
+        # 'entero', 'real', 'booleano', 'fecha', 'texto' u 'objeto'
+        self.tipo = tipo
+        self.valores = valores
+        self.nulos = nulos
+        # Solo para 'texto': valores distintos; 'valores' guarda el código de cada fila (-1 = NULL)
+        self.categorias = categorias
+
+
+def _tipo_por_oid(oid: Optional[int]) -> str:
+    """Tipo de almacenamiento de una columna según el OID informado por el cursor"""
+    if oid in _OID_ENTEROS:
+        return 'entero'
+    if oid in _OID_REALES:
+        return 'real'
+    if oid in _OID_BOOLEANOS:
+        return 'booleano'
+    if oid in _OID_FECHAS or oid in _OID_TIMESTAMPS:
+        return 'fecha'
+    if oid in _OID_TEXTOS:
+        return 'texto'
+    return 'objeto'
+
+
+class _ConstructorColumna:
+    """Acumula los valores de una columna bloque por bloque y arma la _Columna final"""
+    __slots__ = ('tipo', 'oid', 'bloques', 'bloques_nulos', 'indice_categorias')
+
+    def __init__(self, oid: Optional[int]):
+        self.oid = oid
+        self.tipo = _tipo_por_oid(oid)
+        self.bloques: List[np.ndarray] = []
+        self.bloques_nulos: List[np.ndarray] = []
+        self.indice_categorias: Dict[Any, int] = {}
+
+    def agregar(self, valores: Sequence[Any]):
+        """Convertir un bloque de valores de la columna al arreglo tipado correspondiente"""
+        cantidad = len(valores)
+        if self.tipo in ('entero', 'booleano'):
+            nulos = np.fromiter((v is None for v in valores), dtype=bool, count=cantidad)
+            dtype = np.int64 if self.tipo == 'entero' else bool
+            self.bloques.append(np.fromiter((0 if v is None else v for v in valores), dtype=dtype, count=cantidad))
+            self.bloques_nulos.append(nulos)
+        elif self.tipo == 'real':
+            self.bloques.append(np.fromiter((np.nan if v is None else float(v) for v in valores),
+                                            dtype=np.float64, count=cantidad))
+        elif self.tipo == 'fecha':
+            unidad = 'D' if self.oid in _OID_FECHAS else 'us'
+            self.bloques.append(np.array(
+                [np.datetime64('NaT') if v is None else np.datetime64(v, unidad) for v in valores],
+                dtype=f'datetime64[{unidad}]'
+            ))
+        elif self.tipo == 'texto':
+            # Codificación por diccionario: cada texto distinto se guarda una sola vez
+            indice = self.indice_categorias
+            self.bloques.append(np.fromiter(
+                (-1 if v is None else indice.setdefault(v, len(indice)) for v in valores),
+                dtype=np.int32, count=cantidad
+            ))
+        else:
+            bloque = np.empty(cantidad, dtype=object)
+            bloque[:] = list(valores)
+            self.bloques.append(bloque)
+
+    def construir(self) -> _Columna:
+        """Unir los bloques en una única columna"""
+        valores = np.concatenate(self.bloques) if self.bloques else self._vacia()
+        if self.tipo in ('entero', 'booleano'):
+            nulos = np.concatenate(self.bloques_nulos) if self.bloques_nulos else np.zeros(0, dtype=bool)
+            return _Columna(self.tipo, valores, nulos if nulos.any() else None)
+        if self.tipo == 'texto':
+            categorias = np.empty(len(self.indice_categorias), dtype=object)
+            categorias[:] = list(self.indice_categorias)
+            return _Columna(self.tipo, valores, categorias=categorias)
+        return _Columna(self.tipo, valores)
+
+    def _vacia(self) -> np.ndarray:
+        """Arreglo vacío del tipo de la columna"""
+        dtypes = {'entero': np.int64, 'booleano': bool, 'real': np.float64, 'texto': np.int32, 'objeto': object}
+        if self.tipo == 'fecha':
+            return np.zeros(0, dtype='datetime64[D]' if self.oid in _OID_FECHAS else 'datetime64[us]')
+        return np.zeros(0, dtype=dtypes[self.tipo])
+
+
+class ColumnarResult:
+    """
+    Resultado de una consulta almacenado por columnas
+
+    A diferencia de una lista de RealDictRow (un diccionario por fila, con
+    las claves repetidas), cada columna es un arreglo de NumPy tipado según
+    el OID de PostgreSQL: enteros y booleanos con máscara de nulos, reales
+    con NaN, fechas como datetime64 y textos codificados por diccionario
+    (un código int32 por fila más los valores distintos). to_dataframe()
+    arma el DataFrame sobre esos mismos arreglos, sin copiarlos.
+
+    Para el código que espera filas, iterar el resultado devuelve
+    diccionarios construidos al vuelo, uno por vez.
+    """
+
+    def __init__(self, columnas: List[str], datos: Dict[str, _Columna], filas: int):
+        self.columnas = columnas
+        self._datos = datos
+        self._filas = filas
+
+    @classmethod
+    def desde_cursor(cls, cursor, filas_por_bloque: int = FILAS_POR_BLOQUE) -> 'ColumnarResult':
+        """
+        Leer el resultado pendiente de un cursor de tuplas (no RealDictCursor)
+
+        Las filas se leen por bloques: solo un bloque de tuplas existe a la vez
+        en memoria mientras se completan los arreglos de cada columna.
+        """
+        def bloques():
+            while True:
+                bloque = cursor.fetchmany(filas_por_bloque)
+                if not bloque:
+                    return
+                yield bloque
+
+        return cls.desde_bloques(cursor.description, bloques())
+
+    @classmethod
+    def desde_bloques(cls, description, bloques: Iterable[Sequence[tuple]]) -> 'ColumnarResult':
+        """
+        Armar el resultado a partir de bloques de tuplas ya leídos
+
+        Args:
+            description: cursor.description (nombre y OID de cada columna)
+            bloques: Listas de filas como tuplas, en el orden de description
+        """
+        columnas = [d[0] for d in description]
+        constructores = [_ConstructorColumna(d[1]) for d in description]
+        total = 0
+        for bloque in bloques:
+            if not bloque:
+                continue
+            total += len(bloque)
+            for constructor, valores in zip(constructores, zip(*bloque)):
+                constructor.agregar(valores)
+        datos = {nombre: constructor.construir() for nombre, constructor in zip(columnas, constructores)}
+        return cls(columnas, datos, total)
+
+    @classmethod
+    def desde_filas(cls, filas: Sequence[Dict[str, Any]], columnas: Sequence[str] = None) -> 'ColumnarResult':
+        """Convertir una lista de diccionarios (por ejemplo, un resultado de execute_query)"""
+        if columnas is None:
+            columnas = list(filas[0].keys()) if filas else []
+        datos = {}
+        for nombre in columnas:
+            valores = [fila.get(nombre) for fila in filas]
+            constructor = _ConstructorColumna(_oid_por_valores(valores))
+            if valores:
+                constructor.agregar(valores)
+            datos[nombre] = constructor.construir()
+        return cls(list(columnas), datos, len(filas))
+
+    def __len__(self) -> int:
+        return self._filas
+
+    def __bool__(self) -> bool:
+        return self._filas > 0
+
+    def __contains__(self, columna: str) -> bool:
+        return columna in self._datos
+
+    def __getitem__(self, columna: str) -> np.ndarray:
+        """Valores de una columna como arreglo (los textos como arreglo de objetos)"""
+        return self.columna(columna)
+
+    def columna(self, nombre: str) -> np.ndarray:
+        """
+        Obtener los valores de una columna
+
+        Enteros y booleanos con NULL se devuelven como float64/objeto con
+        NaN/None en los nulos; el resto, sin copiar.
+        """
+        datos = self._datos[nombre]
+        if datos.tipo == 'texto':
+            return self._textos(datos)
+        if datos.nulos is not None:
+            if datos.tipo == 'entero':
+                valores = datos.valores.astype(np.float64)
+                valores[datos.nulos] = np.nan
+            else:
+                valores = datos.valores.astype(object)
+                valores[datos.nulos] = None
+            return valores
+        return datos.valores
+
+    @staticmethod
+    def _textos(datos: _Columna) -> np.ndarray:
+        """Materializar una columna de texto (referencias a los valores distintos, sin duplicarlos)"""
+        if len(datos.categorias) == 0:
+            return np.full(len(datos.valores), None, dtype=object)
+        # El código -1 (NULL) apunta a un None agregado al final de las categorías
+        categorias = np.append(datos.categorias, None)
+        return categorias[datos.valores]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Recorrer las filas como diccionarios (se construye uno por vez)"""
+        columnas = [self._valores_python(nombre) for nombre in self.columnas]
+        for fila in zip(*columnas):
+            yield dict(zip(self.columnas, fila))
+
+    def _valores_python(self, nombre: str) -> List[Any]:
+        """Valores de una columna como objetos de Python (None en los nulos)"""
+        datos = self._datos[nombre]
+        if datos.tipo == 'texto':
+            return self._textos(datos).tolist()
+        valores = datos.valores.tolist()
+        if datos.tipo == 'real':
+            return [None if v != v else v for v in valores]
+        if datos.nulos is not None:
+            return [None if nulo else v for v, nulo in zip(valores, datos.nulos.tolist())]
+        return valores
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Convertir a lista de diccionarios (el formato de execute_query)"""
+        return list(self)
+
+    def to_dataframe(self, categoricas: bool = False):
+        """
+        Convertir a DataFrame de pandas sin copiar los arreglos
+
+        Args:
+            categoricas: Si es True, los textos quedan como pandas.Categorical
+                         (códigos int32 + valores distintos); si no, como
+                         objetos que referencian los valores distintos
+        """
+        import pandas as pd
+
+        columnas = {}
+        for nombre in self.columnas:
+            datos = self._datos[nombre]
+            if datos.tipo == 'texto':
+                if categoricas:
+                    columnas[nombre] = pd.Categorical.from_codes(datos.valores, categories=datos.categorias)
+                else:
+                    columnas[nombre] = self._textos(datos)
+            elif datos.nulos is not None and datos.tipo == 'entero':
+                columnas[nombre] = pd.arrays.IntegerArray(datos.valores, datos.nulos)
+            elif datos.nulos is not None:
+                columnas[nombre] = pd.arrays.BooleanArray(datos.valores, datos.nulos)
+            else:
+                columnas[nombre] = datos.valores
+        return pd.DataFrame(columnas, columns=self.columnas, copy=False)
+
+    def nbytes(self) -> int:
+        """Memoria aproximada de los arreglos (sin contar los textos distintos)"""
+        total = 0
+        for datos in self._datos.values():
+            total += datos.valores.nbytes
+            if datos.nulos is not None:
+                total += datos.nulos.nbytes
+            if datos.categorias is not None:
+                total += datos.categorias.nbytes
+        return total
+
+
+def dataframe_desde_copy(description, buffer, categoricas: bool = False):
+    """
+    Armar un DataFrame a partir de la salida de COPY ... TO STDOUT (FORMAT csv, NULL '\\N')
+
+    pandas lee el CSV con el tipo de cada columna fijado de antemano según
+    el OID de description, sin inferirlo: enteros como Int64, reales como
+    float64, booleanos como boolean, fechas con formato explícito y textos
+    como objetos (o category si categoricas=True).
+
+    Args:
+        description: cursor.description de la consulta (nombre y OID de cada columna)
+        buffer: Texto CSV producido por COPY, posicionado al inicio
+        categoricas: Si es True, los textos quedan como category
+    """
+    import pandas as pd
+
+    columnas = [d[0] for d in description]
+    tipos = {d[0]: _tipo_por_oid(d[1]) for d in description}
+    dtypes = {}
+    for nombre, tipo in tipos.items():
+        if tipo == 'entero':
+            dtypes[nombre] = 'Int64'
+        elif tipo == 'real':
+            dtypes[nombre] = 'float64'
+        elif tipo == 'texto' and categoricas:
+            dtypes[nombre] = 'category'
+        else:
+            dtypes[nombre] = object
+
+    try:
+        df = pd.read_csv(buffer, header=None, names=columnas, dtype=dtypes,
+                         na_values=['\\N'], keep_default_na=False)
+    except pd.errors.EmptyDataError:
+        return ColumnarResult.desde_bloques(description, []).to_dataframe(categoricas)
+
+    for d in description:
+        nombre, tipo = d[0], tipos[d[0]]
+        if tipo == 'booleano':
+            df[nombre] = df[nombre].map({'t': True, 'f': False}).astype('boolean')
+        elif tipo == 'fecha':
+            formato = '%Y-%m-%d' if d[1] in _OID_FECHAS else 'ISO8601'
+            df[nombre] = pd.to_datetime(df[nombre], format=formato)
+    return df
+
+
+def _oid_por_valores(valores: Sequence[Any]) -> Optional[int]:
+    """Deducir el OID equivalente a partir del primer valor no nulo (para desde_filas)"""
+    muestra = next((v for v in valores if v is not None), None)
+    if isinstance(muestra, bool):
+        return 16
+    if isinstance(muestra, int):
+        return 20
+    if isinstance(muestra, float):
+        return 701
+    if isinstance(muestra, datetime.datetime):
+        return 1114 if muestra.tzinfo is None else None
+    if isinstance(muestra, datetime.date):
+        return 1082
+    if isinstance(muestra, str):
+        return 25
+    return None
@@ -0,0 +1,252 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+import psycopg2
+import psycopg2.extensions
+from psycopg2 import pool as pg_pool
+
+
+class PoolTimeoutError(pg_pool.PoolError):
+    """No se pudo obtener una conexión del pool dentro del tiempo de espera"""
+
+
+class _Waiter:
+    """Hilo esperando una conexión en la cola del pool"""
+    __slots__ = ('event', 'connection', 'slot')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.connection = None
+        # True cuando se le cede un lugar libre para abrir una conexión nueva
+        self.slot = False
+
+
+class ThreadSafeConnectionPool:
+    """
+    Pool de conexiones PostgreSQL seguro para múltiples hilos.
+
+    A diferencia de psycopg2.pool.SimpleConnectionPool, puede compartirse entre
+    las sesiones de Streamlit: cuando no hay conexiones libres el hilo espera en
+    una cola FIFO hasta que otra sesión devuelva una conexión o se agote el
+    tiempo de espera. Las conexiones que estuvieron ociosas más de
+    health_check_interval segundos se verifican antes de entregarlas.
+    Si se indica configure, se invoca con cada conexión nueva antes de usarla
+    (por ejemplo, para dejarla en autocommit).
+    """
+
+    def __init__(self, minconn: int, maxconn: int, timeout: float = 30.0,
+                 health_check_interval: float = 60.0,
+                 configure: Optional[Callable[[Any], None]] = None, **connect_kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Tamaños de pool inválidos: se requiere 0 <= minconn <= maxconn y maxconn >= 1")
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._configure = configure
+        self._connect_kwargs = connect_kwargs
+
+        self._lock = threading.Lock()
+        self._idle = deque()  # (conexión, instante en que quedó libre)
+        self._in_use = {}
+        self._waiters = deque()
+        self._opened = 0
+        self.closed = False
+
+        self._stats = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'total_wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'waited_checkouts': 0,
+            'connections_created': 0,
+            'connections_discarded': 0,
+            'health_check_failures': 0,
+        }
+
+        for _ in range(minconn):
+            connection = self._connect()
+            self._opened += 1
+            self._idle.append((connection, time.monotonic()))
+
+    def _connect(self):
+        """Abrir una conexión nueva con los parámetros del pool"""
+        connection = psycopg2.connect(**self._connect_kwargs)
+        if self._configure is not None:
+            try:
+                self._configure(connection)
+            except Exception:
+                connection.close()
+                raise
+        self._stats['connections_created'] += 1
+        return connection
+
+    def _is_healthy(self, connection, idle_since: float) -> bool:
+        """Verificar que una conexión ociosa siga siendo utilizable"""
+        if connection.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            if not connection.autocommit:
+                connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        """Cerrar una conexión que ya no debe volver al pool"""
+        self._stats['connections_discarded'] += 1
+        try:
+            if not connection.closed:
+                connection.close()
+        except Exception:
+            pass
+
+    def getconn(self, timeout: Optional[float] = None):
+        """
+        Obtener una conexión del pool, esperando si es necesario
+
+        Args:
+            timeout: Segundos máximos de espera (por defecto el del pool)
+
+        Returns:
+            Conexión psycopg2 lista para usar
+        """
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+
+        while True:
+            connection, idle_since, open_new, waiter = None, None, False, None
+
+            with self._lock:
+                if self.closed:
+                    raise pg_pool.PoolError("El pool de conexiones está cerrado")
+
+                if self._idle and not self._waiters:
+                    connection, idle_since = self._idle.pop()
+                elif self._opened < self.maxconn and not self._waiters:
+                    self._opened += 1
+                    open_new = True
+                else:
+                    waiter = _Waiter()
+                    self._waiters.append(waiter)
+
+            if waiter is not None:
+                remaining = timeout - (time.monotonic() - start)
+                waiter.event.wait(max(0.0, remaining))
+                with self._lock:
+                    if not waiter.event.is_set():
+                        self._waiters.remove(waiter)
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"No hay conexiones disponibles tras esperar {timeout:.1f}s "
+                            f"({len(self._in_use)} en uso, máximo {self.maxconn})"
+                        )
+                if waiter.connection is not None:
+                    connection, idle_since = waiter.connection, time.monotonic()
+                else:
+                    open_new = waiter.slot
+
+            if open_new:
+                try:
+                    connection = self._connect()
+                except Exception:
+                    self._release_slot()
+                    raise
+            elif connection is not None and not self._is_healthy(connection, idle_since):
+                with self._lock:
+                    self._stats['health_check_failures'] += 1
+                self._discard(connection)
+                try:
+                    connection = self._connect()
+                except Exception:
+                    self._release_slot()
+                    raise
+
+            if connection is None:
+                continue
+
+            wait_time = time.monotonic() - start
+            with self._lock:
+                self._in_use[id(connection)] = connection
+                self._stats['checkouts'] += 1
+                self._stats['total_wait_time'] += wait_time
+                self._stats['max_wait_time'] = max(self._stats['max_wait_time'], wait_time)
+                if waiter is not None:
+                    self._stats['waited_checkouts'] += 1
+            return connection
+
+    def _release_slot(self):
+        """Liberar el lugar de una conexión que no pudo abrirse o fue descartada"""
+        with self._lock:
+            self._opened -= 1
+            if self._waiters and not self.closed:
+                waiter = self._waiters.popleft()
+                self._opened += 1
+                waiter.slot = True
+                waiter.event.set()
+
+    def putconn(self, connection, close: bool = False):
+        """Devolver una conexión al pool, entregándola al primer hilo en espera"""
+        with self._lock:
+            if self._in_use.pop(id(connection), None) is None:
+                raise pg_pool.PoolError("La conexión no pertenece a este pool")
+
+        if not close and not connection.closed:
+            try:
+                status = connection.info.transaction_status
+                if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except Exception:
+                close = True
+
+        if close or connection.closed or self.closed:
+            self._discard(connection)
+            self._release_slot()
+            return
+
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.connection = connection
+                waiter.event.set()
+            else:
+                self._idle.append((connection, time.monotonic()))
+
+    def closeall(self):
+        """Cerrar todas las conexiones del pool"""
+        with self._lock:
+            self.closed = True
+            connections = [conn for conn, _ in self._idle] + list(self._in_use.values())
+            self._idle.clear()
+            self._in_use.clear()
+            self._opened = 0
+            waiters = list(self._waiters)
+            self._waiters.clear()
+
+        for waiter in waiters:
+            waiter.event.set()
+        for connection in connections:
+            self._discard(connection)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtener contadores en vivo del pool"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'min_connections': self.minconn,
+                'max_connections': self.maxconn,
+                'open_connections': self._opened,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'waiters': len(self._waiters),
+            })
+        checkouts = stats['checkouts']
+        stats['avg_wait_time'] = stats['total_wait_time'] / checkouts if checkouts else 0.0
+        return stats
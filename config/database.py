@@ -1,22 +1,66 @@
+import io
+import re
+import threading
+from functools import lru_cache
+import time
+import uuid
+from contextlib import contextmanager
 import psycopg2
 import psycopg2.extras
-from psycopg2 import pool
 import streamlit as st
-from config.settings import DATABASE_CONFIG
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from config.settings import DATABASE_CONFIG, MONITORING_CONFIG
+from config.connection_pool import ThreadSafeConnectionPool
+from config.query_metrics import QueryMetrics, normalize_sql
+from config.bulk_writer import BulkWriter
+from config.transaction import Transaction
+from config.prepared_statements import PreparingConnection, StatementRegistry
+from config.columnar_result import ColumnarResult, dataframe_desde_copy
+
+_RE_READ_STATEMENT = re.compile(r"^\(*\s*(SELECT|WITH|VALUES|TABLE)\b", re.IGNORECASE)
+_RE_WRITE_KEYWORDS = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|INTO|FOR\s+(?:NO\s+KEY\s+)?UPDATE|FOR\s+(?:KEY\s+)?SHARE|NEXTVAL|SETVAL)\b",
+    re.IGNORECASE
+)
+
+@lru_cache(maxsize=1024)
+def is_read_query(query) -> bool:
+    """Determinar si una sentencia es una lectura pura (sin escrituras ni bloqueos)"""
+    normalized = normalize_sql(query)
+    return bool(_RE_READ_STATEMENT.match(normalized)) and not _RE_WRITE_KEYWORDS.search(normalized)
 
 class DatabaseConnection:
     """Clase para manejar la conexión a la base de datos PostgreSQL"""
     
     def __init__(self):
         self.connection_pool = None
+        self.read_pool = None
+        # Transacción activa por hilo (cada sesión de Streamlit corre en su propio hilo)
+        self._local = threading.local()
+        self.metrics = QueryMetrics(
+            slow_query_threshold_ms=MONITORING_CONFIG['slow_query_threshold_ms'],
+            slow_log_size=MONITORING_CONFIG['slow_query_log_size'],
+            enabled=MONITORING_CONFIG['enabled']
+        )
+        self.statements = StatementRegistry(enabled=DATABASE_CONFIG['prepared_statements'])
+        self.bulk_writer = BulkWriter(
+            self,
+            batch_size=DATABASE_CONFIG['bulk_batch_size'],
+            copy_threshold=DATABASE_CONFIG['bulk_copy_threshold']
+        )
         self._create_connection_pool()
+        if DATABASE_CONFIG['read_pool_enabled']:
+            self._create_read_pool()
     
     def _create_connection_pool(self):
         """Crear pool de conexiones a la base de datos"""
         try:
-            self.connection_pool = psycopg2.pool.SimpleConnectionPool(
-                minconn=1,
-                maxconn=10,
+            self.connection_pool = ThreadSafeConnectionPool(
+                minconn=DATABASE_CONFIG['pool_min_connections'],
+                maxconn=DATABASE_CONFIG['pool_max_connections'],
+                timeout=DATABASE_CONFIG['pool_timeout'],
+                health_check_interval=DATABASE_CONFIG['pool_health_check_interval'],
+                connection_factory=PreparingConnection,
                 host=DATABASE_CONFIG['host'],
                 port=DATABASE_CONFIG['port'],
                 database=DATABASE_CONFIG['database'],
@@ -28,6 +72,35 @@ class DatabaseConnection:
             st.error(f"Error al conectar con la base de datos: {str(e)}")
             st.info("Verifica que PostgreSQL esté ejecutándose y las credenciales sean correctas.")
     
+    def _create_read_pool(self):
+        """Crear el pool de lectura: conexiones en autocommit, sin BEGIN/COMMIT por consulta"""
+        try:
+            self.read_pool = ThreadSafeConnectionPool(
+                minconn=DATABASE_CONFIG['read_pool_min_connections'],
+                maxconn=DATABASE_CONFIG['read_pool_max_connections'],
+                timeout=DATABASE_CONFIG['pool_timeout'],
+                health_check_interval=DATABASE_CONFIG['pool_health_check_interval'],
+                configure=self._configure_read_connection,
+                connection_factory=PreparingConnection,
+                host=DATABASE_CONFIG['host'],
+                port=DATABASE_CONFIG['port'],
+                database=DATABASE_CONFIG['database'],
+                user=DATABASE_CONFIG['user'],
+                password=DATABASE_CONFIG['password'],
+                sslmode=DATABASE_CONFIG.get('sslmode', 'prefer')
+            )
+        except Exception:
+            # Sin pool de lectura las consultas siguen funcionando por el pool principal
+            self.read_pool = None
+    
+    @staticmethod
+    def _configure_read_connection(connection):
+        """Dejar una conexión del pool de lectura en autocommit (y read-only si está habilitado)"""
+        if DATABASE_CONFIG['read_pool_readonly']:
+            connection.set_session(readonly=True, autocommit=True)
+        else:
+            connection.autocommit = True
+    
     def get_connection(self):
         """Obtener una conexión del pool"""
         if self.connection_pool:
@@ -39,26 +112,104 @@ class DatabaseConnection:
         if self.connection_pool and connection:
             self.connection_pool.putconn(connection)
     
-    def execute_query(self, query, params=None, fetch=True):
-        """Ejecutar una consulta SQL"""
+    def current_transaction(self) -> Optional[Transaction]:
+        """Obtener la transacción activa del hilo actual, si la hay"""
+        return getattr(self._local, 'transaction', None)
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Ejecutar un bloque de trabajo sobre una sola conexión con un único COMMIT
+        
+        Uso:
+            with db.transaction() as tx:
+                pool_model.create_pool(...)
+                analisis_model.save_analisis_completo(...)
+        
+        Si ya hay una transacción activa en el hilo, el bloque anidado se
+        ejecuta como SAVEPOINT de la transacción externa.
+        """
+        actual = self.current_transaction()
+        if actual is not None:
+            with actual.savepoint():
+                yield actual
+            return
+        
+        checkout_start = time.perf_counter()
+        connection = self.get_connection()
+        checkout_wait = time.perf_counter() - checkout_start
+        if not connection:
+            raise psycopg2.OperationalError("No hay conexión disponible con la base de datos")
+        
+        tx = Transaction(self, connection, checkout_wait)
+        self._local.transaction = tx
+        try:
+            yield tx
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            self._local.transaction = None
+            self.return_connection(connection)
+        
+        tx.run_after_commit()
+    
+    def after_commit(self, callback: Callable[[], None]):
+        """Ejecutar una acción tras el COMMIT de la transacción activa (o de inmediato si no hay)"""
+        tx = self.current_transaction()
+        if tx is not None:
+            tx.after_commit(callback)
+        else:
+            callback()
+    
+    def execute_query(self, query, params=None, fetch=True, read_only=None, statement=None, columnar=False):
+        """
+        Ejecutar una consulta SQL
+        
+        Las lecturas puras fuera de una transacción van al pool de lectura en
+        autocommit. read_only=None lo detecta a partir del SQL; True/False lo fuerza.
+        Si se indica statement (PreparedStatement), se ejecuta con EXECUTE.
+        Con columnar=True el resultado es un ColumnarResult en lugar de una
+        lista de diccionarios.
+        """
+        tx = self.current_transaction()
+        if tx is not None:
+            return tx.execute_query(query, params, fetch, statement, columnar)
+        
+        if read_only is None:
+            read_only = fetch and is_read_query(query)
+        if read_only and fetch and self.read_pool is not None:
+            return self._execute_read(query, params, statement, columnar)
+        
         connection = None
+        checkout_wait = 0.0
+        start = None
+        rows = None
+        error = None
         try:
+            checkout_start = time.perf_counter()
             connection = self.get_connection()
+            checkout_wait = time.perf_counter() - checkout_start
             if connection:
-                cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-                cursor.execute(query, params)
+                start = time.perf_counter()
+                cursor = self._cursor(connection, columnar)
+                self.statements.execute(cursor, statement, query, params)
                 
                 if fetch:
-                    result = cursor.fetchall()
+                    result = self._fetch(cursor, columnar)
                     # Hacer commit para confirmar la transacción
                     connection.commit()
+                    rows = len(result)
                 else:
                     connection.commit()
                     result = cursor.rowcount
+                    rows = result
                 
                 cursor.close()
                 return result
         except Exception as e:
+            error = str(e)
             if connection:
                 connection.rollback()
             st.error(f"Error en la consulta: {str(e)}")
@@ -66,20 +217,156 @@ class DatabaseConnection:
         finally:
             if connection:
                 self.return_connection(connection)
+            self._record_metrics(query, start, rows, checkout_wait, error)
+    
+    def execute_prepared(self, name, params=None, fetch=True, columnar=False):
+        """Ejecutar una consulta registrada en self.statements por su nombre"""
+        statement = self.statements.get(name)
+        return self.execute_query(statement.query, params, fetch, statement=statement, columnar=columnar)
+    
+    def execute_query_df(self, query, params=None, statement=None, copy=False, categoricas=False):
+        """
+        Ejecutar una lectura y devolver el resultado como DataFrame de pandas
+        
+        Las filas se leen como tuplas y se guardan por columna con el tipo
+        que indica PostgreSQL (ver ColumnarResult), sin un diccionario por fila
+        ni inferencia de tipos sobre columnas de objetos. Con copy=True el
+        resultado se transfiere con COPY ... TO STDOUT y pandas lo lee de una
+        vez, lo que conviene para resultados grandes.
+        
+        Returns:
+            DataFrame (vacío, con sus columnas, si no hay filas), o None si falló
+        """
+        if copy:
+            return self._copy_dataframe(query, params, categoricas)
+        result = self.execute_query(query, params, statement=statement, columnar=True)
+        return result.to_dataframe(categoricas) if result is not None else None
+    
+    def execute_prepared_df(self, name, params=None, copy=False, categoricas=False):
+        """Ejecutar una consulta registrada en self.statements y devolver un DataFrame"""
+        statement = self.statements.get(name)
+        # COPY no admite EXECUTE: con copy=True se envía el texto de la consulta
+        return self.execute_query_df(statement.query, params, statement=None if copy else statement,
+                                     copy=copy, categoricas=categoricas)
+    
+    def _copy_dataframe(self, query, params=None, categoricas=False):
+        """Leer el resultado de una consulta con COPY ... TO STDOUT en formato CSV"""
+        tx = self.current_transaction()
+        owned = tx is None
+        read_only = owned and self.read_pool is not None and is_read_query(query)
+        connection = None
+        checkout_wait = 0.0
+        start = None
+        rows = None
+        error = None
+        try:
+            checkout_start = time.perf_counter()
+            if not owned:
+                connection = tx.connection
+            elif read_only:
+                connection = self.read_pool.getconn()
+            else:
+                connection = self.get_connection()
+            checkout_wait = time.perf_counter() - checkout_start
+            if connection:
+                start = time.perf_counter()
+                cursor = connection.cursor()
+                sql = cursor.mogrify(query, params).decode(psycopg2.extensions.encodings[connection.encoding])
+                # Tipos de las columnas, sin leer filas
+                cursor.execute(f"SELECT * FROM ({sql}) AS consulta LIMIT 0")
+                description = cursor.description
+                buffer = io.StringIO()
+                cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, NULL '\\N')", buffer)
+                cursor.close()
+                if owned and not connection.autocommit:
+                    connection.commit()
+                buffer.seek(0)
+                df = dataframe_desde_copy(description, buffer, categoricas)
+                rows = len(df)
+                return df
+        except Exception as e:
+            error = str(e)
+            if not owned:
+                raise
+            if connection and not connection.autocommit:
+                connection.rollback()
+            st.error(f"Error en la consulta: {str(e)}")
+            return None
+        finally:
+            if connection and owned:
+                if read_only:
+                    self.read_pool.putconn(connection)
+                else:
+                    self.return_connection(connection)
+            self._record_metrics(query, start, rows, checkout_wait, error, read_only=read_only)
+    
+    @staticmethod
+    def _cursor(connection, columnar=False):
+        """Cursor de diccionarios, o de tuplas si el resultado se arma por columnas"""
+        if columnar:
+            return connection.cursor()
+        return connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    
+    @staticmethod
+    def _fetch(cursor, columnar=False):
+        """Leer todas las filas pendientes del cursor"""
+        if columnar:
+            return ColumnarResult.desde_cursor(cursor)
+        return cursor.fetchall()
+    
+    def _execute_read(self, query, params=None, statement=None, columnar=False):
+        """Ejecutar una lectura en el pool de lectura, sin abrir ni confirmar transacción"""
+        connection = None
+        checkout_wait = 0.0
+        start = None
+        rows = None
+        error = None
+        try:
+            checkout_start = time.perf_counter()
+            connection = self.read_pool.getconn()
+            checkout_wait = time.perf_counter() - checkout_start
+            start = time.perf_counter()
+            cursor = self._cursor(connection, columnar)
+            self.statements.execute(cursor, statement, query, params)
+            result = self._fetch(cursor, columnar)
+            rows = len(result)
+            cursor.close()
+            return result
+        except Exception as e:
+            error = str(e)
+            st.error(f"Error en la consulta: {str(e)}")
+            return None
+        finally:
+            if connection:
+                self.read_pool.putconn(connection)
+            self._record_metrics(query, start, rows, checkout_wait, error, read_only=True)
     
     def execute_many(self, query, params_list):
         """Ejecutar múltiples consultas"""
+        tx = self.current_transaction()
+        if tx is not None:
+            return tx.execute_many(query, params_list)
+        
         connection = None
+        checkout_wait = 0.0
+        start = None
+        rows = None
+        error = None
         try:
+            checkout_start = time.perf_counter()
             connection = self.get_connection()
+            checkout_wait = time.perf_counter() - checkout_start
             if connection:
+                start = time.perf_counter()
                 cursor = connection.cursor()
                 cursor.executemany(query, params_list)
                 connection.commit()
                 result = cursor.rowcount
+                rows = result
                 cursor.close()
                 return result
         except Exception as e:
+            error = str(e)
             if connection:
                 connection.rollback()
             st.error(f"Error en la ejecución múltiple: {str(e)}")
@@ -87,11 +374,84 @@ class DatabaseConnection:
         finally:
             if connection:
                 self.return_connection(connection)
+            self._record_metrics(query, start, rows, checkout_wait, error)
+    
+    def bulk_upsert(self, table_name, columns, rows, conflict_columns, update_columns=None):
+        """Insertar o actualizar filas en bloque (INSERT multi-fila o COPY, según el volumen)"""
+        return self.bulk_writer.upsert(table_name, columns, rows, conflict_columns, update_columns)
+    
+    def stream_query(self, query, params=None, chunk_size=None) -> Iterator[List[tuple]]:
+        """
+        Ejecutar una consulta con un cursor del lado del servidor y devolver las filas en bloques
+        
+        La conexión queda tomada mientras se consume el generador; solo un bloque
+        de chunk_size filas (tuplas) está en memoria a la vez. Si la consulta
+        falla, la excepción se propaga al consumidor.
+        """
+        chunk_size = chunk_size or DATABASE_CONFIG['stream_chunk_size']
+        tx = self.current_transaction()
+        owned = tx is None
+        connection = None
+        checkout_wait = 0.0
+        start = None
+        rows = 0
+        error = None
+        try:
+            checkout_start = time.perf_counter()
+            connection = self.get_connection() if owned else tx.connection
+            checkout_wait = time.perf_counter() - checkout_start
+            if connection is None:
+                raise psycopg2.OperationalError("No hay conexión disponible con la base de datos")
+            start = time.perf_counter()
+            cursor = connection.cursor(name=f"stream_{uuid.uuid4().hex}")
+            cursor.itersize = chunk_size
+            cursor.execute(query, params)
+            
+            while True:
+                filas = cursor.fetchmany(chunk_size)
+                if not filas:
+                    break
+                rows += len(filas)
+                yield filas
+            
+            cursor.close()
+            if owned:
+                connection.commit()
+        except Exception as e:
+            error = str(e)
+            if owned and connection:
+                connection.rollback()
+            # Un error a mitad de la lectura no debe parecer el final del resultado:
+            # el consumidor (ej. exportar_a_archivo_temporal) descarta lo que escribió
+            raise
+        finally:
+            if connection and owned:
+                self.return_connection(connection)
+            self._record_metrics(query, start, rows, checkout_wait, error)
+    
+    def _record_metrics(self, query, start, rows, checkout_wait, error, read_only=False):
+        """Registrar la ejecución de una sentencia en las métricas de consultas"""
+        duration = time.perf_counter() - start if start is not None else 0.0
+        self.metrics.record(query, duration, rows, checkout_wait, error, read_only)
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Obtener contadores del pool (en uso, libres, en espera, tiempos de espera)"""
+        if self.connection_pool:
+            return self.connection_pool.get_stats()
+        return {}
+    
+    def get_read_pool_stats(self) -> Dict[str, Any]:
+        """Obtener contadores del pool de lectura (vacío si está deshabilitado)"""
+        if self.read_pool:
+            return self.read_pool.get_stats()
+        return {}
     
     def close_pool(self):
         """Cerrar el pool de conexiones"""
         if self.connection_pool:
             self.connection_pool.closeall()
+        if self.read_pool:
+            self.read_pool.closeall()
 
 # Instancia global de la conexión
 @st.cache_resource
@@ -0,0 +1,129 @@
+import re
+import threading
+from typing import Any, Dict, Optional, Tuple
+import psycopg2.errors
+import psycopg2.extensions
+
+_RE_PLACEHOLDERS = re.compile(r"%%|%s|%\(")
+_RE_STATEMENT_NAME = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def to_positional(query: str) -> Tuple[str, int]:
+    """
+    Convertir los marcadores %s de psycopg2 a parámetros posicionales $1, $2, ...
+
+    Returns:
+        Tupla (sql para PREPARE, cantidad de parámetros)
+    """
+    count = 0
+
+    def reemplazar(match):
+        nonlocal count
+        token = match.group(0)
+        if token == '%%':
+            return '%'
+        if token == '%(':
+            raise ValueError("Las sentencias preparadas solo admiten parámetros posicionales (%s)")
+        count += 1
+        return f"${count}"
+
+    return _RE_PLACEHOLDERS.sub(reemplazar, query), count
+
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """
+    Conexión que recuerda qué sentencias ya preparó en su sesión del servidor
+
+    Se usa como connection_factory de los pools: una conexión nueva (incluida
+    la que reemplaza a una conexión caída) empieza sin sentencias preparadas,
+    por lo que se vuelven a preparar en su primer uso sin intervención.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+class PreparedStatement:
+    """Consulta fija registrada con un nombre"""
+    __slots__ = ('name', 'query', 'prepare_sql', 'execute_sql')
+
+    def __init__(self, name: str, query: str):
+        self.name = name
+        self.query = query
+        server_query, param_count = to_positional(query)
+        self.prepare_sql = f"PREPARE {name} AS {server_query}"
+        if param_count:
+            self.execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * param_count)})"
+        else:
+            self.execute_sql = f"EXECUTE {name}"
+
+
+class StatementRegistry:
+    """
+    Registro de consultas con nombre que se preparan una vez por conexión
+
+    La primera ejecución de una sentencia en una conexión envía PREPARE y las
+    siguientes solo EXECUTE, de modo que el servidor no vuelve a analizar ni
+    planificar el SQL. Con enabled=False (por ejemplo, detrás de un pooler en
+    modo transacción, que no conserva sentencias preparadas entre
+    transacciones) las consultas se envían como SQL común.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._statements: Dict[str, PreparedStatement] = {}
+
+    def register(self, name: str, query: str) -> PreparedStatement:
+        """Registrar una consulta con nombre (idempotente si el SQL es el mismo)"""
+        if not _RE_STATEMENT_NAME.match(name):
+            raise ValueError(f"Nombre de sentencia inválido: {name}")
+        with self._lock:
+            actual = self._statements.get(name)
+            if actual is not None:
+                if actual.query != query:
+                    raise ValueError(f"La sentencia '{name}' ya está registrada con otro SQL")
+                return actual
+            statement = self._statements[name] = PreparedStatement(name, query)
+            return statement
+
+    def register_all(self, queries: Dict[str, str]):
+        """Registrar varias consultas a la vez"""
+        for name, query in queries.items():
+            self.register(name, query)
+
+    def get(self, name: str) -> PreparedStatement:
+        """Obtener una sentencia registrada"""
+        statement = self._statements.get(name)
+        if statement is None:
+            raise KeyError(f"Sentencia no registrada: {name}")
+        return statement
+
+    def execute(self, cursor, statement: Optional[PreparedStatement], query: str, params: Any = None):
+        """
+        Ejecutar una sentencia en el cursor, preparándola en su conexión si hace falta
+
+        Si statement es None, o la preparación está deshabilitada, se ejecuta query tal cual.
+        """
+        connection = cursor.connection
+        prepared = getattr(connection, 'prepared', None)
+        if statement is None or not self.enabled or prepared is None:
+            cursor.execute(query, params)
+            return
+
+        if statement.name not in prepared:
+            cursor.execute(statement.prepare_sql)
+            prepared.add(statement.name)
+
+        try:
+            cursor.execute(statement.execute_sql, params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # La sesión del servidor perdió la sentencia (DISCARD ALL, reinicio del backend)
+            prepared.clear()
+            if not connection.autocommit:
+                # La transacción quedó abortada: el llamador hace ROLLBACK y el próximo uso la prepara
+                raise
+            cursor.execute(statement.prepare_sql)
+            prepared.add(statement.name)
+            cursor.execute(statement.execute_sql, params)
@@ -0,0 +1,197 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+# Límites superiores (en ms) de los buckets del histograma de latencia
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+# Idas y vueltas al servidor que se evitan por cada lectura en autocommit (BEGIN y COMMIT)
+ROUNDTRIPS_SAVED_PER_READ = 2
+
+_RE_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_RE_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_IN_LISTS = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)")
+_RE_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Normalizar una sentencia SQL para agrupar sus métricas
+
+    Elimina comentarios, reemplaza literales por '?', colapsa listas de
+    parámetros y espacios, de modo que la misma consulta con distintos
+    valores comparta una única entrada.
+    """
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', errors='replace')
+    normalized = _RE_COMMENTS.sub(' ', str(query))
+    normalized = _RE_STRINGS.sub('?', normalized)
+    normalized = _RE_NUMBERS.sub('?', normalized)
+    normalized = _RE_IN_LISTS.sub('(...)', normalized)
+    return _RE_WHITESPACE.sub(' ', normalized).strip()
+
+
+def _find_caller_page() -> str:
+    """Buscar en la pila la página de Streamlit que originó la consulta"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        parent = os.path.basename(os.path.dirname(filename))
+        if parent == 'pages' or os.path.basename(filename) == 'app.py':
+            return os.path.splitext(os.path.basename(filename))[0]
+        frame = frame.f_back
+    return 'N/A'
+
+
+class _StatementStats:
+    """Acumulador de métricas de una sentencia normalizada"""
+    __slots__ = ('query', 'calls', 'errors', 'total_time', 'max_time', 'total_rows',
+                 'total_checkout_wait', 'readonly_calls', 'histogram')
+
+    def __init__(self, query: str):
+        self.query = query
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.total_rows = 0
+        self.total_checkout_wait = 0.0
+        self.readonly_calls = 0
+        self.histogram = [0] * len(LATENCY_BUCKETS_MS)
+
+    def as_dict(self) -> Dict[str, Any]:
+        calls = self.calls or 1
+        return {
+            'query': self.query,
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': round(self.total_time * 1000, 2),
+            'avg_ms': round(self.total_time * 1000 / calls, 2),
+            'max_ms': round(self.max_time * 1000, 2),
+            'p95_ms': self.percentile(95),
+            'avg_rows': round(self.total_rows / calls, 1),
+            'avg_checkout_wait_ms': round(self.total_checkout_wait * 1000 / calls, 2),
+            'readonly_calls': self.readonly_calls,
+            'roundtrips_saved': self.readonly_calls * ROUNDTRIPS_SAVED_PER_READ,
+            'histogram': dict(zip(_bucket_labels(), self.histogram)),
+        }
+
+    def percentile(self, pct: float) -> float:
+        """Estimar un percentil (ms) a partir del histograma"""
+        if not self.calls:
+            return 0.0
+        target = self.calls * pct / 100
+        acumulado = 0
+        for limite, cantidad in zip(LATENCY_BUCKETS_MS, self.histogram):
+            acumulado += cantidad
+            if acumulado >= target:
+                return round(min(limite, self.max_time * 1000), 2)
+        return round(self.max_time * 1000, 2)
+
+
+def _bucket_labels() -> List[str]:
+    return [f"<={int(b)}ms" if b != float('inf') else f">{int(LATENCY_BUCKETS_MS[-2])}ms"
+            for b in LATENCY_BUCKETS_MS]
+
+
+class QueryMetrics:
+    """Registro thread-safe de latencias, filas, esperas de checkout y errores por sentencia"""
+
+    def __init__(self, slow_query_threshold_ms: float = 500, slow_log_size: int = 200,
+                 enabled: bool = True):
+        self.slow_query_threshold_ms = slow_query_threshold_ms
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._slow_log = deque(maxlen=slow_log_size)
+        self._started_at = time.time()
+
+    def record(self, query: str, duration: float, rows: Optional[int] = None,
+               checkout_wait: float = 0.0, error: Optional[str] = None, read_only: bool = False):
+        """
+        Registrar la ejecución de una sentencia
+
+        Args:
+            query: SQL ejecutado
+            duration: Segundos de ejecución
+            rows: Filas devueltas o afectadas
+            checkout_wait: Segundos de espera para obtener la conexión
+            error: Mensaje de error si la sentencia falló
+            read_only: True si se ejecutó por el pool de lectura (sin BEGIN/COMMIT)
+        """
+        if not self.enabled:
+            return
+
+        normalized = normalize_sql(query)
+        duration_ms = duration * 1000
+        bucket = next(i for i, limite in enumerate(LATENCY_BUCKETS_MS) if duration_ms <= limite)
+        is_slow = duration_ms >= self.slow_query_threshold_ms
+        page = _find_caller_page() if is_slow else None
+
+        with self._lock:
+            stats = self._statements.get(normalized)
+            if stats is None:
+                stats = self._statements[normalized] = _StatementStats(normalized)
+            stats.calls += 1
+            stats.total_time += duration
+            stats.max_time = max(stats.max_time, duration)
+            stats.total_rows += rows or 0
+            stats.total_checkout_wait += checkout_wait
+            stats.histogram[bucket] += 1
+            if error:
+                stats.errors += 1
+            if read_only:
+                stats.readonly_calls += 1
+
+            if is_slow:
+                self._slow_log.append({
+                    'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+                    'page': page,
+                    'query': normalized,
+                    'duration_ms': round(duration_ms, 2),
+                    'rows': rows,
+                    'checkout_wait_ms': round(checkout_wait * 1000, 2),
+                    'error': error,
+                })
+
+    def get_top_statements(self, order_by: str = 'total_ms', limit: int = 20) -> List[Dict[str, Any]]:
+        """Obtener las sentencias con mayor costo según la métrica indicada"""
+        with self._lock:
+            resumen = [stats.as_dict() for stats in self._statements.values()]
+        resumen.sort(key=lambda s: s.get(order_by, 0), reverse=True)
+        return resumen[:limit]
+
+    def get_slow_queries(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Obtener las últimas consultas lentas, de la más reciente a la más antigua"""
+        with self._lock:
+            return list(reversed(self._slow_log))[:limit]
+
+    def get_totals(self) -> Dict[str, Any]:
+        """Obtener totales globales desde el último reinicio"""
+        with self._lock:
+            calls = sum(s.calls for s in self._statements.values())
+            total_time = sum(s.total_time for s in self._statements.values())
+            readonly_calls = sum(s.readonly_calls for s in self._statements.values())
+            return {
+                'statements': len(self._statements),
+                'calls': calls,
+                'errors': sum(s.errors for s in self._statements.values()),
+                'total_ms': round(total_time * 1000, 2),
+                'avg_ms': round(total_time * 1000 / calls, 2) if calls else 0.0,
+                'slow_queries': len(self._slow_log),
+                'readonly_calls': readonly_calls,
+                'roundtrips_saved': readonly_calls * ROUNDTRIPS_SAVED_PER_READ,
+                'since': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self._started_at)),
+            }
+
+    def reset(self):
+        """Reiniciar todas las métricas"""
+        with self._lock:
+            self._statements.clear()
+            self._slow_log.clear()
+            self._started_at = time.time()
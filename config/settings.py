@@ -33,6 +33,62 @@ DATABASE_CONFIG = {
     'password': _get_config_value('DB_PASSWORD', ''),
     # Neon requiere TLS; usar "require" en producción/Neon
     'sslmode': _get_config_value('DB_SSLMODE', 'prefer'),
+    # Pool de conexiones compartido por todas las sesiones de Streamlit
+    'pool_min_connections': int(_get_config_value('DB_POOL_MIN', '1')),
+    'pool_max_connections': int(_get_config_value('DB_POOL_MAX', '20')),
+    # Segundos que una sesión espera una conexión libre antes de fallar
+    'pool_timeout': float(_get_config_value('DB_POOL_TIMEOUT', '30')),
+    # Segundos de inactividad tras los cuales se verifica la conexión con SELECT 1
+    'pool_health_check_interval': float(_get_config_value('DB_POOL_HEALTH_CHECK', '60')),
+    # Pool aparte en autocommit para SELECT: evita el BEGIN/COMMIT de cada lectura
+    'read_pool_enabled': _get_config_value('DB_READ_POOL', 'true').lower() in ('1', 'true', 'yes'),
+    'read_pool_min_connections': int(_get_config_value('DB_READ_POOL_MIN', '1')),
+    'read_pool_max_connections': int(_get_config_value('DB_READ_POOL_MAX', '10')),
+    # Sesiones read-only (SET default_transaction_read_only); desactivar detrás de un pooler en modo transacción
+    'read_pool_readonly': _get_config_value('DB_READ_POOL_READONLY', 'true').lower() in ('1', 'true', 'yes'),
+    # PREPARE/EXECUTE para las consultas con nombre de los modelos; desactivar con el pooler de Neon (modo transacción)
+    'prepared_statements': _get_config_value('DB_PREPARED_STATEMENTS', 'true').lower() in ('1', 'true', 'yes'),
+    # Acceso asíncrono (config/async_database.py): AsyncConnectionPool de psycopg 3 si está instalado
+    'async_pool_enabled': _get_config_value('DB_ASYNC_POOL', 'true').lower() in ('1', 'true', 'yes'),
+    'async_pool_min_connections': int(_get_config_value('DB_ASYNC_POOL_MIN', '1')),
+    # También es el máximo de consultas simultáneas cuando se usan hilos en lugar de psycopg 3
+    'async_pool_max_connections': int(_get_config_value('DB_ASYNC_POOL_MAX', '10')),
+    # Filas por bloque al leer con cursores del lado del servidor (exportaciones)
+    'stream_chunk_size': 5000,
+    # Escritura masiva: filas por lote y cantidad a partir de la cual se usa COPY
+    'bulk_batch_size': 1000,
+    'bulk_copy_threshold': 5000,
+}
+
+# Configuraciones de monitoreo de consultas
+MONITORING_CONFIG = {
+    'enabled': _get_config_value('DB_QUERY_METRICS', 'true').lower() in ('1', 'true', 'yes'),
+    # Consultas que superen este tiempo (ms) se guardan en el registro de consultas lentas
+    'slow_query_threshold_ms': float(_get_config_value('DB_SLOW_QUERY_MS', '500')),
+    'slow_query_log_size': 200,
+}
+
+# Configuraciones del caché de catálogos (especies, analistas, apicultores)
+CACHE_CONFIG = {
+    # Segundos antes de recargar un catálogo aunque no haya sido modificado desde la app
+    'catalog_ttl_seconds': float(_get_config_value('CATALOG_CACHE_TTL', '300')),
+    # Segundos antes de volver a contar las filas de una tabla (estadísticas rápidas)
+    'counts_ttl_seconds': float(_get_config_value('COUNTS_CACHE_TTL', '60')),
+    # Vectores de conteos distintos cuyos índices de diversidad se conservan en memoria
+    'diversidad_cache_size': 20000,
+}
+
+# Configuraciones de paginación de listados
+PAGINATION_CONFIG = {
+    # Máximo de pools que se cargan en el selector de la página de análisis
+    'pool_selector_limit': 100,
+    # Tambores disponibles por página en el selector de creación de pools
+    'tambores_selector_page_size': 200,
+    # Resultados máximos de la búsqueda por texto (type-ahead de especies y apicultores)
+    'search_results_limit': 50,
+    # Tamaño de página por defecto y máximo permitido para la paginación por cursor
+    'default_page_size': 50,
+    'max_page_size': 500,
 }
 
 # Configuraciones de la aplicación
@@ -48,6 +104,8 @@ REPORT_CONFIG = {
     'default_filename': 'analisis_palinologico',
     'pdf_orientation': 'portrait',
     'excel_sheet_name': 'Análisis Palinológico',
+    # Límite de filas por hoja de Excel; al superarlo se continúa en una hoja nueva
+    'excel_max_rows_per_sheet': 1_000_000,
 }
 
 # Configuraciones de validación
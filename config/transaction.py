@@ -0,0 +1,100 @@
+import time
+from contextlib import contextmanager
+from typing import Callable, List
+
+
+class Transaction:
+    """
+    Unidad de trabajo sobre una única conexión del pool
+
+    Se obtiene con 'with db.transaction() as tx:'. Mientras el bloque está
+    activo, todas las consultas de DatabaseConnection (y por lo tanto de los
+    modelos) del mismo hilo se ejecutan sobre esta conexión, sin commit
+    intermedio. Al salir del bloque se hace un único COMMIT, o ROLLBACK si
+    hubo una excepción. A diferencia de las consultas fuera de transacción,
+    los errores se propagan para que el bloque completo se revierta.
+    """
+
+    def __init__(self, db, connection, checkout_wait: float = 0.0):
+        self.db = db
+        self.connection = connection
+        self._pending_checkout_wait = checkout_wait
+        self._savepoint_counter = 0
+        self._after_commit: List[Callable[[], None]] = []
+
+    def _take_checkout_wait(self) -> float:
+        """La espera del checkout se atribuye a la primera sentencia de la transacción"""
+        wait, self._pending_checkout_wait = self._pending_checkout_wait, 0.0
+        return wait
+
+    def execute_query(self, query, params=None, fetch=True, statement=None, columnar=False):
+        """Ejecutar una consulta SQL (o una sentencia preparada) dentro de la transacción"""
+        start = time.perf_counter()
+        rows = None
+        error = None
+        try:
+            cursor = self.db._cursor(self.connection, columnar)
+            self.db.statements.execute(cursor, statement, query, params)
+            if fetch:
+                result = self.db._fetch(cursor, columnar)
+                rows = len(result)
+            else:
+                result = cursor.rowcount
+                rows = result
+            cursor.close()
+            return result
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.db.metrics.record(query, time.perf_counter() - start, rows,
+                                   self._take_checkout_wait(), error)
+
+    def execute_many(self, query, params_list):
+        """Ejecutar múltiples consultas dentro de la transacción"""
+        start = time.perf_counter()
+        rows = None
+        error = None
+        try:
+            cursor = self.connection.cursor()
+            cursor.executemany(query, params_list)
+            rows = cursor.rowcount
+            cursor.close()
+            return rows
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.db.metrics.record(query, time.perf_counter() - start, rows,
+                                   self._take_checkout_wait(), error)
+
+    @contextmanager
+    def savepoint(self, name: str = None):
+        """
+        Punto de guardado anidado: si el bloque falla, solo se revierte lo hecho dentro de él
+
+        La excepción se propaga igualmente; el llamador decide si la captura y continúa.
+        """
+        self._savepoint_counter += 1
+        name = name or f"sp_{self._savepoint_counter}"
+        cursor = self.connection.cursor()
+        cursor.execute(f"SAVEPOINT {name}")
+        try:
+            yield self
+        except BaseException:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {name}")
+            raise
+        else:
+            cursor.execute(f"RELEASE SAVEPOINT {name}")
+        finally:
+            cursor.close()
+
+    def after_commit(self, callback: Callable[[], None]):
+        """Registrar una acción a ejecutar solo si la transacción se confirma"""
+        self._after_commit.append(callback)
+
+    def run_after_commit(self):
+        """Ejecutar las acciones registradas tras el COMMIT"""
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            callback()
@@ -0,0 +1,86 @@
+"""
+Línea de comandos de migraciones
+
+Uso:
+    python -m migrations estado              # Listar migraciones aplicadas y pendientes
+    python -m migrations aplicar [--hasta N] # Aplicar las pendientes (hasta la versión N)
+    python -m migrations indices             # Reportar índices faltantes o sin uso
+"""
+import argparse
+import sys
+from migrations.indices import reporte_indices
+from migrations.runner import MigrationError, MigrationRunner, conectar
+
+
+def _estado(runner: MigrationRunner) -> int:
+    for migracion in runner.estado():
+        marca = "✅" if migracion['aplicada'] else "⏳"
+        detalle = f"aplicada {migracion['aplicada_en']:%Y-%m-%d %H:%M}" if migracion['aplicada'] else "pendiente"
+        if migracion['modificada']:
+            detalle += " (⚠️ el archivo cambió después de aplicarse)"
+        print(f"{marca} {migracion['version']:04d}_{migracion['nombre']}: {detalle}")
+    return 0
+
+
+def _aplicar(runner: MigrationRunner, hasta: int = None) -> int:
+    aplicadas = runner.aplicar(hasta=hasta)
+    if not aplicadas:
+        print("La base de datos ya está actualizada.")
+    for migracion in aplicadas:
+        print(f"✅ Aplicada {migracion.version:04d}_{migracion.nombre}")
+    return 0
+
+
+def _indices(connection) -> int:
+    reporte = reporte_indices(connection)
+
+    print("Índices requeridos por las consultas:")
+    for idx in reporte['existentes']:
+        print(f"  ✅ {idx['tabla']}({idx['expresion']}) -> {idx['indice']} ({idx['idx_scan']} lecturas)")
+    for idx in reporte['faltantes']:
+        print(f"  ❌ {idx['tabla']}({idx['expresion']}) falta - usado por {idx['consultas']}")
+
+    if reporte['sin_uso']:
+        print("\nÍndices sin uso desde el último reinicio de estadísticas:")
+        for idx in reporte['sin_uso']:
+            print(f"  ⚠️ {idx['tabla']}.{idx['indice']} ({idx['tamano_bytes'] / 1024:.0f} KB)")
+
+    if reporte['seq_scans']:
+        print("\nTablas leídas mayormente en forma secuencial:")
+        for tabla in reporte['seq_scans']:
+            print(f"  ⚠️ {tabla['tabla']}: {tabla['seq_scan']} seq scans vs {tabla['idx_scan']} por índice "
+                  f"({tabla['n_live_tup']} filas)")
+
+    for idx in reporte['busqueda_en_memoria']:
+        print(f"\nℹ️ Sin índice de trigramas {idx['indice']} en {idx['tabla']}: "
+              f"{idx['consultas']} usa la búsqueda en memoria")
+
+    return 1 if reporte['faltantes'] else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m migrations", description="Migraciones del esquema")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    subparsers.add_parser('estado', help="Listar migraciones aplicadas y pendientes")
+    aplicar = subparsers.add_parser('aplicar', help="Aplicar las migraciones pendientes")
+    aplicar.add_argument('--hasta', type=int, default=None, help="Última versión a aplicar")
+    subparsers.add_parser('indices', help="Reportar índices faltantes o sin uso")
+    args = parser.parse_args(argv)
+
+    connection = conectar()
+    try:
+        runner = MigrationRunner(connection)
+        if args.comando == 'estado':
+            return _estado(runner)
+        if args.comando == 'aplicar':
+            return _aplicar(runner, args.hasta)
+        return _indices(connection)
+    except MigrationError as e:
+        print(f"❌ {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import re
+from typing import Any, Dict, List
+
+# Índices que necesitan los patrones de consulta de los modelos:
+# (tabla, expresión de la primera columna del índice, consultas que lo usan)
+INDICES_ESPERADOS = [
+    ('analisis_palinologico', 'id_pool',
+     'AnalisisPalinologico.get_analisis_by_pool / get_analisis_completo_bulk, Pool.get_pools_listado'),
+    ('analisis_palinologico', 'id_especie',
+     'Especie.delete_especie (verificación de la clave foránea)'),
+    ('compone_pool', 'id_tambor',
+     'MuestraTambor.get_tambores_disponibles, Pool.create_pool_with_tambores'),
+    ('compone_pool', 'id_pool',
+     'MuestraTambor.get_tambores_in_pool, Pool.get_pool_with_details / get_pools_listado'),
+    ('pool', 'fecha_analisis',
+     'Pool.get_pools_by_date_range / get_pools_page, AnalisisPalinologico.get_analisis_by_date_range'),
+    ('pool', 'id_analista',
+     'Pool.get_pools_by_analista, AnalisisPalinologico.get_analisis_by_analista'),
+    ('muestra_tambor', 'id_apicultor',
+     'MuestraTambor.get_tambores_by_apicultor / get_tambores_disponibles_page, Pool.get_pools_by_apicultor'),
+    ('muestra_tambor', 'fecha_extraccion',
+     'MuestraTambor.get_tambores_disponibles_page'),
+    ('especies', 'lower(familia)',
+     'Especie.get_especies_by_familia'),
+]
+
+# Índices de trigramas de la búsqueda por texto (opcionales: requieren pg_trgm y unaccent)
+INDICES_BUSQUEDA = [
+    ('especies', 'idx_especies_busqueda_trgm', 'Especie.search_especies (TextSearch)'),
+    ('apicultor', 'idx_apicultor_busqueda_trgm', 'Apicultor.search_apicultores (TextSearch)'),
+]
+
+# Tablas con más filas que esto y más lecturas secuenciales que por índice se reportan
+MIN_FILAS_SEQ_SCAN = 1000
+
+_CONSULTA_INDICES = """
+    SELECT s.relname AS tabla,
+           s.indexrelname AS indice,
+           pg_get_indexdef(s.indexrelid, 1, true) AS primera_columna,
+           s.idx_scan,
+           s.idx_tup_read,
+           pg_relation_size(s.indexrelid) AS tamano_bytes,
+           i.indisunique AS unico
+    FROM pg_stat_user_indexes s
+    INNER JOIN pg_index i ON i.indexrelid = s.indexrelid
+    WHERE s.relname = ANY(%s)
+"""
+
+_CONSULTA_TABLAS = """
+    SELECT relname AS tabla, seq_scan, seq_tup_read, COALESCE(idx_scan, 0) AS idx_scan,
+           n_live_tup
+    FROM pg_stat_user_tables
+    WHERE relname = ANY(%s)
+"""
+
+_RE_CAST = re.compile(r"::[a-z ]+(\[\])?")
+
+
+def _normalizar_expresion(expresion: str) -> str:
+    """Quitar casts, comillas, paréntesis y espacios para comparar expresiones de índice"""
+    expresion = _RE_CAST.sub('', expresion.lower())
+    return re.sub(r"[\s\"()]", '', expresion)
+
+
+def reporte_indices(connection) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Comparar los índices esperados por las consultas con los existentes en la base
+
+    Returns:
+        Diccionario con:
+            'faltantes': índices esperados sin un índice cuya primera columna coincida
+            'existentes': índices esperados encontrados, con su uso (idx_scan)
+            'sin_uso': índices no únicos que nunca se usaron (idx_scan = 0)
+            'seq_scans': tablas grandes leídas más veces en forma secuencial que por índice
+            'busqueda_en_memoria': índices de trigramas ausentes (la búsqueda usa el índice en memoria)
+    """
+    tablas = sorted({tabla for tabla, _, _ in INDICES_ESPERADOS})
+    cursor = connection.cursor()
+
+    cursor.execute(_CONSULTA_INDICES, (tablas,))
+    columnas = [c[0] for c in cursor.description]
+    indices = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+    cursor.execute(_CONSULTA_TABLAS, (tablas,))
+    columnas = [c[0] for c in cursor.description]
+    estadisticas_tablas = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+    cursor.close()
+    connection.rollback()
+
+    faltantes, existentes = [], []
+    for tabla, expresion, consultas in INDICES_ESPERADOS:
+        buscada = _normalizar_expresion(expresion)
+        candidatos = [
+            idx for idx in indices
+            if idx['tabla'] == tabla and _normalizar_expresion(idx['primera_columna']) == buscada
+        ]
+        if candidatos:
+            mejor = max(candidatos, key=lambda idx: idx['idx_scan'])
+            existentes.append({'tabla': tabla, 'expresion': expresion, 'indice': mejor['indice'],
+                               'idx_scan': mejor['idx_scan'], 'consultas': consultas})
+        else:
+            faltantes.append({'tabla': tabla, 'expresion': expresion, 'consultas': consultas})
+
+    sin_uso = [
+        {'tabla': idx['tabla'], 'indice': idx['indice'], 'tamano_bytes': idx['tamano_bytes']}
+        for idx in indices if not idx['unico'] and idx['idx_scan'] == 0
+    ]
+
+    seq_scans = [
+        t for t in estadisticas_tablas
+        if t['n_live_tup'] >= MIN_FILAS_SEQ_SCAN and t['seq_scan'] > t['idx_scan']
+    ]
+
+    nombres = {idx['indice'] for idx in indices}
+    busqueda_en_memoria = [
+        {'tabla': tabla, 'indice': nombre, 'consultas': consultas}
+        for tabla, nombre, consultas in INDICES_BUSQUEDA if nombre not in nombres
+    ]
+
+    return {'faltantes': faltantes, 'existentes': existentes, 'sin_uso': sin_uso, 'seq_scans': seq_scans,
+            'busqueda_en_memoria': busqueda_en_memoria}
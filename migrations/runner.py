@@ -0,0 +1,161 @@
+import hashlib
+import os
+import re
+from typing import Any, Dict, List, Optional
+import psycopg2
+from config.settings import DATABASE_CONFIG
+
+VERSIONES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'versiones')
+
+_RE_ARCHIVO = re.compile(r"^(\d{4})_([a-z0-9_]+)\.sql$")
+
+_CREAR_TABLA_CONTROL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        nombre VARCHAR(200) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        aplicada_en TIMESTAMP NOT NULL DEFAULT now()
+    )
+"""
+
+# Clave del advisory lock que impide correr dos migraciones a la vez
+_LOCK_MIGRACIONES = 727_001
+
+
+class MigrationError(Exception):
+    """Error al aplicar o validar migraciones"""
+
+
+class Migracion:
+    """Archivo SQL versionado de migrations/versiones"""
+
+    def __init__(self, version: int, nombre: str, ruta: str):
+        self.version = version
+        self.nombre = nombre
+        self.ruta = ruta
+
+    @property
+    def sql(self) -> str:
+        with open(self.ruta, encoding='utf-8') as archivo:
+            return archivo.read()
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode('utf-8')).hexdigest()
+
+
+def descubrir_migraciones(directorio: str = VERSIONES_DIR) -> List[Migracion]:
+    """Listar las migraciones disponibles ordenadas por versión"""
+    migraciones = []
+    for archivo in sorted(os.listdir(directorio)):
+        match = _RE_ARCHIVO.match(archivo)
+        if match:
+            migraciones.append(Migracion(int(match.group(1)), match.group(2), os.path.join(directorio, archivo)))
+
+    versiones = [m.version for m in migraciones]
+    if len(versiones) != len(set(versiones)):
+        raise MigrationError("Hay dos archivos de migración con el mismo número de versión")
+    return migraciones
+
+
+def conectar():
+    """Abrir una conexión dedicada con los parámetros de DATABASE_CONFIG"""
+    return psycopg2.connect(
+        host=DATABASE_CONFIG['host'],
+        port=DATABASE_CONFIG['port'],
+        database=DATABASE_CONFIG['database'],
+        user=DATABASE_CONFIG['user'],
+        password=DATABASE_CONFIG['password'],
+        sslmode=DATABASE_CONFIG.get('sslmode', 'prefer')
+    )
+
+
+class MigrationRunner:
+    """
+    Aplica en orden las migraciones pendientes y registra cada una en schema_migrations
+
+    Cada migración corre en su propia transacción: si falla, no queda aplicada
+    a medias y las siguientes no se ejecutan. Se guarda el checksum del
+    archivo para detectar migraciones ya aplicadas que luego fueron editadas.
+    """
+
+    def __init__(self, connection, directorio: str = VERSIONES_DIR):
+        self.connection = connection
+        self.directorio = directorio
+
+    def _aplicadas(self) -> Dict[int, Dict[str, Any]]:
+        cursor = self.connection.cursor()
+        cursor.execute(_CREAR_TABLA_CONTROL)
+        cursor.execute("SELECT version, nombre, checksum, aplicada_en FROM schema_migrations")
+        aplicadas = {
+            fila[0]: {'nombre': fila[1], 'checksum': fila[2], 'aplicada_en': fila[3]}
+            for fila in cursor.fetchall()
+        }
+        cursor.close()
+        self.connection.commit()
+        return aplicadas
+
+    def estado(self) -> List[Dict[str, Any]]:
+        """
+        Obtener el estado de cada migración
+
+        Returns:
+            Lista con 'version', 'nombre', 'aplicada' (bool), 'aplicada_en' y 'modificada'
+            (True si el archivo cambió después de aplicarse)
+        """
+        aplicadas = self._aplicadas()
+        resultado = []
+        for migracion in descubrir_migraciones(self.directorio):
+            registro = aplicadas.get(migracion.version)
+            resultado.append({
+                'version': migracion.version,
+                'nombre': migracion.nombre,
+                'aplicada': registro is not None,
+                'aplicada_en': registro['aplicada_en'] if registro else None,
+                'modificada': registro is not None and registro['checksum'] != migracion.checksum,
+            })
+        return resultado
+
+    def pendientes(self) -> List[Migracion]:
+        """Migraciones que todavía no se aplicaron"""
+        aplicadas = self._aplicadas()
+        return [m for m in descubrir_migraciones(self.directorio) if m.version not in aplicadas]
+
+    def aplicar(self, hasta: Optional[int] = None) -> List[Migracion]:
+        """
+        Aplicar las migraciones pendientes
+
+        Args:
+            hasta: Última versión a aplicar (por defecto, todas)
+
+        Returns:
+            Migraciones aplicadas en esta ejecución
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT pg_advisory_lock(%s)", (_LOCK_MIGRACIONES,))
+        self.connection.commit()
+
+        aplicadas = []
+        try:
+            for migracion in self.pendientes():
+                if hasta is not None and migracion.version > hasta:
+                    break
+                try:
+                    cursor.execute(migracion.sql)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, nombre, checksum) VALUES (%s, %s, %s)",
+                        (migracion.version, migracion.nombre, migracion.checksum)
+                    )
+                    self.connection.commit()
+                except Exception as e:
+                    self.connection.rollback()
+                    raise MigrationError(
+                        f"Falló la migración {migracion.version:04d}_{migracion.nombre}: {str(e)}"
+                    ) from e
+                aplicadas.append(migracion)
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (_LOCK_MIGRACIONES,))
+            self.connection.commit()
+            cursor.close()
+
+        return aplicadas
@@ -0,0 +1,52 @@
+-- Esquema inicial del laboratorio (tablas descritas en el README)
+-- IF NOT EXISTS permite adoptar bases creadas a mano antes de las migraciones.
+
+CREATE TABLE IF NOT EXISTS apicultor (
+    id_apicultor SERIAL PRIMARY KEY,
+    nombre VARCHAR(100) NOT NULL,
+    apellido VARCHAR(100) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS analista (
+    id_analista SERIAL PRIMARY KEY,
+    nombres VARCHAR(100) NOT NULL,
+    apellidos VARCHAR(100) NOT NULL,
+    contacto VARCHAR(100)
+);
+
+CREATE TABLE IF NOT EXISTS muestra_tambor (
+    id_tambor SERIAL PRIMARY KEY,
+    id_apicultor INTEGER REFERENCES apicultor (id_apicultor),
+    num_registro VARCHAR(50) UNIQUE,
+    fecha_extraccion DATE
+);
+
+CREATE TABLE IF NOT EXISTS pool (
+    id_pool SERIAL PRIMARY KEY,
+    id_analista INTEGER REFERENCES analista (id_analista),
+    fecha_analisis DATE,
+    num_registro VARCHAR(50),
+    observaciones TEXT
+);
+
+CREATE TABLE IF NOT EXISTS especies (
+    id_especie SERIAL PRIMARY KEY,
+    nombre_cientifico VARCHAR(150),
+    nombre_comun VARCHAR(100),
+    familia VARCHAR(100)
+);
+
+CREATE TABLE IF NOT EXISTS analisis_palinologico (
+    id_palinologico SERIAL PRIMARY KEY,
+    id_especie INTEGER REFERENCES especies (id_especie),
+    id_pool INTEGER REFERENCES pool (id_pool),
+    cantidad_granos INTEGER,
+    marca_especial VARCHAR(10)
+);
+
+CREATE TABLE IF NOT EXISTS compone_pool (
+    id_tambor INTEGER REFERENCES muestra_tambor (id_tambor),
+    id_pool INTEGER REFERENCES pool (id_pool),
+    fecha_asociacion DATE,
+    PRIMARY KEY (id_tambor, id_pool)
+);
@@ -0,0 +1,54 @@
+-- Una sola fila por especie en cada pool: requerido por el guardado con upsert
+-- (ON CONFLICT (id_pool, id_especie)) de AnalisisPalinologico.guardar_analisis_bulk.
+-- El índice único también resuelve los filtros por analisis_palinologico.id_pool.
+
+-- Resolver duplicados previos. Cada fila repetida viene de volver a guardar el
+-- pool, y el guardado con upsert reemplaza el conteo anterior: se conserva sin
+-- cambios la fila más reciente de cada (id_pool, id_especie) y las anteriores se
+-- archivan en analisis_palinologico_fusionados antes de eliminarlas.
+CREATE TABLE IF NOT EXISTS analisis_palinologico_fusionados (
+    id_palinologico INTEGER PRIMARY KEY,
+    id_especie INTEGER,
+    id_pool INTEGER,
+    cantidad_granos INTEGER,
+    marca_especial VARCHAR(10),
+    id_conservado INTEGER NOT NULL,
+    fusionado_en TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE TEMP TABLE _duplicados_analisis ON COMMIT DROP AS
+SELECT ap.id_palinologico, ap.id_especie, ap.id_pool, ap.cantidad_granos, ap.marca_especial,
+       MAX(ap.id_palinologico) OVER (PARTITION BY ap.id_pool, ap.id_especie) AS id_conservado,
+       COUNT(*) OVER (PARTITION BY ap.id_pool, ap.id_especie) AS filas
+FROM analisis_palinologico ap
+WHERE ap.id_pool IS NOT NULL AND ap.id_especie IS NOT NULL;
+
+DELETE FROM _duplicados_analisis WHERE filas = 1;
+
+INSERT INTO analisis_palinologico_fusionados
+    (id_palinologico, id_especie, id_pool, cantidad_granos, marca_especial, id_conservado)
+SELECT id_palinologico, id_especie, id_pool, cantidad_granos, marca_especial, id_conservado
+FROM _duplicados_analisis
+WHERE id_palinologico <> id_conservado;
+
+DELETE FROM analisis_palinologico ap
+USING _duplicados_analisis d
+WHERE ap.id_palinologico = d.id_palinologico
+  AND d.id_palinologico <> d.id_conservado;
+
+DO $$
+BEGIN
+    -- Puede existir ya una restricción equivalente creada a mano con otro nombre
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_index i
+        WHERE i.indrelid = 'analisis_palinologico'::regclass
+          AND i.indisunique
+          AND i.indnatts = 2
+          AND (SELECT array_agg(att.attname::text ORDER BY att.attname)
+               FROM pg_attribute att
+               WHERE att.attrelid = i.indrelid AND att.attnum = ANY(i.indkey)) = ARRAY['id_especie', 'id_pool']
+    ) THEN
+        ALTER TABLE analisis_palinologico
+            ADD CONSTRAINT uq_analisis_pool_especie UNIQUE (id_pool, id_especie);
+    END IF;
+END $$;
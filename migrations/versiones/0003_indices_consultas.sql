@@ -0,0 +1,35 @@
+-- Índices para los filtros y joins de models/pool.py, models/analisis_palinologico.py
+-- y models/muestra_tambor.py (ver migrations/indices.py para el detalle por consulta)
+
+-- Estadísticas y reportes por especie
+CREATE INDEX IF NOT EXISTS idx_analisis_id_especie ON analisis_palinologico (id_especie);
+
+-- Tambores de un pool y conteo de tambores por pool
+CREATE INDEX IF NOT EXISTS idx_compone_pool_id_pool ON compone_pool (id_pool);
+
+-- Tambores disponibles (anti-join por id_tambor). La clave primaria (id_tambor, id_pool)
+-- ya lo cubre; en tablas creadas a mano sin esa clave se agrega el índice.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_attribute att ON att.attrelid = i.indrelid AND att.attnum = i.indkey[0]
+        WHERE i.indrelid = 'compone_pool'::regclass
+          AND att.attname = 'id_tambor'
+    ) THEN
+        CREATE INDEX idx_compone_pool_id_tambor ON compone_pool (id_tambor);
+    END IF;
+END $$;
+
+-- Rangos de fechas y paginación por cursor (fecha_analisis, id_pool) DESC
+CREATE INDEX IF NOT EXISTS idx_pool_fecha_analisis ON pool (fecha_analisis DESC, id_pool DESC);
+
+-- Pools por analista
+CREATE INDEX IF NOT EXISTS idx_pool_id_analista ON pool (id_analista);
+
+-- Tambores y pools por apicultor
+CREATE INDEX IF NOT EXISTS idx_muestra_tambor_id_apicultor ON muestra_tambor (id_apicultor);
+
+-- Búsqueda de especies por familia sin distinguir mayúsculas
+CREATE INDEX IF NOT EXISTS idx_especies_familia_lower ON especies (LOWER(familia));
@@ -0,0 +1,12 @@
+-- Selector de tambores disponibles (MuestraTambor.get_tambores_disponibles_page)
+-- La disponibilidad se resuelve con NOT EXISTS sobre compone_pool(id_tambor);
+-- estos índices sirven a los filtros y al orden por (num_registro, id_tambor).
+
+-- Filtro por apicultor recorriendo ya en el orden de la página.
+-- Reemplaza al índice simple por id_apicultor de 0003, que queda redundante.
+CREATE INDEX IF NOT EXISTS idx_muestra_tambor_apicultor_registro
+    ON muestra_tambor (id_apicultor, num_registro, id_tambor);
+DROP INDEX IF EXISTS idx_muestra_tambor_id_apicultor;
+
+-- Filtro por fecha de extracción
+CREATE INDEX IF NOT EXISTS idx_muestra_tambor_fecha_extraccion ON muestra_tambor (fecha_extraccion);
@@ -0,0 +1,33 @@
+-- Búsqueda de especies y apicultores por subcadena, sin distinguir mayúsculas ni acentos
+-- (models/text_search.py). Si las extensiones no pueden instalarse (permisos del
+-- proveedor), la migración no falla y la aplicación usa el índice en memoria de
+-- utils/busqueda.py.
+
+DO $migracion$
+BEGIN
+    BEGIN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE EXTENSION IF NOT EXISTS unaccent;
+    EXCEPTION WHEN OTHERS THEN
+        RAISE NOTICE 'pg_trgm/unaccent no disponibles (%): se usará la búsqueda en memoria', SQLERRM;
+        RETURN;
+    END;
+
+    -- unaccent() es STABLE (depende del diccionario configurado); para usarla en un
+    -- índice se envuelve fijando el diccionario, lo que la hace IMMUTABLE en la práctica
+    EXECUTE $sql$
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $cuerpo$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $cuerpo$
+    $sql$;
+
+    EXECUTE $sql$
+        CREATE INDEX IF NOT EXISTS idx_especies_busqueda_trgm ON especies
+        USING gin (f_unaccent(lower(coalesce(nombre_comun, '') || ' ' || coalesce(nombre_cientifico, ''))) gin_trgm_ops)
+    $sql$;
+
+    EXECUTE $sql$
+        CREATE INDEX IF NOT EXISTS idx_apicultor_busqueda_trgm ON apicultor
+        USING gin (f_unaccent(lower(coalesce(nombre, '') || ' ' || coalesce(apellido, ''))) gin_trgm_ops)
+    $sql$;
+END $migracion$;
@@ -0,0 +1,23 @@
+-- Totales por especie mantenidos incrementalmente (models/estadistica_especie.py)
+-- AnalisisPalinologico aplica a esta tabla la diferencia de cada escritura dentro
+-- de la misma transacción, de modo que get_estadisticas_especies y
+-- get_especies_with_analisis leen una fila por especie en lugar de agregar
+-- toda la tabla analisis_palinologico.
+
+CREATE TABLE IF NOT EXISTS estadisticas_especie (
+    id_especie INTEGER PRIMARY KEY REFERENCES especies(id_especie) ON DELETE CASCADE,
+    total_analisis BIGINT NOT NULL DEFAULT 0,
+    total_granos BIGINT NOT NULL DEFAULT 0,
+    actualizado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Carga inicial con los análisis existentes
+INSERT INTO estadisticas_especie (id_especie, total_analisis, total_granos)
+SELECT id_especie, COUNT(*), COALESCE(SUM(cantidad_granos), 0)
+FROM analisis_palinologico
+WHERE id_especie IS NOT NULL
+GROUP BY id_especie
+ON CONFLICT (id_especie) DO UPDATE
+    SET total_analisis = EXCLUDED.total_analisis,
+        total_granos = EXCLUDED.total_granos,
+        actualizado_en = CURRENT_TIMESTAMP;
@@ -0,0 +1,30 @@
+-- Un tambor pertenece a un solo pool (Pool.create_pool_with_tambores / add_tambor_to_pool)
+-- La verificación de tambores ocupados no alcanza por sí sola en READ COMMITTED:
+-- dos transacciones pueden verificar a la vez y asociar el mismo tambor. El índice
+-- único lo impide en la base; la violación se informa como tambor ocupado.
+
+-- Si ya hay tambores en más de un pool no se elige cuál asociación conservar:
+-- la migración se aborta con el detalle para resolverlo a mano.
+DO $$
+DECLARE
+    detalle TEXT;
+BEGIN
+    SELECT string_agg(format('tambor %s en pools %s', id_tambor, pools), '; ' ORDER BY id_tambor)
+    INTO detalle
+    FROM (
+        SELECT id_tambor, string_agg(id_pool::text, ', ' ORDER BY id_pool) AS pools
+        FROM compone_pool
+        GROUP BY id_tambor
+        HAVING COUNT(*) > 1
+    ) repetidos;
+
+    IF detalle IS NOT NULL THEN
+        RAISE EXCEPTION 'Hay tambores asociados a más de un pool: %', detalle
+            USING HINT = 'Quitar las asociaciones sobrantes de compone_pool y volver a aplicar la migración';
+    END IF;
+END $$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_compone_pool_tambor_unico ON compone_pool (id_tambor);
+
+-- El índice único reemplaza al índice simple que 0003 agrega en tablas sin clave primaria
+DROP INDEX IF EXISTS idx_compone_pool_id_tambor;
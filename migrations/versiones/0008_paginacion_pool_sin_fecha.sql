@@ -0,0 +1,7 @@
+-- Paginación por cursor de pools con fecha_analisis nula (Pool.get_pools_page)
+-- La comparación (fecha_analisis, id_pool) < (...) no es verdadera para una fila con
+-- fecha NULL, así que esos pools no aparecían en ninguna página. El cursor ahora
+-- ordena por COALESCE(fecha_analisis, '-infinity'), con los pools sin fecha al final;
+-- este índice sigue ese orden. idx_pool_fecha_analisis se conserva para los rangos de fechas.
+CREATE INDEX IF NOT EXISTS idx_pool_pagina
+    ON pool ((COALESCE(fecha_analisis, '-infinity'::date)) DESC, id_pool DESC);
@@ -0,0 +1,13 @@
+-- Paginación por cursor de tambores con num_registro nulo
+-- (MuestraTambor.get_tambores_page / get_tambores_disponibles_page)
+-- Como en 0008, el cursor ordena por COALESCE(num_registro, '') para no saltear
+-- las filas con NULL; estos índices siguen ese orden. Los índices de 0004 y la
+-- restricción única de num_registro se conservan para las demás consultas.
+
+-- Listado completo de tambores
+CREATE INDEX IF NOT EXISTS idx_muestra_tambor_pagina
+    ON muestra_tambor ((COALESCE(num_registro, '')), id_tambor);
+
+-- Selector de tambores disponibles filtrado por apicultor
+CREATE INDEX IF NOT EXISTS idx_muestra_tambor_apicultor_pagina
+    ON muestra_tambor (id_apicultor, (COALESCE(num_registro, '')), id_tambor);
@@ -1,18 +1,91 @@
+import streamlit as st
+from config.columnar_result import ColumnarResult
 from models.base_model import BaseModel
-from typing import List, Dict, Any, Optional
+from models.estadistica_especie import EstadisticaEspecie
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Union
+import pandas as pd
 from utils.calculators import calcular_porcentajes
 
 class AnalisisPalinologico(BaseModel):
     """Modelo para la tabla analisis_palinologico"""
     
+    # Columnas de las filas devueltas por iterar_reporte_exportacion
+    COLUMNAS_EXPORTACION = ['Pool ID', 'Fecha', 'Analista', 'Especie', 'Granos', 'Porcentaje']
+    
+    # Espacio de claves de pg_advisory_xact_lock(espacio, id_pool) para las escrituras por pool
+    BLOQUEO_POOL = 1
+    
+    # Consultas fijas con nombre: se preparan una vez por conexión (ver config/prepared_statements.py)
+    CONSULTAS = {
+        'analisis_por_pool': """
+            SELECT ap.*, e.nombre_comun, e.nombre_cientifico, e.familia
+            FROM analisis_palinologico ap
+            INNER JOIN especies e ON ap.id_especie = e.id_especie
+            WHERE ap.id_pool = %s
+            ORDER BY ap.cantidad_granos DESC
+        """,
+        'analisis_pools_info': """
+            SELECT p.*, a.nombres as analista_nombres, a.apellidos as analista_apellidos
+            FROM pool p
+            INNER JOIN analista a ON p.id_analista = a.id_analista
+            WHERE p.id_pool = ANY(%s)
+        """,
+        'analisis_especies_por_pools': """
+            SELECT ap.*, e.nombre_comun, e.nombre_cientifico, e.familia
+            FROM analisis_palinologico ap
+            INNER JOIN especies e ON ap.id_especie = e.id_especie
+            WHERE ap.id_pool = ANY(%s)
+            ORDER BY ap.id_pool, ap.cantidad_granos DESC
+        """,
+        'analisis_tambores_por_pools': """
+            SELECT mt.*, a.nombre as apicultor_nombre, a.apellido as apicultor_apellido,
+                   cp.id_pool as pool_compuesto
+            FROM muestra_tambor mt
+            INNER JOIN compone_pool cp ON mt.id_tambor = cp.id_tambor
+            INNER JOIN apicultor a ON mt.id_apicultor = a.id_apicultor
+            WHERE cp.id_pool = ANY(%s)
+            ORDER BY mt.num_registro
+        """,
+        'analisis_por_rango_fechas': """
+            SELECT ap.*, e.nombre_comun, e.nombre_cientifico, p.fecha_analisis,
+                   a.nombres as analista_nombres, a.apellidos as analista_apellidos,
+                   p.id_analista, a.id_analista as analista_id
+            FROM analisis_palinologico ap
+            INNER JOIN especies e ON ap.id_especie = e.id_especie
+            INNER JOIN pool p ON ap.id_pool = p.id_pool
+            INNER JOIN analista a ON p.id_analista = a.id_analista
+            WHERE p.fecha_analisis BETWEEN %s AND %s
+            ORDER BY p.fecha_analisis DESC, ap.cantidad_granos DESC
+        """,
+        'analisis_por_analista': """
+            SELECT ap.*, e.nombre_comun, e.nombre_cientifico, p.fecha_analisis
+            FROM analisis_palinologico ap
+            INNER JOIN especies e ON ap.id_especie = e.id_especie
+            INNER JOIN pool p ON ap.id_pool = p.id_pool
+            WHERE p.id_analista = %s
+            ORDER BY p.fecha_analisis DESC, ap.cantidad_granos DESC
+        """,
+    }
+    
     def __init__(self):
         super().__init__()
         self.table_name = "analisis_palinologico"
+        self.estadisticas = EstadisticaEspecie()
     
     def get_all_analisis(self) -> List[Dict[str, Any]]:
         """Obtener todos los análisis ordenados por fecha"""
         return self.get_all(self.table_name, "id_palinologico DESC")
     
+    def get_all_analisis_df(self) -> Optional[pd.DataFrame]:
+        """Obtener todos los análisis ordenados por fecha como DataFrame"""
+        return self.get_all_df(self.table_name, "id_palinologico DESC")
+    
+    def get_analisis_page(self, after: Optional[Tuple] = None, page_size: int = None,
+                          columns: List[str] = None) -> Dict[str, Any]:
+        """Obtener una página de análisis, del más reciente al más antiguo (cursor: id_palinologico)"""
+        return self.get_page(self.table_name, ['id_palinologico'], after=after,
+                             page_size=page_size, columns=columns, descending=True)
+    
     def get_analisis_by_id(self, analisis_id: int) -> Optional[Dict[str, Any]]:
         """Obtener análisis por ID"""
         return self.get_by_id(self.table_name, "id_palinologico", analisis_id)
@@ -26,26 +99,85 @@ class AnalisisPalinologico(BaseModel):
             'cantidad_granos': cantidad_granos,
             'marca_especial': marca_especial
         }
-        return self.insert(self.table_name, data)
+        try:
+            with self.transaction():
+                self._bloquear_pools([id_pool])
+                analisis_id = self.insert(self.table_name, data)
+                self.estadisticas.aplicar_deltas(
+                    EstadisticaEspecie.calcular_deltas([], [(id_especie, cantidad_granos)])
+                )
+            return analisis_id
+        except Exception as e:
+            st.error(f"Error al crear el análisis: {str(e)}")
+            return None
     
     def update_analisis(self, analisis_id: int, **kwargs) -> bool:
-        """Actualizar datos de un análisis"""
-        return self.update(self.table_name, "id_palinologico", analisis_id, kwargs)
+        """Actualizar datos de un análisis (y los totales por especie afectados)"""
+        try:
+            with self.transaction():
+                anterior = self._bloquear_analisis(analisis_id, kwargs.get('id_pool'))
+                if anterior is None:
+                    return False
+                actualizado = self.update(self.table_name, "id_palinologico", analisis_id, kwargs)
+                nuevo = (kwargs.get('id_especie', anterior['id_especie']),
+                         kwargs.get('cantidad_granos', anterior['cantidad_granos']))
+                self.estadisticas.aplicar_deltas(EstadisticaEspecie.calcular_deltas(
+                    [(anterior['id_especie'], anterior['cantidad_granos'])], [nuevo]
+                ))
+            return actualizado
+        except Exception as e:
+            st.error(f"Error al actualizar el análisis: {str(e)}")
+            return False
     
     def delete_analisis(self, analisis_id: int) -> bool:
-        """Eliminar un análisis"""
-        return self.delete(self.table_name, "id_palinologico", analisis_id)
+        """Eliminar un análisis (y descontarlo de los totales por especie)"""
+        try:
+            with self.transaction():
+                anterior = self._bloquear_analisis(analisis_id)
+                if anterior is None:
+                    return False
+                eliminado = self.delete(self.table_name, "id_palinologico", analisis_id)
+                self.estadisticas.aplicar_deltas(EstadisticaEspecie.calcular_deltas(
+                    [(anterior['id_especie'], anterior['cantidad_granos'])], []
+                ))
+            return eliminado
+        except Exception as e:
+            st.error(f"Error al eliminar el análisis: {str(e)}")
+            return False
     
-    def get_analisis_by_pool(self, pool_id: int) -> List[Dict[str, Any]]:
-        """Obtener todos los análisis de un pool específico con porcentajes calculados"""
+    def _bloquear_pools(self, pool_ids: List[int]):
+        """
+        Serializar las escrituras de análisis de los pools dados hasta el fin de la transacción
+        
+        Los totales por especie se actualizan con la diferencia entre las filas
+        antes y después de cada escritura; el bloqueo consultivo por pool evita
+        que otra transacción modifique esas filas entre ambas lecturas. Se toma
+        en orden de ID para no generar interbloqueos.
+        """
         query = """
-            SELECT ap.*, e.nombre_comun, e.nombre_cientifico, e.familia
-            FROM analisis_palinologico ap
-            INNER JOIN especies e ON ap.id_especie = e.id_especie
-            WHERE ap.id_pool = %s
-            ORDER BY ap.cantidad_granos DESC
+            SELECT pg_advisory_xact_lock(%s, id_pool)
+            FROM (SELECT DISTINCT unnest(%s::integer[]) AS id_pool ORDER BY 1) pools
+        """
+        self.execute_custom_query(query, (self.BLOQUEO_POOL, [p for p in pool_ids if p is not None]))
+    
+    def _bloquear_analisis(self, analisis_id: int, nuevo_pool: int = None) -> Optional[Dict[str, Any]]:
+        """Bloquear un análisis (y su pool) y devolver sus valores actuales, o None si no existe"""
+        fila = self.get_by_id(self.table_name, "id_palinologico", analisis_id, columns=['id_pool'])
+        if fila is None:
+            return None
+        self._bloquear_pools([fila['id_pool'], nuevo_pool])
+        query = """
+            SELECT id_pool, id_especie, cantidad_granos
+            FROM analisis_palinologico
+            WHERE id_palinologico = %s
+            FOR UPDATE
         """
-        analisis_data = self.execute_custom_query(query, (pool_id,)) or []
+        result = self.execute_custom_query(query, (analisis_id,))
+        return result[0] if result else None
+    
+    def get_analisis_by_pool(self, pool_id: int) -> List[Dict[str, Any]]:
+        """Obtener todos los análisis de un pool específico con porcentajes calculados"""
+        analisis_data = self.execute_named_query('analisis_por_pool', (pool_id,)) or []
         
         # Calcular porcentajes si hay datos
         if analisis_data:
@@ -60,132 +192,385 @@ class AnalisisPalinologico(BaseModel):
     
     def get_analisis_completo(self, pool_id: int) -> Dict[str, Any]:
         """Obtener análisis completo con detalles del pool y especies"""
-        # Debug: Imprimir pool_id que se está consultando
-        print(f"Consultando análisis completo para pool {pool_id}")
+        return self.get_analisis_completo_bulk([pool_id]).get(pool_id)
+    
+    def get_analisis_completo_bulk(self, pool_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Obtener análisis completos de varios pools con un número fijo de consultas
         
-        # Obtener información del pool
-        pool_query = """
-            SELECT p.*, a.nombres as analista_nombres, a.apellidos as analista_apellidos
-            FROM pool p
-            INNER JOIN analista a ON p.id_analista = a.id_analista
-            WHERE p.id_pool = %s
+        Args:
+            pool_ids: IDs de los pools a consultar
+        
+        Returns:
+            Diccionario id_pool -> análisis completo (misma estructura que get_analisis_completo).
+            Los pools inexistentes no se incluyen.
         """
-        pool_info = self.execute_custom_query(pool_query, (pool_id,))
+        pool_ids = list(dict.fromkeys(pool_ids))
+        if not pool_ids:
+            return {}
         
-        # Debug: Verificar información del pool
-        print(f"Información del pool: {pool_info}")
+        # Información de los pools
+        pools_info = self.execute_named_query('analisis_pools_info', (pool_ids,)) or []
         
-        if not pool_info:
-            print(f"No se encontró información del pool {pool_id}")
-            return None
+        resultados = {}
+        for pool_info in pools_info:
+            resultados[pool_info['id_pool']] = {
+                'pool_info': pool_info,
+                'analisis_especies': [],
+                'tambores': [],
+                'total_granos': 0,
+                'total_especies': 0
+            }
         
-        # Obtener análisis de especies
-        analisis_especies = self.get_analisis_by_pool(pool_id)
+        if not resultados:
+            return {}
         
-        # Debug: Verificar análisis de especies
-        print(f"Análisis de especies encontrados: {len(analisis_especies)}")
-        print(f"Datos de análisis: {analisis_especies}")
+        ids_encontrados = list(resultados.keys())
         
-        # Obtener tambores del pool
-        tambores_query = """
-            SELECT mt.*, a.nombre as apicultor_nombre, a.apellido as apicultor_apellido
-            FROM muestra_tambor mt
-            INNER JOIN compone_pool cp ON mt.id_tambor = cp.id_tambor
-            INNER JOIN apicultor a ON mt.id_apicultor = a.id_apicultor
-            WHERE cp.id_pool = %s
-            ORDER BY mt.num_registro
+        # Análisis de especies de todos los pools
+        for analisis in self.execute_named_query('analisis_especies_por_pools', (ids_encontrados,)) or []:
+            resultado = resultados[analisis['id_pool']]
+            resultado['analisis_especies'].append(analisis)
+            resultado['total_granos'] += analisis['cantidad_granos']
+        
+        # Porcentajes por pool en una sola pasada
+        for resultado in resultados.values():
+            total_granos = resultado['total_granos']
+            resultado['total_especies'] = len(resultado['analisis_especies'])
+            for analisis in resultado['analisis_especies']:
+                if total_granos > 0:
+                    analisis['porcentaje'] = round((analisis['cantidad_granos'] / total_granos) * 100, 2)
+                else:
+                    analisis['porcentaje'] = 0.0
+        
+        # Tambores de todos los pools
+        for tambor in self.execute_named_query('analisis_tambores_por_pools', (ids_encontrados,)) or []:
+            pool_id = tambor.pop('pool_compuesto')
+            resultados[pool_id]['tambores'].append(tambor)
+        
+        return resultados
+    
+    def get_analisis_by_date_range(self, fecha_inicio: str, fecha_fin: str,
+                                   columnar: bool = False) -> Union[List[Dict[str, Any]], ColumnarResult]:
+        """Obtener análisis en un rango de fechas (como ColumnarResult si columnar=True)"""
+        result = self.execute_named_query('analisis_por_rango_fechas', (fecha_inicio, fecha_fin), columnar=columnar)
+        return self._resultado(result, columnar)
+    
+    def get_analisis_by_date_range_df(self, fecha_inicio: str, fecha_fin: str) -> Optional[pd.DataFrame]:
+        """Obtener análisis en un rango de fechas como DataFrame"""
+        return self.execute_named_query_df('analisis_por_rango_fechas', (fecha_inicio, fecha_fin))
+    
+    def construir_filtros_reporte(self, fecha_inicio: str = None, fecha_fin: str = None,
+                                  analista_id: int = None, pool_id: int = None,
+                                  apicultor_id: int = None, especie_ids: List[int] = None) -> Tuple[str, list]:
         """
-        tambores = self.execute_custom_query(tambores_query, (pool_id,)) or []
+        Construir FROM/WHERE parametrizado para las consultas de reportes
         
-        # Debug: Verificar tambores
-        print(f"Tambores encontrados: {len(tambores)}")
+        Todas las dimensiones son opcionales y se combinan con AND. El filtro por
+        apicultor se resuelve con un EXISTS sobre compone_pool/muestra_tambor para
+        no duplicar filas cuando un pool tiene varios tambores del mismo apicultor.
         
-        resultado = {
-            'pool_info': pool_info[0],
-            'analisis_especies': analisis_especies,
-            'tambores': tambores,
-            'total_granos': sum(analisis['cantidad_granos'] for analisis in analisis_especies),
-            'total_especies': len(analisis_especies)
-        }
+        Args:
+            fecha_inicio: Fecha mínima de análisis (YYYY-MM-DD)
+            fecha_fin: Fecha máxima de análisis (YYYY-MM-DD)
+            analista_id: ID del analista
+            pool_id: ID del pool
+            apicultor_id: ID del apicultor con tambores en el pool
+            especie_ids: IDs de especies a incluir
         
-        # Debug: Verificar resultado final
-        print(f"Resultado final: {resultado}")
+        Returns:
+            Tupla (fragmento SQL desde FROM, lista de parámetros). Alias: ap, e, p, a
+        """
+        condiciones = []
+        params = []
         
-        return resultado
-    
-    def get_analisis_by_date_range(self, fecha_inicio: str, fecha_fin: str) -> List[Dict[str, Any]]:
-        """Obtener análisis en un rango de fechas"""
-        query = """
-            SELECT ap.*, e.nombre_comun, e.nombre_cientifico, p.fecha_analisis,
-                   a.nombres as analista_nombres, a.apellidos as analista_apellidos,
-                   p.id_analista, a.id_analista as analista_id
+        if fecha_inicio:
+            condiciones.append("p.fecha_analisis >= %s")
+            params.append(fecha_inicio)
+        
+        if fecha_fin:
+            condiciones.append("p.fecha_analisis <= %s")
+            params.append(fecha_fin)
+        
+        if analista_id:
+            condiciones.append("p.id_analista = %s")
+            params.append(analista_id)
+        
+        if pool_id:
+            condiciones.append("ap.id_pool = %s")
+            params.append(pool_id)
+        
+        if apicultor_id:
+            condiciones.append("""EXISTS (
+                SELECT 1
+                FROM compone_pool cp
+                INNER JOIN muestra_tambor mt ON cp.id_tambor = mt.id_tambor
+                WHERE cp.id_pool = ap.id_pool AND mt.id_apicultor = %s
+            )""")
+            params.append(apicultor_id)
+        
+        if especie_ids:
+            condiciones.append("ap.id_especie = ANY(%s)")
+            params.append(list(especie_ids))
+        
+        sql = """
             FROM analisis_palinologico ap
             INNER JOIN especies e ON ap.id_especie = e.id_especie
             INNER JOIN pool p ON ap.id_pool = p.id_pool
             INNER JOIN analista a ON p.id_analista = a.id_analista
-            WHERE p.fecha_analisis BETWEEN %s AND %s
+        """
+        if condiciones:
+            sql += f" WHERE {' AND '.join(condiciones)}"
+        return sql, params
+    
+    def get_reporte(self, columnar: bool = False, **filtros) -> Union[List[Dict[str, Any]], ColumnarResult]:
+        """
+        Obtener filas de análisis que cumplen los filtros de reporte en una sola consulta
+        
+        Acepta los mismos filtros que construir_filtros_reporte. El porcentaje de
+        cada fila se calcula respecto del total de granos del pool dentro del resultado.
+        Con columnar=True devuelve un ColumnarResult (ver to_dataframe).
+        """
+        query, params = self._consulta_reporte(**filtros)
+        return self._resultado(self.execute_custom_query(query, params, columnar=columnar), columnar)
+    
+    async def get_reporte_async(self, columnar: bool = False,
+                                **filtros) -> Union[List[Dict[str, Any]], ColumnarResult]:
+        """Obtener filas de análisis que cumplen los filtros de reporte (asíncrono, ver get_reporte)"""
+        query, params = self._consulta_reporte(**filtros)
+        return self._resultado(await self.execute_custom_query_async(query, params, columnar=columnar), columnar)
+    
+    def get_reporte_df(self, copy: bool = False, categoricas: bool = False, **filtros) -> Optional[pd.DataFrame]:
+        """
+        Obtener las filas de get_reporte como DataFrame con columnas tipadas
+        
+        Args:
+            copy: Transferir el resultado con COPY (conviene para reportes grandes)
+            categoricas: Dejar los textos (especies, analistas) como category
+            **filtros: Mismos filtros que construir_filtros_reporte
+        """
+        query, params = self._consulta_reporte(**filtros)
+        return self.execute_query_df(query, params, copy=copy, categoricas=categoricas)
+    
+    def _consulta_reporte(self, **filtros) -> Tuple[str, tuple]:
+        """Construir la consulta de get_reporte"""
+        desde_where, params = self.construir_filtros_reporte(**filtros)
+        query = f"""
+            SELECT ap.*, e.nombre_comun, e.nombre_cientifico, p.fecha_analisis,
+                   a.nombres as analista_nombres, a.apellidos as analista_apellidos,
+                   p.id_analista, a.id_analista as analista_id,
+                   COALESCE(ROUND(ap.cantidad_granos * 100.0
+                         / NULLIF(SUM(ap.cantidad_granos) OVER (PARTITION BY ap.id_pool), 0), 2), 0)::float8 as porcentaje
+            {desde_where}
             ORDER BY p.fecha_analisis DESC, ap.cantidad_granos DESC
         """
-        return self.execute_custom_query(query, (fecha_inicio, fecha_fin)) or []
+        return query, tuple(params)
+    
+    def iterar_reporte_exportacion(self, chunk_size: int = None, **filtros) -> Iterator[List[tuple]]:
+        """
+        Recorrer las filas de exportación del reporte en bloques con un cursor del lado del servidor
+        
+        Las filas son tuplas con las columnas de COLUMNAS_EXPORTACION, ya formateadas
+        en la base de datos. Acepta los mismos filtros que construir_filtros_reporte.
+        """
+        desde_where, params = self.construir_filtros_reporte(**filtros)
+        query = f"""
+            SELECT ap.id_pool,
+                   to_char(p.fecha_analisis, 'DD/MM/YYYY'),
+                   a.nombres || ' ' || a.apellidos,
+                   COALESCE(e.nombre_comun, '') || ' (' || e.nombre_cientifico || ')',
+                   ap.cantidad_granos,
+                   to_char(COALESCE(ap.cantidad_granos * 100.0
+                           / NULLIF(SUM(ap.cantidad_granos) OVER (PARTITION BY ap.id_pool), 0), 0), 'FM990.00') || '%%'
+            {desde_where}
+            ORDER BY p.fecha_analisis DESC, ap.id_pool, ap.cantidad_granos DESC
+        """
+        return self.db.stream_query(query, tuple(params), chunk_size)
+    
+    def get_reporte_agregados(self, top_n: int = 10, **filtros) -> Dict[str, Any]:
+        """
+        Obtener agregados de reporte (métricas, totales por especie y por fecha) con GROUP BY
+        
+        Se resuelve en una sola consulta con GROUPING SETS, de modo que solo
+        viajan las filas ya agregadas.
+        
+        Args:
+            top_n: Cantidad de especies a incluir en 'top_especies'
+            **filtros: Mismos filtros que construir_filtros_reporte
+        
+        Returns:
+            Diccionario con 'metricas' (total_analisis, total_especies, total_granos),
+            'por_especie' (ordenado por granos desc), 'por_fecha' (ordenado por fecha)
+            y 'top_especies'
+        """
+        query, params = self._consulta_reporte_agregados(**filtros)
+        return self._armar_reporte_agregados(self.execute_custom_query(query, params) or [], top_n)
+    
+    async def get_reporte_agregados_async(self, top_n: int = 10, **filtros) -> Dict[str, Any]:
+        """Obtener agregados de reporte (asíncrono, ver get_reporte_agregados)"""
+        query, params = self._consulta_reporte_agregados(**filtros)
+        return self._armar_reporte_agregados(await self.execute_custom_query_async(query, params) or [], top_n)
+    
+    def _consulta_reporte_agregados(self, **filtros) -> Tuple[str, tuple]:
+        """Construir la consulta con GROUPING SETS de get_reporte_agregados"""
+        desde_where, params = self.construir_filtros_reporte(**filtros)
+        query = f"""
+            SELECT GROUPING(e.id_especie) as agrupa_especie,
+                   GROUPING(p.fecha_analisis) as agrupa_fecha,
+                   e.id_especie, e.nombre_comun, e.nombre_cientifico, p.fecha_analisis,
+                   COALESCE(SUM(ap.cantidad_granos), 0) as total_granos,
+                   COUNT(DISTINCT ap.id_pool) as total_analisis,
+                   COUNT(DISTINCT ap.id_especie) as total_especies
+            {desde_where}
+            GROUP BY GROUPING SETS (
+                (e.id_especie, e.nombre_comun, e.nombre_cientifico),
+                (p.fecha_analisis),
+                ()
+            )
+        """
+        return query, tuple(params)
+    
+    @staticmethod
+    def _armar_reporte_agregados(filas: List[Dict[str, Any]], top_n: int) -> Dict[str, Any]:
+        """Separar las filas de GROUPING SETS en métricas, totales por especie y por fecha"""
+        metricas = {'total_analisis': 0, 'total_especies': 0, 'total_granos': 0}
+        por_especie = []
+        por_fecha = []
+        
+        for fila in filas:
+            if fila['agrupa_especie'] and fila['agrupa_fecha']:
+                metricas = {
+                    'total_analisis': fila['total_analisis'],
+                    'total_especies': fila['total_especies'],
+                    'total_granos': int(fila['total_granos'])
+                }
+            elif not fila['agrupa_especie']:
+                por_especie.append({
+                    'id_especie': fila['id_especie'],
+                    'nombre_comun': fila['nombre_comun'],
+                    'nombre_cientifico': fila['nombre_cientifico'],
+                    'total_granos': int(fila['total_granos']),
+                    'total_analisis': fila['total_analisis']
+                })
+            else:
+                por_fecha.append({
+                    'fecha_analisis': fila['fecha_analisis'],
+                    'total_granos': int(fila['total_granos']),
+                    'total_analisis': fila['total_analisis']
+                })
+        
+        por_especie.sort(key=lambda x: x['total_granos'], reverse=True)
+        por_fecha.sort(key=lambda x: x['fecha_analisis'])
+        
+        return {
+            'metricas': metricas,
+            'por_especie': por_especie,
+            'por_fecha': por_fecha,
+            'top_especies': por_especie[:top_n]
+        }
     
     def get_analisis_by_analista(self, analista_id: int) -> List[Dict[str, Any]]:
         """Obtener análisis de un analista específico"""
-        query = """
-            SELECT ap.*, e.nombre_comun, e.nombre_cientifico, p.fecha_analisis
-            FROM analisis_palinologico ap
-            INNER JOIN especies e ON ap.id_especie = e.id_especie
-            INNER JOIN pool p ON ap.id_pool = p.id_pool
-            WHERE p.id_analista = %s
-            ORDER BY p.fecha_analisis DESC, ap.cantidad_granos DESC
-        """
-        return self.execute_custom_query(query, (analista_id,)) or []
+        return self.execute_named_query('analisis_por_analista', (analista_id,)) or []
+    
+    def get_analisis_by_analista_df(self, analista_id: int) -> Optional[pd.DataFrame]:
+        """Obtener análisis de un analista específico como DataFrame"""
+        return self.execute_named_query_df('analisis_por_analista', (analista_id,))
     
     def get_estadisticas_especies(self) -> List[Dict[str, Any]]:
-        """Obtener estadísticas de especies más frecuentes"""
-        query = """
-            SELECT e.nombre_comun, e.nombre_cientifico, e.familia,
-                   COUNT(ap.id_palinologico) as total_analisis,
-                   SUM(ap.cantidad_granos) as total_granos
-            FROM especies e
-            INNER JOIN analisis_palinologico ap ON e.id_especie = ap.id_especie
-            GROUP BY e.id_especie, e.nombre_comun, e.nombre_cientifico, e.familia
-            ORDER BY total_analisis DESC, total_granos DESC
-        """
-        return self.execute_custom_query(query) or []
+        """Obtener estadísticas de especies más frecuentes (desde los totales mantenidos por especie)"""
+        return self.estadisticas.get_estadisticas()
     
     def save_analisis_completo(self, pool_id: int, especies_data: List[Dict[str, Any]]) -> bool:
-        """Guardar análisis completo para un pool"""
+        """
+        Guardar análisis completo para un pool
+        
+        Re-guardar reemplaza el análisis: se actualizan las cantidades y se
+        eliminan las especies del pool que ya no vienen en especies_data
+        (por ejemplo, las que quedaron en 0 granos).
+        """
+        registros = [
+            {
+                'id_pool': pool_id,
+                'id_especie': especie['especie_id'],
+                'cantidad_granos': especie['cantidad_granos'],
+                'marca_especial': especie.get('marca_especial')
+            }
+            for especie in especies_data
+        ]
+        resultado = self.guardar_analisis_bulk(registros, reemplazar_pools=[pool_id])
+        return resultado is not None and resultado['rows'] > 0
+    
+    def guardar_analisis_bulk(self, registros: List[Dict[str, Any]],
+                              reemplazar_pools: List[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Guardar en bloque análisis de uno o muchos pools
+        
+        Usa INSERT multi-fila o COPY FROM STDIN según el volumen, con upsert sobre
+        (id_pool, id_especie): si la especie ya estaba cargada en el pool se
+        actualizan la cantidad y la marca en lugar de duplicar la fila.
+        
+        Args:
+            registros: Diccionarios con id_pool, id_especie, cantidad_granos y marca_especial
+            reemplazar_pools: Pools cuyo análisis queda exactamente como en registros:
+                sus especies que no aparecen en registros se eliminan
+        
+        Returns:
+            Diccionario con 'rows', 'strategy', 'batches' (tiempos por lote) y 'total_ms',
+            o None si falló
+        """
+        columnas = ['id_pool', 'id_especie', 'cantidad_granos', 'marca_especial']
+        filas = [
+            (r['id_pool'], r['id_especie'], r['cantidad_granos'], r.get('marca_especial'))
+            for r in registros
+        ]
+        claves = sorted({(r['id_pool'], r['id_especie']) for r in registros})
         try:
-            # Debug: Imprimir datos que se van a guardar
-            print(f"Guardando análisis para pool {pool_id}")
-            print(f"Datos a guardar: {especies_data}")
-            
-            # Preparar datos para inserción
-            insert_data = []
-            for especie in especies_data:
-                insert_data.append((
-                    pool_id,
-                    especie['especie_id'],
-                    especie['cantidad_granos'],
-                    especie.get('marca_especial')
-                ))
-            
-            # Debug: Imprimir datos preparados
-            print(f"Datos preparados para inserción: {insert_data}")
-            
-            # Insertar todos los análisis
-            query = """
-                INSERT INTO analisis_palinologico 
-                (id_pool, id_especie, cantidad_granos, marca_especial)
-                VALUES (%s, %s, %s, %s)
-            """
-            result = self.execute_many(query, insert_data)
-            
-            # Debug: Verificar resultado
-            print(f"Resultado de inserción: {result}")
-            
-            return result is not None and result > 0
-            
+            with self.transaction():
+                # Los totales por especie reciben la diferencia entre las filas
+                # de estas claves antes y después del upsert
+                self._bloquear_pools([id_pool for id_pool, _ in claves] + list(reemplazar_pools or []))
+                anteriores = self._granos_por_clave(claves)
+                if reemplazar_pools:
+                    anteriores += self._eliminar_especies_ausentes(reemplazar_pools, claves)
+                resultado = self.bulk_upsert(self.table_name, columnas, filas,
+                                             conflict_columns=['id_pool', 'id_especie'])
+                self.estadisticas.aplicar_deltas(
+                    EstadisticaEspecie.calcular_deltas(anteriores, self._granos_por_clave(claves))
+                )
+            return resultado
         except Exception as e:
-            print(f"Error al guardar análisis completo: {str(e)}")
-            return False 
\ No newline at end of file
+            st.error(f"Error al guardar los análisis: {str(e)}")
+            return None
+    
+    def _eliminar_especies_ausentes(self, pool_ids: List[int],
+                                    claves: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Eliminar los análisis de los pools dados cuyo par (id_pool, id_especie) no está en claves"""
+        query = """
+            DELETE FROM analisis_palinologico ap
+            WHERE ap.id_pool = ANY(%s)
+              AND NOT EXISTS (
+                  SELECT 1 FROM unnest(%s::integer[], %s::integer[]) AS k(id_pool, id_especie)
+                  WHERE k.id_pool = ap.id_pool AND k.id_especie = ap.id_especie
+              )
+            RETURNING ap.id_especie, ap.cantidad_granos
+        """
+        filas = self.execute_custom_query(
+            query, (list(pool_ids), [p for p, _ in claves], [e for _, e in claves])
+        ) or []
+        if filas:
+            self._adjust_count(self.table_name, -len(filas))
+        return [(fila['id_especie'], fila['cantidad_granos']) for fila in filas]
+    
+    def _granos_por_clave(self, claves: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Obtener (id_especie, cantidad_granos) de los análisis existentes para pares (id_pool, id_especie)"""
+        if not claves:
+            return []
+        query = """
+            SELECT ap.id_especie, ap.cantidad_granos
+            FROM analisis_palinologico ap
+            INNER JOIN unnest(%s::integer[], %s::integer[]) AS k(id_pool, id_especie)
+                ON ap.id_pool = k.id_pool AND ap.id_especie = k.id_especie
+        """
+        filas = self.execute_custom_query(query, ([p for p, _ in claves], [e for _, e in claves])) or []
+        return [(fila['id_especie'], fila['cantidad_granos']) for fila in filas]
@@ -1,5 +1,7 @@
 from models.base_model import BaseModel
+from models.catalog_cache import get_catalog_cache
 from typing import List, Dict, Any, Optional
+import pandas as pd
 
 class Analista(BaseModel):
     """Modelo para la tabla analista"""
@@ -9,12 +11,20 @@ class Analista(BaseModel):
         self.table_name = "analista"
     
     def get_all_analistas(self) -> List[Dict[str, Any]]:
-        """Obtener todos los analistas ordenados por nombres"""
-        return self.get_all(self.table_name, "nombres")
+        """Obtener todos los analistas ordenados por nombres (desde el caché de catálogos)"""
+        return get_catalog_cache().get_all(self.table_name)
+    
+    def get_all_analistas_df(self) -> pd.DataFrame:
+        """Obtener todos los analistas ordenados por nombres como DataFrame (desde el caché de catálogos)"""
+        return get_catalog_cache().get_dataframe(self.table_name)
     
     def get_analista_by_id(self, analista_id: int) -> Optional[Dict[str, Any]]:
-        """Obtener analista por ID"""
-        return self.get_by_id(self.table_name, "id_analista", analista_id)
+        """Obtener analista por ID (desde el caché de catálogos)"""
+        return get_catalog_cache().get_by_id(self.table_name, analista_id)
+    
+    def get_opciones_analistas(self) -> Dict[str, int]:
+        """Obtener diccionario nombre completo -> id_analista para selectores"""
+        return get_catalog_cache().get_label_index(self.table_name)
     
     def create_analista(self, nombres: str, apellidos: str, contacto: str = None) -> Optional[int]:
         """Crear un nuevo analista"""
@@ -48,7 +58,4 @@ class Analista(BaseModel):
     
     def get_analista_full_name(self, analista_id: int) -> str:
         """Obtener nombre completo del analista"""
-        analista = self.get_analista_by_id(analista_id)
-        if analista:
-            return f"{analista['nombres']} {analista['apellidos']}"
-        return "Analista no encontrado" 
\ No newline at end of file
+        return get_catalog_cache().get_label(self.table_name, analista_id) or "Analista no encontrado" 
\ No newline at end of file
@@ -1,5 +1,9 @@
 from models.base_model import BaseModel
+from models.catalog_cache import CATALOGOS, get_catalog_cache
+from models.text_search import get_text_search
+from config.settings import PAGINATION_CONFIG
 from typing import List, Dict, Any, Optional
+import pandas as pd
 
 class Apicultor(BaseModel):
     """Modelo para la tabla apicultor"""
@@ -9,12 +13,24 @@ class Apicultor(BaseModel):
         self.table_name = "apicultor"
     
     def get_all_apicultores(self) -> List[Dict[str, Any]]:
-        """Obtener todos los apicultores ordenados por nombre"""
-        return self.get_all(self.table_name, "nombre")
+        """Obtener todos los apicultores ordenados por nombre (desde el caché de catálogos)"""
+        return get_catalog_cache().get_all(self.table_name)
+    
+    def get_all_apicultores_df(self) -> pd.DataFrame:
+        """Obtener todos los apicultores ordenados por nombre como DataFrame (desde el caché de catálogos)"""
+        return get_catalog_cache().get_dataframe(self.table_name)
     
     def get_apicultor_by_id(self, apicultor_id: int) -> Optional[Dict[str, Any]]:
-        """Obtener apicultor por ID"""
-        return self.get_by_id(self.table_name, "id_apicultor", apicultor_id)
+        """Obtener apicultor por ID (desde el caché de catálogos)"""
+        return get_catalog_cache().get_by_id(self.table_name, apicultor_id)
+    
+    def get_opciones_apicultores(self) -> Dict[str, int]:
+        """Obtener diccionario nombre completo -> id_apicultor para selectores"""
+        return get_catalog_cache().get_label_index(self.table_name)
+    
+    def get_apicultor_full_name(self, apicultor_id: int) -> str:
+        """Obtener nombre completo del apicultor"""
+        return get_catalog_cache().get_label(self.table_name, apicultor_id) or "N/A"
     
     def create_apicultor(self, nombre: str, apellido: str) -> Optional[int]:
         """Crear un nuevo apicultor"""
@@ -32,16 +48,15 @@ class Apicultor(BaseModel):
         """Eliminar un apicultor"""
         return self.delete(self.table_name, "id_apicultor", apicultor_id)
     
-    def search_apicultores(self, search_term: str) -> List[Dict[str, Any]]:
-        """Buscar apicultores por nombre o apellido"""
-        query = """
-            SELECT * FROM apicultor 
-            WHERE LOWER(nombre) LIKE LOWER(%s) 
-            OR LOWER(apellido) LIKE LOWER(%s)
-            ORDER BY nombre, apellido
-        """
-        search_pattern = f"%{search_term}%"
-        return self.execute_custom_query(query, (search_pattern, search_pattern)) or []
+    def search_apicultores(self, search_term: str, limit: int = None) -> List[Dict[str, Any]]:
+        """Buscar apicultores por nombre o apellido (sin distinguir acentos, por relevancia)"""
+        limit = limit or PAGINATION_CONFIG['search_results_limit']
+        return get_text_search().buscar(self.table_name, search_term, limit)
+    
+    def buscar_opciones_apicultores(self, search_term: str, limit: int = None) -> Dict[str, int]:
+        """Obtener diccionario nombre completo -> id_apicultor de los apicultores que coinciden"""
+        etiqueta = CATALOGOS[self.table_name].label
+        return {etiqueta(a): a['id_apicultor'] for a in self.search_apicultores(search_term, limit)}
     
     def get_apicultores_with_tambores(self) -> List[Dict[str, Any]]:
         """Obtener apicultores que tienen tambores asociados"""
@@ -1,25 +1,134 @@
 from config.database import get_db
-from typing import List, Dict, Any, Optional
+from config.async_database import get_async_db
+from config.columnar_result import ColumnarResult
+from config.settings import PAGINATION_CONFIG
+from models.catalog_cache import get_catalog_cache
+from models.counter_store import get_counter_store
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+import pandas as pd
 
 class BaseModel:
     """Clase base para todos los modelos de la aplicación"""
     
+    # Consultas fijas del modelo, por nombre (las subclases las definen)
+    CONSULTAS: Dict[str, str] = {}
+    
     def __init__(self):
         self.db = get_db()
+        self.db.statements.register_all(self.CONSULTAS)
+    
+    def get_all(self, table_name: str, order_by: str = None, columns: Sequence[str] = None,
+                columnar: bool = False) -> Union[List[Dict[str, Any]], ColumnarResult]:
+        """Obtener todos los registros de una tabla (como ColumnarResult si columnar=True)"""
+        query = f"SELECT {self._projection(columns)} FROM {table_name}"
+        if order_by:
+            query += f" ORDER BY {order_by}"
+        return self._resultado(self.db.execute_query(query, columnar=columnar), columnar)
     
-    def get_all(self, table_name: str, order_by: str = None) -> List[Dict[str, Any]]:
-        """Obtener todos los registros de una tabla"""
-        query = f"SELECT * FROM {table_name}"
+    def get_all_df(self, table_name: str, order_by: str = None, columns: Sequence[str] = None,
+                   copy: bool = False) -> Optional[pd.DataFrame]:
+        """Obtener todos los registros de una tabla como DataFrame (ver execute_query_df)"""
+        query = f"SELECT {self._projection(columns)} FROM {table_name}"
         if order_by:
             query += f" ORDER BY {order_by}"
-        return self.db.execute_query(query) or []
+        return self.db.execute_query_df(query, copy=copy)
     
-    def get_by_id(self, table_name: str, id_field: str, id_value: Any) -> Optional[Dict[str, Any]]:
+    def get_by_id(self, table_name: str, id_field: str, id_value: Any,
+                  columns: Sequence[str] = None) -> Optional[Dict[str, Any]]:
         """Obtener un registro por ID"""
-        query = f"SELECT * FROM {table_name} WHERE {id_field} = %s"
+        query = f"SELECT {self._projection(columns)} FROM {table_name} WHERE {id_field} = %s"
         result = self.db.execute_query(query, (id_value,))
         return result[0] if result else None
     
+    def get_page(self, table_name: str, key_fields: Sequence[str], after: Optional[Tuple] = None,
+                 page_size: int = None, columns: Sequence[str] = None, descending: bool = False,
+                 where: str = None, params: tuple = (), null_keys: Dict[str, str] = None) -> Dict[str, Any]:
+        """
+        Obtener una página de registros con paginación por cursor (keyset)
+        
+        En lugar de OFFSET, cada página continúa a partir de la clave del último
+        registro de la anterior, por lo que el costo no crece con el número de página.
+        
+        Args:
+            table_name: Tabla a consultar
+            key_fields: Columnas del orden; la última debe ser NOT NULL y única (ej. el ID),
+                las demás NOT NULL o declaradas en null_keys
+            after: Cursor devuelto por la página anterior (None para la primera)
+            page_size: Registros por página (limitado por PAGINATION_CONFIG['max_page_size'])
+            columns: Columnas a devolver (None para todas)
+            descending: Si es True, recorre de mayor a menor
+            where: Condición adicional en SQL con placeholders %s
+            params: Parámetros de la condición adicional
+            null_keys: Columnas clave que admiten NULL y el valor SQL con que se
+                ordenan (ej. {'fecha_analisis': "'-infinity'::date"}); la comparación
+                de filas con un NULL no es verdadera y esas filas se perderían
+        
+        Returns:
+            Diccionario con 'rows', 'next_cursor' (None si no hay más) y 'has_more'
+        """
+        query, query_params, page_size = self._page_query(table_name, key_fields, after, page_size,
+                                                          columns, descending, where, params, null_keys)
+        rows = self.db.execute_query(query, query_params) or []
+        return self._page_result(rows, key_fields, page_size)
+    
+    def _page_query(self, table_name: str, key_fields: Sequence[str], after: Optional[Tuple],
+                    page_size: Optional[int], columns: Optional[Sequence[str]], descending: bool,
+                    where: Optional[str], params: tuple,
+                    null_keys: Optional[Dict[str, str]] = None) -> Tuple[str, tuple, int]:
+        """Construir la consulta de get_page; devuelve (sql, parámetros, tamaño de página efectivo)"""
+        null_keys = null_keys or {}
+        page_size = page_size or PAGINATION_CONFIG['default_page_size']
+        page_size = max(1, min(page_size, PAGINATION_CONFIG['max_page_size']))
+        
+        if columns:
+            # Las columnas clave son necesarias para construir el siguiente cursor
+            columns = list(columns) + [k for k in key_fields if k not in columns]
+        
+        # El cursor guarda el valor de la fila (NULL incluido); el COALESCE se
+        # aplica del mismo modo a la columna y al parámetro
+        claves = [f"COALESCE({k}, {null_keys[k]})" if k in null_keys else k for k in key_fields]
+        condiciones = [f"({where})"] if where else []
+        query_params = list(params)
+        
+        if after is not None:
+            operador = '<' if descending else '>'
+            placeholders = ', '.join(f"COALESCE(%s, {null_keys[k]})" if k in null_keys else '%s'
+                                     for k in key_fields)
+            condiciones.append(f"({', '.join(claves)}) {operador} ({placeholders})")
+            query_params.extend(after)
+        
+        direccion = 'DESC' if descending else 'ASC'
+        query = f"SELECT {self._projection(columns)} FROM {table_name}"
+        if condiciones:
+            query += f" WHERE {' AND '.join(condiciones)}"
+        query += f" ORDER BY {', '.join(f'{k} {direccion}' for k in claves)} LIMIT %s"
+        query_params.append(page_size + 1)
+        return query, tuple(query_params), page_size
+    
+    @staticmethod
+    def _page_result(rows: List[Dict[str, Any]], key_fields: Sequence[str], page_size: int) -> Dict[str, Any]:
+        """Armar el resultado de get_page a partir de las filas leídas (page_size + 1 como máximo)"""
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        
+        return {
+            'rows': rows,
+            'next_cursor': tuple(rows[-1][k] for k in key_fields) if has_more else None,
+            'has_more': has_more
+        }
+    
+    @staticmethod
+    def _resultado(result, columnar: bool = False) -> Union[List[Dict[str, Any]], ColumnarResult]:
+        """Resultado de una lectura, vacío (del mismo tipo) si la consulta falló"""
+        if result is not None:
+            return result
+        return ColumnarResult.desde_filas([]) if columnar else []
+    
+    @staticmethod
+    def _projection(columns: Sequence[str] = None) -> str:
+        """Construir la lista de columnas del SELECT"""
+        return ', '.join(columns) if columns else '*'
+    
     def insert(self, table_name: str, data: Dict[str, Any], id_field: str = None) -> Optional[int]:
         """Insertar un nuevo registro"""
         columns = ', '.join(data.keys())
@@ -41,6 +150,9 @@ class BaseModel:
         query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders}) RETURNING {id_field}"
         
         result = self.db.execute_query(query, tuple(data.values()))
+        if result:
+            self._invalidate_cache(table_name)
+            self._adjust_count(table_name, 1)
         return result[0][id_field] if result else None
     
     def update(self, table_name: str, id_field: str, id_value: Any, data: Dict[str, Any]) -> bool:
@@ -50,18 +162,171 @@ class BaseModel:
         
         values = list(data.values()) + [id_value]
         result = self.db.execute_query(query, tuple(values), fetch=False)
+        if result:
+            self._invalidate_cache(table_name)
         return result is not None and result > 0
     
     def delete(self, table_name: str, id_field: str, id_value: Any) -> bool:
         """Eliminar un registro"""
         query = f"DELETE FROM {table_name} WHERE {id_field} = %s"
         result = self.db.execute_query(query, (id_value,), fetch=False)
+        if result:
+            self._invalidate_cache(table_name)
+            self._adjust_count(table_name, -result)
         return result is not None and result > 0
     
-    def execute_custom_query(self, query: str, params: tuple = None, fetch: bool = True) -> Any:
+    def get_counts(self, table_names: Sequence[str], use_cache: bool = True) -> Dict[str, int]:
+        """
+        Obtener la cantidad de filas de varias tablas
+        
+        Las tablas que no están en el caché de conteos se cuentan juntas en una
+        única consulta (un COUNT(*) por tabla), sin traer las filas.
+        
+        Args:
+            table_names: Tablas a contar
+            use_cache: Si es False, se cuentan todas en la base ignorando el caché
+        
+        Returns:
+            Diccionario tabla -> cantidad de filas (0 si la consulta falló)
+        """
+        counts, query, generations = self._counts_query(table_names, use_cache)
+        if query:
+            result = self.db.execute_query(query)
+            counts.update(self._store_counts(result, generations))
+        return {table: counts.get(table, 0) for table in table_names}
+    
+    def _counts_query(self, table_names: Sequence[str], use_cache: bool) -> Tuple[Dict[str, int], Optional[str], Dict[str, int]]:
+        """Separar los conteos cacheados de las tablas a contar; devuelve (cacheados, sql, generaciones)"""
+        store = get_counter_store()
+        counts = {}
+        if use_cache:
+            for table in table_names:
+                count = store.get(table)
+                if count is not None:
+                    counts[table] = count
+        
+        missing = [table for table in table_names if table not in counts]
+        if not missing:
+            return counts, None, {}
+        
+        generations = store.generations(missing)
+        query = "SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {table}) AS {table}" for table in missing)
+        return counts, query, generations
+    
+    @staticmethod
+    def _store_counts(result: Optional[List[Dict[str, Any]]], generations: Dict[str, int]) -> Dict[str, int]:
+        """Guardar en el caché los conteos leídos de la base"""
+        if not result:
+            return {}
+        counts = {table: int(result[0][table]) for table in generations}
+        get_counter_store().store(counts, generations)
+        return counts
+    
+    def _adjust_count(self, table_name: str, delta: int):
+        """Ajustar el conteo cacheado de la tabla cuando se confirme la escritura"""
+        store = get_counter_store()
+        self.db.after_commit(lambda: store.adjust(table_name, delta))
+    
+    def _invalidate_count(self, table_name: str):
+        """Descartar el conteo cacheado de la tabla cuando se confirme una escritura de efecto desconocido"""
+        store = get_counter_store()
+        self.db.after_commit(lambda: store.invalidate(table_name))
+    
+    def transaction(self):
+        """
+        Agrupar varias operaciones (de este u otros modelos) en una sola transacción
+        
+        Uso: with model.transaction(): ...
+        """
+        return self.db.transaction()
+    
+    def _invalidate_cache(self, table_name: str):
+        """Invalidar el caché de catálogos si la tabla modificada es un catálogo"""
+        catalog_cache = get_catalog_cache()
+        if catalog_cache.is_cached(table_name):
+            # Dentro de una transacción se invalida recién al confirmar
+            self.db.after_commit(lambda: catalog_cache.invalidate(table_name))
+    
+    def execute_custom_query(self, query: str, params: tuple = None, fetch: bool = True,
+                             columnar: bool = False) -> Any:
         """Ejecutar una consulta personalizada"""
-        return self.db.execute_query(query, params, fetch)
+        return self.db.execute_query(query, params, fetch, columnar=columnar)
+    
+    def execute_named_query(self, name: str, params: tuple = None, fetch: bool = True,
+                            columnar: bool = False) -> Any:
+        """Ejecutar una de las CONSULTAS del modelo como sentencia preparada"""
+        return self.db.execute_prepared(name, params, fetch, columnar=columnar)
+    
+    def execute_query_df(self, query: str, params: tuple = None, copy: bool = False,
+                         categoricas: bool = False) -> Optional[pd.DataFrame]:
+        """Ejecutar una consulta personalizada y devolver un DataFrame con columnas tipadas"""
+        return self.db.execute_query_df(query, params, copy=copy, categoricas=categoricas)
+    
+    def execute_named_query_df(self, name: str, params: tuple = None, copy: bool = False,
+                               categoricas: bool = False) -> Optional[pd.DataFrame]:
+        """Ejecutar una de las CONSULTAS del modelo y devolver un DataFrame con columnas tipadas"""
+        return self.db.execute_prepared_df(name, params, copy=copy, categoricas=categoricas)
     
     def execute_many(self, query: str, params_list: List[tuple]) -> Optional[int]:
         """Ejecutar múltiples consultas"""
-        return self.db.execute_many(query, params_list) 
\ No newline at end of file
+        return self.db.execute_many(query, params_list)
+    
+    def bulk_upsert(self, table_name: str, columns: List[str], rows: List[tuple],
+                    conflict_columns: List[str], update_columns: List[str] = None) -> Optional[Dict[str, Any]]:
+        """Insertar o actualizar filas en bloque con ON CONFLICT"""
+        result = self.db.bulk_upsert(table_name, columns, rows, conflict_columns, update_columns)
+        if result is not None:
+            # No se distingue cuántas filas se insertaron y cuántas se actualizaron
+            self._invalidate_count(table_name)
+        return result
+    
+    # Variantes asíncronas: se combinan con get_async_db().gather(...) para
+    # ejecutar a la vez las consultas independientes de una página
+    
+    @property
+    def async_db(self):
+        """Acceso asíncrono a la base de datos"""
+        return get_async_db()
+    
+    async def get_all_async(self, table_name: str, order_by: str = None, columns: Sequence[str] = None,
+                            columnar: bool = False) -> Union[List[Dict[str, Any]], ColumnarResult]:
+        """Obtener todos los registros de una tabla (asíncrono)"""
+        query = f"SELECT {self._projection(columns)} FROM {table_name}"
+        if order_by:
+            query += f" ORDER BY {order_by}"
+        return self._resultado(await self.async_db.execute_query(query, columnar=columnar), columnar)
+    
+    async def get_by_id_async(self, table_name: str, id_field: str, id_value: Any,
+                              columns: Sequence[str] = None) -> Optional[Dict[str, Any]]:
+        """Obtener un registro por ID (asíncrono)"""
+        query = f"SELECT {self._projection(columns)} FROM {table_name} WHERE {id_field} = %s"
+        result = await self.async_db.execute_query(query, (id_value,))
+        return result[0] if result else None
+    
+    async def get_page_async(self, table_name: str, key_fields: Sequence[str], after: Optional[Tuple] = None,
+                             page_size: int = None, columns: Sequence[str] = None, descending: bool = False,
+                             where: str = None, params: tuple = (),
+                             null_keys: Dict[str, str] = None) -> Dict[str, Any]:
+        """Obtener una página de registros con paginación por cursor (asíncrono, ver get_page)"""
+        query, query_params, page_size = self._page_query(table_name, key_fields, after, page_size,
+                                                          columns, descending, where, params, null_keys)
+        rows = await self.async_db.execute_query(query, query_params) or []
+        return self._page_result(rows, key_fields, page_size)
+    
+    async def get_counts_async(self, table_names: Sequence[str], use_cache: bool = True) -> Dict[str, int]:
+        """Obtener la cantidad de filas de varias tablas (asíncrono, ver get_counts)"""
+        counts, query, generations = self._counts_query(table_names, use_cache)
+        if query:
+            result = await self.async_db.execute_query(query)
+            counts.update(self._store_counts(result, generations))
+        return {table: counts.get(table, 0) for table in table_names}
+    
+    async def execute_custom_query_async(self, query: str, params: tuple = None, fetch: bool = True,
+                                         columnar: bool = False) -> Any:
+        """Ejecutar una consulta personalizada (asíncrono)"""
+        return await self.async_db.execute_query(query, params, fetch, columnar=columnar)
+    
+    async def execute_named_query_async(self, name: str, params: tuple = None, fetch: bool = True,
+                                        columnar: bool = False) -> Any:
+        """Ejecutar una de las CONSULTAS del modelo (asíncrono)"""
+        return await self.async_db.execute_prepared(name, params, fetch, columnar=columnar)
@@ -0,0 +1,172 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+import pandas as pd
+import streamlit as st
+from config.columnar_result import ColumnarResult
+from config.database import get_db
+from config.settings import CACHE_CONFIG
+from utils.formatters import formatear_especie, formatear_nombre_completo
+
+
+class _Catalogo:
+    """Definición de una tabla maestra cacheada"""
+    __slots__ = ('table_name', 'id_field', 'order_by', 'label')
+
+    def __init__(self, table_name: str, id_field: str, order_by: str, label: Callable[[Dict[str, Any]], str]):
+        self.table_name = table_name
+        self.id_field = id_field
+        self.order_by = order_by
+        self.label = label
+
+
+CATALOGOS = {
+    'especies': _Catalogo(
+        'especies', 'id_especie', 'nombre_comun',
+        lambda e: formatear_especie(e.get('nombre_comun'), e.get('nombre_cientifico'))
+    ),
+    'analista': _Catalogo(
+        'analista', 'id_analista', 'nombres',
+        lambda a: formatear_nombre_completo(a.get('nombres') or '', a.get('apellidos') or '')
+    ),
+    'apicultor': _Catalogo(
+        'apicultor', 'id_apicultor', 'nombre',
+        lambda a: formatear_nombre_completo(a.get('nombre') or '', a.get('apellido') or '')
+    ),
+}
+
+
+class _Snapshot:
+    """Contenido cargado de un catálogo con sus índices"""
+    __slots__ = ('rows', 'by_id', 'by_label', 'loaded_at', 'derived')
+
+    def __init__(self, rows: List[Dict[str, Any]], catalogo: _Catalogo):
+        self.rows = rows
+        self.by_id = {row[catalogo.id_field]: row for row in rows}
+        self.by_label = {catalogo.label(row): row for row in rows}
+        self.loaded_at = time.monotonic()
+        # Estructuras calculadas a partir de las filas (ej. índices de búsqueda)
+        self.derived = {}
+
+
+class CatalogCache:
+    """
+    Caché en memoria de las tablas maestras (especies, analistas y apicultores)
+
+    Cada tabla se carga completa una única vez y se indexa por ID y por
+    etiqueta de presentación. BaseModel invalida la tabla correspondiente
+    después de cada insert/update/delete; además cada entrada expira tras
+    CACHE_CONFIG['catalog_ttl_seconds'] para reflejar cambios hechos fuera
+    de la aplicación.
+    """
+
+    def __init__(self, ttl_seconds: float = 300):
+        self.db = get_db()
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._snapshots = {}
+        self._generations = {table: 0 for table in CATALOGOS}
+
+    def is_cached(self, table_name: str) -> bool:
+        """Indicar si una tabla es administrada por el caché"""
+        return table_name in CATALOGOS
+
+    def _get_snapshot(self, table_name: str) -> Optional[_Snapshot]:
+        """Obtener el contenido de un catálogo, cargándolo si hace falta"""
+        catalogo = CATALOGOS[table_name]
+
+        with self._lock:
+            snapshot = self._snapshots.get(table_name)
+            generation = self._generations[table_name]
+        if snapshot and time.monotonic() - snapshot.loaded_at < self.ttl_seconds:
+            return snapshot
+
+        query = f"SELECT * FROM {catalogo.table_name} ORDER BY {catalogo.order_by}"
+        rows = self.db.execute_query(query)
+        if rows is None:
+            return None
+
+        snapshot = _Snapshot([dict(row) for row in rows], catalogo)
+        if self.db.current_transaction() is not None:
+            # Leído en la conexión de la transacción: puede incluir filas sin
+            # confirmar, así que se usa para esta consulta pero no se comparte
+            return snapshot
+        with self._lock:
+            # Descartar la carga si la tabla fue modificada mientras se consultaba
+            if self._generations[table_name] == generation:
+                self._snapshots[table_name] = snapshot
+        return snapshot
+
+    def get_all(self, table_name: str) -> List[Dict[str, Any]]:
+        """Obtener todos los registros de un catálogo en el orden por defecto"""
+        snapshot = self._get_snapshot(table_name)
+        return [dict(row) for row in snapshot.rows] if snapshot else []
+
+    def get_by_id(self, table_name: str, id_value: Any) -> Optional[Dict[str, Any]]:
+        """Obtener un registro del catálogo por ID"""
+        snapshot = self._get_snapshot(table_name)
+        row = snapshot.by_id.get(id_value) if snapshot else None
+        return dict(row) if row else None
+
+    def get_by_label(self, table_name: str, label: str) -> Optional[Dict[str, Any]]:
+        """Obtener un registro del catálogo por su etiqueta de presentación"""
+        snapshot = self._get_snapshot(table_name)
+        row = snapshot.by_label.get(label) if snapshot else None
+        return dict(row) if row else None
+
+    def get_label(self, table_name: str, id_value: Any) -> Optional[str]:
+        """Obtener la etiqueta de presentación de un registro"""
+        snapshot = self._get_snapshot(table_name)
+        row = snapshot.by_id.get(id_value) if snapshot else None
+        return CATALOGOS[table_name].label(row) if row else None
+
+    def get_label_index(self, table_name: str) -> Dict[str, Any]:
+        """Obtener diccionario etiqueta -> ID, listo para usar en selectores"""
+        snapshot = self._get_snapshot(table_name)
+        if not snapshot:
+            return {}
+        id_field = CATALOGOS[table_name].id_field
+        return {label: row[id_field] for label, row in snapshot.by_label.items()}
+
+    def get_dataframe(self, table_name: str) -> pd.DataFrame:
+        """
+        Obtener el catálogo como DataFrame, armado por columnas una vez por carga
+
+        Se devuelve una copia superficial: agregar o quitar columnas no altera
+        el DataFrame cacheado.
+        """
+        df = self.get_derived(table_name, 'dataframe', lambda rows: ColumnarResult.desde_filas(rows).to_dataframe())
+        return df.copy(deep=False)
+
+    def get_derived(self, table_name: str, name: str, builder: Callable[[List[Dict[str, Any]]], Any]) -> Any:
+        """
+        Obtener una estructura derivada del catálogo, construyéndola una vez por carga
+        
+        Args:
+            table_name: Catálogo de origen
+            name: Nombre de la estructura derivada
+            builder: Función que recibe las filas y construye la estructura
+        """
+        snapshot = self._get_snapshot(table_name)
+        if not snapshot:
+            return builder([])
+        with self._lock:
+            if name not in snapshot.derived:
+                snapshot.derived[name] = builder(snapshot.rows)
+            return snapshot.derived[name]
+
+    def invalidate(self, table_name: str = None):
+        """Invalidar un catálogo (o todos si no se indica tabla)"""
+        tables = [table_name] if table_name else list(CATALOGOS)
+        with self._lock:
+            for table in tables:
+                if table in CATALOGOS:
+                    self._snapshots.pop(table, None)
+                    self._generations[table] += 1
+
+
+# Instancia global del caché de catálogos
+@st.cache_resource
+def get_catalog_cache() -> CatalogCache:
+    """Obtener instancia compartida del caché de catálogos (cached)"""
+    return CatalogCache(ttl_seconds=CACHE_CONFIG['catalog_ttl_seconds'])
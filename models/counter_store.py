@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+import streamlit as st
+from config.settings import CACHE_CONFIG
+
+# Tablas que se resumen en las "Estadísticas Rápidas" de la página principal y de administración
+TABLAS_ESTADISTICAS_RAPIDAS = ['apicultor', 'analista', 'especies', 'muestra_tambor']
+
+
+class CounterStore:
+    """
+    Caché en memoria de la cantidad de filas por tabla
+
+    BaseModel.get_counts completa las tablas ausentes o vencidas con una única
+    consulta de varios COUNT(*). Las escrituras de los modelos ajustan el
+    conteo en memoria al confirmarse (+1 por alta, -n por baja), o lo
+    descartan si no conocen la diferencia exacta; cada conteo además vence
+    tras CACHE_CONFIG['counts_ttl_seconds'] para reflejar cambios hechos
+    fuera de la aplicación.
+    """
+
+    def __init__(self, ttl_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._generations: Dict[str, int] = defaultdict(int)
+
+    def get(self, table_name: str) -> Optional[int]:
+        """Obtener la cantidad de filas cacheada de una tabla, o None si no está o venció"""
+        with self._lock:
+            count = self._counts.get(table_name)
+            if count is None or time.monotonic() - self._loaded_at[table_name] >= self.ttl_seconds:
+                return None
+            return count
+
+    def generations(self, table_names: Iterable[str]) -> Dict[str, int]:
+        """Obtener la generación actual de cada tabla (se toma antes de contar en la base)"""
+        with self._lock:
+            return {table: self._generations[table] for table in table_names}
+
+    def store(self, counts: Dict[str, int], generations: Dict[str, int]):
+        """Guardar conteos leídos de la base, salvo los de tablas modificadas mientras se contaba"""
+        now = time.monotonic()
+        with self._lock:
+            for table, count in counts.items():
+                if self._generations[table] == generations.get(table):
+                    self._counts[table] = count
+                    self._loaded_at[table] = now
+
+    def adjust(self, table_name: str, delta: int):
+        """Sumar una diferencia conocida al conteo cacheado (sin consultar la base)"""
+        with self._lock:
+            self._generations[table_name] += 1
+            if table_name in self._counts:
+                self._counts[table_name] = max(0, self._counts[table_name] + delta)
+
+    def invalidate(self, table_name: str = None):
+        """Descartar el conteo de una tabla (o todos) para que se vuelva a contar"""
+        with self._lock:
+            tables = [table_name] if table_name else list(self._counts)
+            for table in tables:
+                self._counts.pop(table, None)
+                self._loaded_at.pop(table, None)
+                self._generations[table] += 1
+
+
+# Instancia global del caché de conteos
+@st.cache_resource
+def get_counter_store() -> CounterStore:
+    """Obtener instancia compartida del caché de conteos (cached)"""
+    return CounterStore(ttl_seconds=CACHE_CONFIG['counts_ttl_seconds'])
@@ -1,5 +1,9 @@
 from models.base_model import BaseModel
+from models.catalog_cache import CATALOGOS, get_catalog_cache
+from models.text_search import get_text_search
+from config.settings import PAGINATION_CONFIG
 from typing import List, Dict, Any, Optional
+import pandas as pd
 
 class Especie(BaseModel):
     """Modelo para la tabla especies"""
@@ -9,12 +13,37 @@ class Especie(BaseModel):
         self.table_name = "especies"
     
     def get_all_especies(self) -> List[Dict[str, Any]]:
-        """Obtener todas las especies ordenadas por nombre común"""
-        return self.get_all(self.table_name, "nombre_comun")
+        """Obtener todas las especies ordenadas por nombre común (desde el caché de catálogos)"""
+        return get_catalog_cache().get_all(self.table_name)
+    
+    def get_all_especies_df(self) -> pd.DataFrame:
+        """Obtener todas las especies ordenadas por nombre común como DataFrame (desde el caché de catálogos)"""
+        return get_catalog_cache().get_dataframe(self.table_name)
     
     def get_especie_by_id(self, especie_id: int) -> Optional[Dict[str, Any]]:
-        """Obtener especie por ID"""
-        return self.get_by_id(self.table_name, "id_especie", especie_id)
+        """Obtener especie por ID (desde el caché de catálogos)"""
+        return get_catalog_cache().get_by_id(self.table_name, especie_id)
+    
+    def get_especies_by_ids(self, especie_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Obtener varias especies por ID desde la base, en el orden dado
+        
+        No usa el caché de catálogos: las opciones del buscador pueden incluir
+        especies más nuevas que la copia cacheada. Los IDs que ya no existen se omiten.
+        """
+        if not especie_ids:
+            return []
+        query = f"SELECT * FROM {self.table_name} WHERE id_especie = ANY(%s)"
+        por_id = {fila['id_especie']: fila for fila in self.execute_custom_query(query, (list(especie_ids),)) or []}
+        return [por_id[especie_id] for especie_id in especie_ids if especie_id in por_id]
+    
+    def get_especie_by_label(self, label: str) -> Optional[Dict[str, Any]]:
+        """Obtener especie por su etiqueta 'nombre común (nombre científico)'"""
+        return get_catalog_cache().get_by_label(self.table_name, label)
+    
+    def get_opciones_especies(self) -> Dict[str, int]:
+        """Obtener diccionario etiqueta -> id_especie para selectores"""
+        return get_catalog_cache().get_label_index(self.table_name)
     
     def create_especie(self, nombre_cientifico: str, nombre_comun: str = None, familia: str = None) -> Optional[int]:
         """Crear una nueva especie"""
@@ -33,16 +62,15 @@ class Especie(BaseModel):
         """Eliminar una especie"""
         return self.delete(self.table_name, "id_especie", especie_id)
     
-    def search_especies(self, search_term: str) -> List[Dict[str, Any]]:
-        """Buscar especies por nombre común o científico"""
-        query = """
-            SELECT * FROM especies 
-            WHERE LOWER(nombre_comun) LIKE LOWER(%s) 
-            OR LOWER(nombre_cientifico) LIKE LOWER(%s)
-            ORDER BY nombre_comun
-        """
-        search_pattern = f"%{search_term}%"
-        return self.execute_custom_query(query, (search_pattern, search_pattern)) or []
+    def search_especies(self, search_term: str, limit: int = None) -> List[Dict[str, Any]]:
+        """Buscar especies por nombre común o científico (sin distinguir acentos, por relevancia)"""
+        limit = limit or PAGINATION_CONFIG['search_results_limit']
+        return get_text_search().buscar(self.table_name, search_term, limit)
+    
+    def buscar_opciones_especies(self, search_term: str, limit: int = None) -> Dict[str, int]:
+        """Obtener diccionario etiqueta -> id_especie de las especies que coinciden, por relevancia"""
+        etiqueta = CATALOGOS[self.table_name].label
+        return {etiqueta(e): e['id_especie'] for e in self.search_especies(search_term, limit)}
     
     def get_especies_by_familia(self, familia: str) -> List[Dict[str, Any]]:
         """Obtener especies por familia"""
@@ -54,24 +82,16 @@ class Especie(BaseModel):
         return self.execute_custom_query(query, (familia,)) or []
     
     def get_especies_with_analisis(self) -> List[Dict[str, Any]]:
-        """Obtener especies que han sido analizadas"""
+        """Obtener especies que han sido analizadas (desde los totales mantenidos por especie)"""
         query = """
-            SELECT DISTINCT e.*, COUNT(ap.id_palinologico) as total_analisis
+            SELECT e.*, s.total_analisis
             FROM especies e
-            INNER JOIN analisis_palinologico ap ON e.id_especie = ap.id_especie
-            GROUP BY e.id_especie, e.nombre_cientifico, e.nombre_comun, e.familia
+            INNER JOIN estadisticas_especie s ON e.id_especie = s.id_especie
+            WHERE s.total_analisis > 0
             ORDER BY e.nombre_comun
         """
         return self.execute_custom_query(query) or []
     
     def get_especie_full_name(self, especie_id: int) -> str:
         """Obtener nombre completo de la especie (común + científico)"""
-        especie = self.get_especie_by_id(especie_id)
-        if especie:
-            nombre_comun = especie.get('nombre_comun', '')
-            nombre_cientifico = especie.get('nombre_cientifico', '')
-            if nombre_comun:
-                return f"{nombre_comun} ({nombre_cientifico})"
-            else:
-                return nombre_cientifico
-        return "Especie no encontrada" 
\ No newline at end of file
+        return get_catalog_cache().get_label(self.table_name, especie_id) or "Especie no encontrada" 
\ No newline at end of file
@@ -0,0 +1,108 @@
+from collections import defaultdict
+from models.base_model import BaseModel
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+class EstadisticaEspecie(BaseModel):
+    """
+    Modelo para la tabla estadisticas_especie (totales por especie)
+
+    Guarda por cada especie la cantidad de análisis y el total de granos.
+    No se recalcula al leer: AnalisisPalinologico le aplica la diferencia de
+    cada alta, modificación o baja dentro de la misma transacción, por lo que
+    leerla cuesta una fila por especie y no depende del tamaño de
+    analisis_palinologico.
+    """
+
+    CONSULTAS = {
+        'estadisticas_especies': """
+            SELECT e.id_especie, e.nombre_comun, e.nombre_cientifico, e.familia,
+                   s.total_analisis, s.total_granos
+            FROM estadisticas_especie s
+            INNER JOIN especies e ON s.id_especie = e.id_especie
+            WHERE s.total_analisis > 0
+            ORDER BY s.total_analisis DESC, s.total_granos DESC
+        """,
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.table_name = "estadisticas_especie"
+
+    def get_estadisticas(self) -> List[Dict[str, Any]]:
+        """Obtener los totales de las especies con al menos un análisis, de la más frecuente a la menos"""
+        return self.execute_named_query('estadisticas_especies') or []
+
+    @staticmethod
+    def calcular_deltas(anteriores: Iterable[Tuple[Optional[int], Optional[int]]],
+                        nuevas: Iterable[Tuple[Optional[int], Optional[int]]]) -> Dict[int, Tuple[int, int]]:
+        """
+        Calcular la diferencia por especie entre dos conjuntos de filas de análisis
+
+        Args:
+            anteriores: Pares (id_especie, cantidad_granos) que dejan de existir
+            nuevas: Pares (id_especie, cantidad_granos) que pasan a existir
+
+        Returns:
+            Diccionario id_especie -> (diferencia de análisis, diferencia de granos),
+            sin las especies cuya diferencia es nula
+        """
+        deltas = defaultdict(lambda: [0, 0])
+        for signo, filas in ((-1, anteriores), (1, nuevas)):
+            for id_especie, granos in filas:
+                if id_especie is None:
+                    continue
+                deltas[id_especie][0] += signo
+                deltas[id_especie][1] += signo * (granos or 0)
+        return {id_especie: tuple(d) for id_especie, d in deltas.items() if d != [0, 0]}
+
+    def aplicar_deltas(self, deltas: Dict[int, Tuple[int, int]]) -> None:
+        """
+        Sumar diferencias (análisis, granos) a los totales de cada especie
+
+        Debe llamarse dentro de la misma transacción que la escritura que las
+        origina, para que los totales y los análisis se confirmen juntos.
+        """
+        if not deltas:
+            return
+        ids = list(deltas.keys())
+        query = """
+            INSERT INTO estadisticas_especie (id_especie, total_analisis, total_granos)
+            SELECT * FROM unnest(%s::integer[], %s::bigint[], %s::bigint[])
+            ON CONFLICT (id_especie) DO UPDATE
+                SET total_analisis = estadisticas_especie.total_analisis + EXCLUDED.total_analisis,
+                    total_granos = estadisticas_especie.total_granos + EXCLUDED.total_granos,
+                    actualizado_en = CURRENT_TIMESTAMP
+        """
+        self.execute_custom_query(query, (ids, [deltas[i][0] for i in ids], [deltas[i][1] for i in ids]),
+                                  fetch=False)
+
+    def refrescar(self) -> Optional[int]:
+        """
+        Recalcular todos los totales desde analisis_palinologico
+
+        Corrige desvíos si la tabla de análisis se modificó por fuera de la
+        aplicación. Bloquea las escrituras de análisis mientras recalcula.
+
+        Returns:
+            Cantidad de especies actualizadas
+        """
+        with self.transaction():
+            self.execute_custom_query("LOCK TABLE analisis_palinologico IN SHARE MODE", fetch=False)
+            query = """
+                WITH totales AS (
+                    SELECT id_especie, COUNT(*) AS total_analisis,
+                           COALESCE(SUM(cantidad_granos), 0) AS total_granos
+                    FROM analisis_palinologico
+                    WHERE id_especie IS NOT NULL
+                    GROUP BY id_especie
+                )
+                INSERT INTO estadisticas_especie (id_especie, total_analisis, total_granos)
+                SELECT e.id_especie, COALESCE(t.total_analisis, 0), COALESCE(t.total_granos, 0)
+                FROM especies e
+                LEFT JOIN totales t ON t.id_especie = e.id_especie
+                ON CONFLICT (id_especie) DO UPDATE
+                    SET total_analisis = EXCLUDED.total_analisis,
+                        total_granos = EXCLUDED.total_granos,
+                        actualizado_en = CURRENT_TIMESTAMP
+            """
+            return self.execute_custom_query(query, fetch=False)
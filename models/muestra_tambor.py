@@ -1,9 +1,35 @@
 from models.base_model import BaseModel
-from typing import List, Dict, Any, Optional
+from models.catalog_cache import get_catalog_cache
+from utils.busqueda import escapar_like
+from config.settings import PAGINATION_CONFIG
+from typing import List, Dict, Any, Optional, Tuple
+import pandas as pd
 
 class MuestraTambor(BaseModel):
     """Modelo para la tabla muestra_tambor"""
     
+    # Consultas fijas con nombre: se preparan una vez por conexión (ver config/prepared_statements.py)
+    CONSULTAS = {
+        'tambores_por_apicultor': """
+            SELECT mt.*, a.nombre as apicultor_nombre, a.apellido as apicultor_apellido
+            FROM muestra_tambor mt
+            LEFT JOIN apicultor a ON mt.id_apicultor = a.id_apicultor
+            WHERE mt.id_apicultor = %s
+            ORDER BY mt.num_registro
+        """,
+        'tambores_en_pool': """
+            SELECT mt.*, a.nombre as apicultor_nombre, a.apellido as apicultor_apellido
+            FROM muestra_tambor mt
+            LEFT JOIN apicultor a ON mt.id_apicultor = a.id_apicultor
+            INNER JOIN compone_pool cp ON mt.id_tambor = cp.id_tambor
+            WHERE cp.id_pool = %s
+            ORDER BY mt.num_registro
+        """,
+    }
+    
+    # Orden de los tambores sin número de registro en la paginación (ver 0009)
+    CLAVES_NULAS_PAGINA = {'num_registro': "''"}
+    
     def __init__(self):
         super().__init__()
         self.table_name = "muestra_tambor"
@@ -12,6 +38,46 @@ class MuestraTambor(BaseModel):
         """Obtener todos los tambores ordenados por número de registro"""
         return self.get_all(self.table_name, "num_registro")
     
+    def get_all_tambores_df(self) -> Optional[pd.DataFrame]:
+        """Obtener todos los tambores ordenados por número de registro como DataFrame"""
+        return self.get_all_df(self.table_name, "num_registro")
+    
+    def get_tambores_page(self, after: Optional[Tuple] = None, page_size: int = None,
+                          columns: List[str] = None) -> Dict[str, Any]:
+        """
+        Obtener una página de tambores ordenados por número de registro (cursor: num_registro, id_tambor)
+        
+        Los tambores sin número de registro van al principio.
+        """
+        return self.get_page(self.table_name, ['num_registro', 'id_tambor'], after=after,
+                             page_size=page_size, columns=columns, null_keys=self.CLAVES_NULAS_PAGINA)
+    
+    async def get_tambores_page_async(self, after: Optional[Tuple] = None, page_size: int = None,
+                                      columns: List[str] = None) -> Dict[str, Any]:
+        """Obtener una página de tambores ordenados por número de registro (asíncrono)"""
+        return await self.get_page_async(self.table_name, ['num_registro', 'id_tambor'], after=after,
+                                         page_size=page_size, columns=columns,
+                                         null_keys=self.CLAVES_NULAS_PAGINA)
+    
+    @staticmethod
+    def etiqueta_tambor(tambor: Dict[str, Any]) -> str:
+        """Etiqueta de un tambor para selectores: 'ID - número de registro'"""
+        return f"{tambor['id_tambor']} - {tambor['num_registro'] or 'Sin registro'}"
+    
+    def buscar_opciones_tambores(self, search_term: str, limit: int = None) -> Dict[str, int]:
+        """Obtener diccionario etiqueta -> id_tambor de los tambores cuyo ID o número de registro coinciden"""
+        limit = limit or PAGINATION_CONFIG['search_results_limit']
+        termino = search_term.strip().lstrip('#')
+        query = """
+            SELECT id_tambor, num_registro
+            FROM muestra_tambor
+            WHERE num_registro ILIKE %s OR CAST(id_tambor AS TEXT) = %s
+            ORDER BY COALESCE(num_registro, ''), id_tambor
+            LIMIT %s
+        """
+        filas = self.execute_custom_query(query, (f"%{escapar_like(termino)}%", termino, limit)) or []
+        return {self.etiqueta_tambor(t): t['id_tambor'] for t in filas}
+    
     def get_tambor_by_id(self, tambor_id: int) -> Optional[Dict[str, Any]]:
         """Obtener tambor por ID"""
         return self.get_by_id(self.table_name, "id_tambor", tambor_id)
@@ -39,36 +105,83 @@ class MuestraTambor(BaseModel):
     
     def get_tambores_disponibles(self) -> List[Dict[str, Any]]:
         """Obtener tambores que no están en ningún pool"""
+        # Anti-join con NOT EXISTS: usa el índice de compone_pool(id_tambor) en lugar de
+        # materializar toda la tabla como con NOT IN
         query = """
             SELECT mt.*, a.nombre as apicultor_nombre, a.apellido as apicultor_apellido
             FROM muestra_tambor mt
             LEFT JOIN apicultor a ON mt.id_apicultor = a.id_apicultor
-            WHERE mt.id_tambor NOT IN (
-                SELECT DISTINCT id_tambor FROM compone_pool
+            WHERE NOT EXISTS (
+                SELECT 1 FROM compone_pool cp WHERE cp.id_tambor = mt.id_tambor
             )
             ORDER BY mt.num_registro
         """
         return self.execute_custom_query(query) or []
     
+    def get_tambores_disponibles_page(self, id_apicultor: int = None, fecha_desde: str = None,
+                                      fecha_hasta: str = None, busqueda: str = None,
+                                      after: Optional[Tuple] = None, page_size: int = None) -> Dict[str, Any]:
+        """
+        Obtener una página de tambores disponibles (sin pool), con filtros
+        
+        Los nombres de los apicultores se completan desde el caché de catálogos,
+        por lo que la consulta no necesita el join con apicultor.
+        
+        Args:
+            id_apicultor: Solo tambores de este apicultor
+            fecha_desde: Fecha de extracción mínima
+            fecha_hasta: Fecha de extracción máxima
+            busqueda: Texto a buscar en el número de registro
+            after: Cursor (num_registro, id_tambor) de la página anterior
+            page_size: Tambores por página
+        
+        Returns:
+            Resultado de get_page; cada fila incluye apicultor_nombre y apicultor_apellido
+        """
+        condiciones = [
+            "NOT EXISTS (SELECT 1 FROM compone_pool cp WHERE cp.id_tambor = muestra_tambor.id_tambor)"
+        ]
+        params = []
+        
+        if id_apicultor is not None:
+            condiciones.append("id_apicultor = %s")
+            params.append(id_apicultor)
+        if fecha_desde:
+            condiciones.append("fecha_extraccion >= %s")
+            params.append(fecha_desde)
+        if fecha_hasta:
+            condiciones.append("fecha_extraccion <= %s")
+            params.append(fecha_hasta)
+        if busqueda and busqueda.strip():
+            condiciones.append("num_registro ILIKE %s")
+            params.append(f"%{escapar_like(busqueda.strip())}%")
+        
+        pagina = self.get_page(self.table_name, ['num_registro', 'id_tambor'], after=after,
+                               page_size=page_size,
+                               columns=['id_tambor', 'id_apicultor', 'num_registro', 'fecha_extraccion'],
+                               where=' AND '.join(condiciones), params=tuple(params),
+                               null_keys=self.CLAVES_NULAS_PAGINA)
+        
+        catalog_cache = get_catalog_cache()
+        for tambor in pagina['rows']:
+            apicultor = catalog_cache.get_by_id('apicultor', tambor['id_apicultor']) or {}
+            tambor['apicultor_nombre'] = apicultor.get('nombre', '')
+            tambor['apicultor_apellido'] = apicultor.get('apellido', '')
+        
+        return pagina
+    
     def get_tambores_by_apicultor(self, apicultor_id: int) -> List[Dict[str, Any]]:
         """Obtener tambores de un apicultor específico"""
-        query = """
-            SELECT mt.*, a.nombre as apicultor_nombre, a.apellido as apicultor_apellido
-            FROM muestra_tambor mt
-            LEFT JOIN apicultor a ON mt.id_apicultor = a.id_apicultor
-            WHERE mt.id_apicultor = %s
-            ORDER BY mt.num_registro
-        """
-        return self.execute_custom_query(query, (apicultor_id,)) or []
+        return self.execute_named_query('tambores_por_apicultor', (apicultor_id,)) or []
+    
+    def get_tambores_by_apicultor_df(self, apicultor_id: int) -> Optional[pd.DataFrame]:
+        """Obtener tambores de un apicultor específico como DataFrame"""
+        return self.execute_named_query_df('tambores_por_apicultor', (apicultor_id,))
     
     def get_tambores_in_pool(self, pool_id: int) -> List[Dict[str, Any]]:
         """Obtener tambores que componen un pool específico"""
-        query = """
-            SELECT mt.*, a.nombre as apicultor_nombre, a.apellido as apicultor_apellido
-            FROM muestra_tambor mt
-            LEFT JOIN apicultor a ON mt.id_apicultor = a.id_apicultor
-            INNER JOIN compone_pool cp ON mt.id_tambor = cp.id_tambor
-            WHERE cp.id_pool = %s
-            ORDER BY mt.num_registro
-        """
-        return self.execute_custom_query(query, (pool_id,)) or [] 
\ No newline at end of file
+        return self.execute_named_query('tambores_en_pool', (pool_id,)) or []
+    
+    def get_tambores_in_pool_df(self, pool_id: int) -> Optional[pd.DataFrame]:
+        """Obtener tambores que componen un pool específico como DataFrame"""
+        return self.execute_named_query_df('tambores_en_pool', (pool_id,)) 
\ No newline at end of file
@@ -1,10 +1,69 @@
+import psycopg2.errors
+import streamlit as st
 from models.base_model import BaseModel
-from typing import List, Dict, Any, Optional
+from utils.busqueda import escapar_like
+from typing import List, Dict, Any, Optional, Tuple
+import pandas as pd
 from datetime import datetime
 
 class Pool(BaseModel):
     """Modelo para la tabla pool"""
     
+    # Consultas fijas con nombre: se preparan una vez por conexión (ver config/prepared_statements.py)
+    CONSULTAS = {
+        'pool_con_detalles': """
+            SELECT p.*, a.nombres as analista_nombres, a.apellidos as analista_apellidos,
+                   COUNT(cp.id_tambor) as total_tambores
+            FROM pool p
+            LEFT JOIN analista a ON p.id_analista = a.id_analista
+            LEFT JOIN compone_pool cp ON p.id_pool = cp.id_pool
+            WHERE p.id_pool = %s
+            GROUP BY p.id_pool, p.id_analista, p.fecha_analisis, p.num_registro, p.observaciones,
+                     a.nombres, a.apellidos
+        """,
+        'pools_con_detalles': """
+            SELECT p.*, a.nombres as analista_nombres, a.apellidos as analista_apellidos,
+                   COUNT(cp.id_tambor) as total_tambores
+            FROM pool p
+            LEFT JOIN analista a ON p.id_analista = a.id_analista
+            LEFT JOIN compone_pool cp ON p.id_pool = cp.id_pool
+            WHERE p.id_pool = ANY(%s)
+            GROUP BY p.id_pool, p.id_analista, p.fecha_analisis, p.num_registro, p.observaciones,
+                     a.nombres, a.apellidos
+        """,
+        'pools_por_analista': """
+            SELECT p.*, COUNT(cp.id_tambor) as total_tambores
+            FROM pool p
+            LEFT JOIN compone_pool cp ON p.id_pool = cp.id_pool
+            WHERE p.id_analista = %s
+            GROUP BY p.id_pool, p.id_analista, p.fecha_analisis, p.num_registro, p.observaciones
+            ORDER BY p.fecha_analisis DESC
+        """,
+        'pools_por_rango_fechas': """
+            SELECT p.*, a.nombres as analista_nombres, a.apellidos as analista_apellidos,
+                   COUNT(cp.id_tambor) as total_tambores
+            FROM pool p
+            LEFT JOIN analista a ON p.id_analista = a.id_analista
+            LEFT JOIN compone_pool cp ON p.id_pool = cp.id_pool
+            WHERE p.fecha_analisis BETWEEN %s AND %s
+            GROUP BY p.id_pool, p.id_analista, p.fecha_analisis, p.num_registro, p.observaciones,
+                     a.nombres, a.apellidos
+            ORDER BY p.fecha_analisis DESC
+        """,
+        'pools_por_apicultor': """
+            SELECT DISTINCT p.*, a.nombres as analista_nombres, a.apellidos as analista_apellidos
+            FROM pool p
+            LEFT JOIN analista a ON p.id_analista = a.id_analista
+            LEFT JOIN compone_pool cp ON p.id_pool = cp.id_pool
+            LEFT JOIN muestra_tambor mt ON cp.id_tambor = mt.id_tambor
+            WHERE mt.id_apicultor = %s
+            ORDER BY p.fecha_analisis DESC
+        """,
+    }
+    
+    # Orden de los pools sin fecha en la paginación (ver idx_pool_pagina en 0008)
+    CLAVES_NULAS_PAGINA = {'fecha_analisis': "'-infinity'::date"}
+    
     def __init__(self):
         super().__init__()
         self.table_name = "pool"
@@ -13,6 +72,17 @@ class Pool(BaseModel):
         """Obtener todos los pools ordenados por fecha de análisis"""
         return self.get_all(self.table_name, "fecha_analisis DESC")
     
+    def get_pools_page(self, after: Optional[Tuple] = None, page_size: int = None,
+                       columns: List[str] = None) -> Dict[str, Any]:
+        """
+        Obtener una página de pools, del más reciente al más antiguo (cursor: fecha_analisis, id_pool)
+        
+        Los pools sin fecha de análisis van al final.
+        """
+        return self.get_page(self.table_name, ['fecha_analisis', 'id_pool'], after=after,
+                             page_size=page_size, columns=columns, descending=True,
+                             null_keys=self.CLAVES_NULAS_PAGINA)
+    
     def get_pool_by_id(self, pool_id: int) -> Optional[Dict[str, Any]]:
         """Obtener pool por ID"""
         return self.get_by_id(self.table_name, "id_pool", pool_id)
@@ -28,6 +98,86 @@ class Pool(BaseModel):
         
         return self.insert(self.table_name, data)
     
+    def create_pool_with_tambores(self, id_analista: int, fecha_analisis: str, tambores_ids: List[int],
+                                  num_registro: str = None, observaciones: str = None) -> Dict[str, Any]:
+        """
+        Crear un pool con todos sus tambores en una única sentencia (atómica)
+        
+        El pool y las filas de compone_pool se insertan juntos con un INSERT
+        multi-fila; si algún tambor ya pertenece a otro pool o no existe, no se
+        inserta nada. Si otra transacción asocia uno de los tambores entre la
+        verificación y el INSERT, el índice único de compone_pool(id_tambor)
+        rechaza la sentencia y el tambor se informa en 'ocupados'.
+        
+        Returns:
+            Diccionario con 'id_pool' (None si no se creó), 'tambores_agregados',
+            'ocupados' (IDs ya asignados a otro pool) e 'inexistentes'
+        """
+        query = """
+            WITH solicitados AS (
+                SELECT DISTINCT unnest(%(tambores)s::integer[]) AS id_tambor
+            ),
+            ocupados AS (
+                SELECT DISTINCT cp.id_tambor
+                FROM compone_pool cp
+                INNER JOIN solicitados s ON s.id_tambor = cp.id_tambor
+            ),
+            inexistentes AS (
+                SELECT s.id_tambor
+                FROM solicitados s
+                WHERE NOT EXISTS (SELECT 1 FROM muestra_tambor mt WHERE mt.id_tambor = s.id_tambor)
+            ),
+            nuevo_pool AS (
+                INSERT INTO pool (id_analista, fecha_analisis, num_registro, observaciones)
+                SELECT %(id_analista)s, %(fecha_analisis)s, %(num_registro)s, %(observaciones)s
+                WHERE NOT EXISTS (SELECT 1 FROM ocupados)
+                  AND NOT EXISTS (SELECT 1 FROM inexistentes)
+                RETURNING id_pool
+            ),
+            nuevos_tambores AS (
+                INSERT INTO compone_pool (id_pool, id_tambor, fecha_asociacion)
+                SELECT np.id_pool, s.id_tambor, %(fecha_asociacion)s
+                FROM nuevo_pool np
+                CROSS JOIN solicitados s
+                RETURNING id_tambor
+            )
+            SELECT (SELECT id_pool FROM nuevo_pool) AS id_pool,
+                   (SELECT COUNT(*) FROM nuevos_tambores) AS tambores_agregados,
+                   ARRAY(SELECT id_tambor FROM ocupados ORDER BY id_tambor) AS ocupados,
+                   ARRAY(SELECT id_tambor FROM inexistentes ORDER BY id_tambor) AS inexistentes
+        """
+        params = {
+            'tambores': list(tambores_ids),
+            'id_analista': id_analista,
+            'fecha_analisis': fecha_analisis,
+            'num_registro': num_registro,
+            'observaciones': observaciones,
+            'fecha_asociacion': datetime.now().strftime("%Y-%m-%d")
+        }
+        sin_crear = {'id_pool': None, 'tambores_agregados': 0, 'ocupados': [], 'inexistentes': []}
+        try:
+            # Dentro de una transacción los errores se propagan en lugar de mostrarse
+            with self.transaction():
+                result = self.execute_custom_query(query, params)
+                if result and result[0]['id_pool'] is not None:
+                    self._adjust_count(self.table_name, 1)
+                    self._adjust_count('compone_pool', result[0]['tambores_agregados'])
+        except psycopg2.errors.UniqueViolation:
+            return {**sin_crear, 'ocupados': self._tambores_ocupados(tambores_ids)}
+        except Exception as e:
+            st.error(f"Error al crear el pool: {str(e)}")
+            return sin_crear
+        
+        if not result:
+            return sin_crear
+        
+        return {
+            'id_pool': result[0]['id_pool'],
+            'tambores_agregados': result[0]['tambores_agregados'],
+            'ocupados': list(result[0]['ocupados'] or []),
+            'inexistentes': list(result[0]['inexistentes'] or [])
+        }
+    
     def update_pool(self, pool_id: int, **kwargs) -> bool:
         """Actualizar datos de un pool"""
         return self.update(self.table_name, "id_pool", pool_id, kwargs)
@@ -37,69 +187,131 @@ class Pool(BaseModel):
         return self.delete(self.table_name, "id_pool", pool_id)
     
     def add_tambor_to_pool(self, pool_id: int, tambor_id: int) -> bool:
-        """Agregar un tambor al pool"""
+        """Agregar un tambor al pool (False si ya pertenece a un pool)"""
         query = "INSERT INTO compone_pool (id_pool, id_tambor, fecha_asociacion) VALUES (%s, %s, %s)"
         fecha_actual = datetime.now().strftime("%Y-%m-%d")
-        result = self.execute_custom_query(query, (pool_id, tambor_id, fecha_actual), fetch=False)
+        try:
+            with self.transaction():
+                result = self.execute_custom_query(query, (pool_id, tambor_id, fecha_actual), fetch=False)
+                if result:
+                    self._adjust_count('compone_pool', result)
+        except psycopg2.errors.UniqueViolation:
+            st.error(f"El tambor #{tambor_id} ya pertenece a otro pool")
+            return False
+        except Exception as e:
+            st.error(f"Error al agregar el tambor al pool: {str(e)}")
+            return False
         return result is not None and result > 0
     
+    def _tambores_ocupados(self, tambores_ids: List[int]) -> List[int]:
+        """IDs de los tambores dados que ya pertenecen a algún pool"""
+        query = """
+            SELECT DISTINCT id_tambor
+            FROM compone_pool
+            WHERE id_tambor = ANY(%s)
+            ORDER BY id_tambor
+        """
+        result = self.execute_custom_query(query, (list(tambores_ids),))
+        return [fila['id_tambor'] for fila in result or []]
+    
     def remove_tambor_from_pool(self, pool_id: int, tambor_id: int) -> bool:
         """Remover un tambor del pool"""
         query = "DELETE FROM compone_pool WHERE id_pool = %s AND id_tambor = %s"
         result = self.execute_custom_query(query, (pool_id, tambor_id), fetch=False)
+        if result:
+            self._adjust_count('compone_pool', -result)
         return result is not None and result > 0
     
     def get_pool_with_details(self, pool_id: int) -> Optional[Dict[str, Any]]:
         """Obtener pool con detalles del analista y tambores"""
-        query = """
-            SELECT p.*, a.nombres as analista_nombres, a.apellidos as analista_apellidos,
-                   COUNT(cp.id_tambor) as total_tambores
+        result = self.execute_named_query('pool_con_detalles', (pool_id,))
+        return result[0] if result else None
+    
+    async def get_pool_with_details_async(self, pool_id: int) -> Optional[Dict[str, Any]]:
+        """Obtener pool con detalles del analista y tambores (asíncrono)"""
+        result = await self.execute_named_query_async('pool_con_detalles', (pool_id,))
+        return result[0] if result else None
+    
+    def get_pools_with_details_bulk(self, pool_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Obtener varios pools con detalles del analista y tambores en una sola consulta
+        
+        Returns:
+            Diccionario id_pool -> pool (misma estructura que get_pool_with_details).
+            Los pools inexistentes no se incluyen.
+        """
+        pool_ids = list(dict.fromkeys(pool_ids))
+        if not pool_ids:
+            return {}
+        result = self.execute_named_query('pools_con_detalles', (pool_ids,)) or []
+        return {pool['id_pool']: pool for pool in result}
+    
+    def get_pools_listado(self, busqueda: str = None, solo_sin_analisis: bool = False,
+                          limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Listar pools con nombre del analista, cantidad de tambores y estado del análisis
+        
+        Todo se resuelve en una sola consulta, ordenada del pool más reciente al más antiguo.
+        
+        Args:
+            busqueda: Texto a buscar en el ID del pool, número de registro o nombre del analista
+            solo_sin_analisis: Si es True, devuelve solo pools que aún no tienen análisis cargado
+            limit: Cantidad máxima de pools a devolver
+            offset: Cantidad de pools a saltear (paginación)
+        
+        Returns:
+            Lista de pools con analista_nombres, analista_apellidos, total_tambores y tiene_analisis
+        """
+        condiciones = []
+        params = []
+        
+        if busqueda:
+            patron = f"%{escapar_like(busqueda.strip().lstrip('#'))}%"
+            condiciones.append("""(
+                CAST(p.id_pool AS TEXT) LIKE %s
+                OR p.num_registro ILIKE %s
+                OR (a.nombres || ' ' || a.apellidos) ILIKE %s
+            )""")
+            params.extend([patron, patron, patron])
+        
+        if solo_sin_analisis:
+            condiciones.append("NOT EXISTS (SELECT 1 FROM analisis_palinologico ap WHERE ap.id_pool = p.id_pool)")
+        
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        query = f"""
+            SELECT p.id_pool, p.id_analista, p.fecha_analisis, p.num_registro, p.observaciones,
+                   a.nombres as analista_nombres, a.apellidos as analista_apellidos,
+                   (SELECT COUNT(*) FROM compone_pool cp WHERE cp.id_pool = p.id_pool) as total_tambores,
+                   EXISTS (SELECT 1 FROM analisis_palinologico ap WHERE ap.id_pool = p.id_pool) as tiene_analisis
             FROM pool p
             LEFT JOIN analista a ON p.id_analista = a.id_analista
-            LEFT JOIN compone_pool cp ON p.id_pool = cp.id_pool
-            WHERE p.id_pool = %s
-            GROUP BY p.id_pool, p.id_analista, p.fecha_analisis, p.num_registro, p.observaciones,
-                     a.nombres, a.apellidos
+            {where}
+            ORDER BY COALESCE(p.fecha_analisis, '-infinity'::date) DESC, p.id_pool DESC
+            LIMIT %s OFFSET %s
         """
-        result = self.execute_custom_query(query, (pool_id,))
-        return result[0] if result else None
+        params.extend([limit, offset])
+        return self.execute_custom_query(query, tuple(params)) or []
     
     def get_pools_by_analista(self, analista_id: int) -> List[Dict[str, Any]]:
         """Obtener pools de un analista específico"""
-        query = """
-            SELECT p.*, COUNT(cp.id_tambor) as total_tambores
-            FROM pool p
-            LEFT JOIN compone_pool cp ON p.id_pool = cp.id_pool
-            WHERE p.id_analista = %s
-            GROUP BY p.id_pool, p.id_analista, p.fecha_analisis, p.num_registro, p.observaciones
-            ORDER BY p.fecha_analisis DESC
-        """
-        return self.execute_custom_query(query, (analista_id,)) or []
+        return self.execute_named_query('pools_por_analista', (analista_id,)) or []
+    
+    def get_pools_by_analista_df(self, analista_id: int) -> Optional[pd.DataFrame]:
+        """Obtener pools de un analista específico como DataFrame"""
+        return self.execute_named_query_df('pools_por_analista', (analista_id,))
     
     def get_pools_by_date_range(self, fecha_inicio: str, fecha_fin: str) -> List[Dict[str, Any]]:
         """Obtener pools en un rango de fechas"""
-        query = """
-            SELECT p.*, a.nombres as analista_nombres, a.apellidos as analista_apellidos,
-                   COUNT(cp.id_tambor) as total_tambores
-            FROM pool p
-            LEFT JOIN analista a ON p.id_analista = a.id_analista
-            LEFT JOIN compone_pool cp ON p.id_pool = cp.id_pool
-            WHERE p.fecha_analisis BETWEEN %s AND %s
-            GROUP BY p.id_pool, p.id_analista, p.fecha_analisis, p.num_registro, p.observaciones,
-                     a.nombres, a.apellidos
-            ORDER BY p.fecha_analisis DESC
-        """
-        return self.execute_custom_query(query, (fecha_inicio, fecha_fin)) or []
+        return self.execute_named_query('pools_por_rango_fechas', (fecha_inicio, fecha_fin)) or []
+    
+    def get_pools_by_date_range_df(self, fecha_inicio: str, fecha_fin: str) -> Optional[pd.DataFrame]:
+        """Obtener pools en un rango de fechas como DataFrame"""
+        return self.execute_named_query_df('pools_por_rango_fechas', (fecha_inicio, fecha_fin))
+    
+    async def get_pools_by_date_range_async(self, fecha_inicio: str, fecha_fin: str) -> List[Dict[str, Any]]:
+        """Obtener pools en un rango de fechas (asíncrono)"""
+        return await self.execute_named_query_async('pools_por_rango_fechas', (fecha_inicio, fecha_fin)) or []
     
     def get_pools_by_apicultor(self, apicultor_id: int) -> List[Dict[str, Any]]:
         """Obtener pools de un apicultor específico"""
-        query = """
-            SELECT DISTINCT p.*, a.nombres as analista_nombres, a.apellidos as analista_apellidos
-            FROM pool p
-            LEFT JOIN analista a ON p.id_analista = a.id_analista
-            LEFT JOIN compone_pool cp ON p.id_pool = cp.id_pool
-            LEFT JOIN muestra_tambor mt ON cp.id_tambor = mt.id_tambor
-            WHERE mt.id_apicultor = %s
-            ORDER BY p.fecha_analisis DESC
-        """
-        return self.execute_custom_query(query, (apicultor_id,)) or [] 
\ No newline at end of file
+        return self.execute_named_query('pools_por_apicultor', (apicultor_id,)) or [] 
\ No newline at end of file
@@ -0,0 +1,120 @@
+import time
+from typing import Any, Dict, List, Optional, Sequence
+import streamlit as st
+from config.database import get_db
+from models.catalog_cache import get_catalog_cache
+from utils.busqueda import IndiceNgramas, escapar_like, normalizar_texto
+
+# Segundos entre verificaciones de si pg_trgm/unaccent están instalados
+_VERIFICACION_TTL = 300
+
+_CONSULTA_DISPONIBLE = """
+    SELECT to_regprocedure('f_unaccent(text)') IS NOT NULL
+       AND EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') AS disponible
+"""
+
+
+class _Busqueda:
+    """Definición de una tabla con búsqueda por texto"""
+    __slots__ = ('table_name', 'campos', 'documento_sql')
+
+    def __init__(self, table_name: str, campos: Sequence[str]):
+        self.table_name = table_name
+        self.campos = list(campos)
+        # Debe coincidir exactamente con la expresión del índice GIN (migración 0005)
+        concatenado = " || ' ' || ".join(f"coalesce({c}, '')" for c in campos)
+        self.documento_sql = f"f_unaccent(lower({concatenado}))"
+
+
+BUSQUEDAS = {
+    'especies': _Busqueda('especies', ['nombre_comun', 'nombre_cientifico']),
+    'apicultor': _Busqueda('apicultor', ['nombre', 'apellido']),
+}
+
+
+class TextSearch:
+    """
+    Búsqueda por subcadena con ranking de relevancia para especies y apicultores
+
+    Con pg_trgm y unaccent instalados, la búsqueda se resuelve en la base
+    con los índices GIN de trigramas: coincidencias por prefijo primero,
+    luego por subcadena y por último por parecido (word_similarity), sin
+    distinguir mayúsculas ni acentos. Sin las extensiones se usa un índice
+    de trigramas en memoria construido sobre el caché de catálogos.
+    """
+
+    def __init__(self):
+        self.db = get_db()
+        self._disponible: Optional[bool] = None
+        self._verificado_en = 0.0
+
+    def trigram_disponible(self) -> bool:
+        """Indicar si la base tiene pg_trgm y f_unaccent (se verifica periódicamente)"""
+        if self._disponible is None or time.monotonic() - self._verificado_en > _VERIFICACION_TTL:
+            filas = self.db.execute_query(_CONSULTA_DISPONIBLE)
+            self._disponible = bool(filas and filas[0]['disponible'])
+            self._verificado_en = time.monotonic()
+        return self._disponible
+
+    def buscar(self, table_name: str, termino: str, limite: int = 20) -> List[Dict[str, Any]]:
+        """
+        Buscar registros de una tabla por texto
+
+        Args:
+            table_name: 'especies' o 'apicultor'
+            termino: Texto buscado
+            limite: Cantidad máxima de resultados
+
+        Returns:
+            Registros ordenados por relevancia, con la clave 'relevancia'
+        """
+        busqueda = BUSQUEDAS[table_name]
+        termino = (termino or '').strip()
+        if not termino:
+            return []
+
+        if self.trigram_disponible():
+            return self._buscar_trigram(busqueda, termino, limite)
+        return self._buscar_en_memoria(busqueda, termino, limite)
+
+    def _buscar_trigram(self, busqueda: _Busqueda, termino: str, limite: int) -> List[Dict[str, Any]]:
+        """Buscar en la base usando el índice GIN de trigramas"""
+        documento = busqueda.documento_sql
+        # Se normaliza en Python (equivalente a f_unaccent(lower())) para que los
+        # patrones lleguen como constantes y el planificador use el índice
+        termino = normalizar_texto(termino)
+        literal = escapar_like(termino)
+        query = f"""
+            SELECT t.*, word_similarity(%(termino)s, {documento}) AS relevancia
+            FROM {busqueda.table_name} t
+            WHERE {documento} LIKE %(contiene)s
+               OR %(termino)s <%% {documento}
+            ORDER BY ({documento} LIKE %(prefijo)s OR {documento} LIKE %(prefijo_palabra)s) DESC,
+                     ({documento} LIKE %(contiene)s) DESC,
+                     relevancia DESC,
+                     {documento}
+            LIMIT %(limite)s
+        """
+        params = {
+            'termino': termino,
+            'contiene': f"%{literal}%",
+            'prefijo': f"{literal}%",
+            'prefijo_palabra': f"% {literal}%",
+            'limite': limite,
+        }
+        return self.db.execute_query(query, params) or []
+
+    def _buscar_en_memoria(self, busqueda: _Busqueda, termino: str, limite: int) -> List[Dict[str, Any]]:
+        """Buscar con el índice de trigramas en memoria sobre el catálogo cacheado"""
+        # El índice se reconstruye solo cuando el caché de catálogos recarga la tabla
+        indice = get_catalog_cache().get_derived(
+            busqueda.table_name, 'indice_ngramas',
+            lambda registros: IndiceNgramas(registros, busqueda.campos)
+        )
+        return indice.buscar(normalizar_texto(termino), limite)
+
+
+@st.cache_resource
+def get_text_search() -> TextSearch:
+    """Obtener la instancia compartida de búsqueda por texto"""
+    return TextSearch()
@@ -6,8 +6,11 @@ from models.especie import Especie
 from models.analisis_palinologico import AnalisisPalinologico
 from components.contador_especies import ContadorEspecies
 from components.pool_manager import PoolManager
+from components.paginador import Paginador
+from components.selector_busqueda import SelectorBusqueda
 from utils.calculators import validar_analisis, calcular_estadisticas_analisis
 from utils.formatters import formatear_resumen_analisis, formatear_estadisticas, formatear_fecha_simple
+from config.settings import PAGINATION_CONFIG
 
 # Configurar página
 st.set_page_config(
@@ -56,34 +59,56 @@ elif opcion == "Realizar Análisis":
     # Paso 1: Seleccionar pool
     st.subheader("📋 Paso 1: Seleccionar Pool")
     
-    # Obtener pools disponibles con manejo de errores
+    # Búsqueda de pools
+    col_busqueda, col_filtro = st.columns([3, 1])
+    
+    with col_busqueda:
+        busqueda_pool = st.text_input(
+            "Buscar pool:",
+            placeholder="ID, número de registro o analista",
+            help="Filtra los pools por ID, número de registro o nombre del analista"
+        )
+    
+    with col_filtro:
+        solo_sin_analisis = st.checkbox("Solo pools sin análisis", value=False)
+    
+    # Obtener pools (con analista, tambores y estado en una sola consulta) con manejo de errores
+    limite_pools = PAGINATION_CONFIG['pool_selector_limit']
     try:
-        pools = pool_model.get_all_pools()
+        pools = pool_model.get_pools_listado(
+            busqueda=busqueda_pool or None,
+            solo_sin_analisis=solo_sin_analisis,
+            limit=limite_pools + 1
+        )
         
         if not pools:
-            st.error("No hay pools disponibles. Por favor, cree un pool primero.")
+            if busqueda_pool or solo_sin_analisis:
+                st.warning("No se encontraron pools con los criterios de búsqueda.")
+            else:
+                st.error("No hay pools disponibles. Por favor, cree un pool primero.")
             st.stop()
     except Exception as e:
         st.error(f"Error al cargar pools: {str(e)}")
         st.stop()
     
+    if len(pools) > limite_pools:
+        pools = pools[:limite_pools]
+        st.caption(f"Mostrando los {limite_pools} pools más recientes. Use la búsqueda para encontrar pools anteriores.")
+    
     # Crear opciones para el selector
     opciones_pools = []
     pools_dict = {}
     
     for pool in pools:
-        # Obtener información del analista
         analista_nombre = "N/A"
-        if pool.get('id_analista'):
-            from models.analista import Analista
-            analista_model = Analista()
-            analista = analista_model.get_analista_by_id(pool['id_analista'])
-            if analista:
-                analista_nombre = f"{analista['nombres']} {analista['apellidos']}"
+        if pool.get('analista_nombres'):
+            analista_nombre = f"{pool['analista_nombres']} {pool['analista_apellidos']}"
         
-        opcion = f"Pool #{pool['id_pool']} - {analista_nombre} - {formatear_fecha_simple(pool['fecha_analisis'])}"
+        estado = "✅ Analizado" if pool['tiene_analisis'] else "⏳ Pendiente"
+        opcion = (f"Pool #{pool['id_pool']} - {analista_nombre} - {formatear_fecha_simple(pool['fecha_analisis'])}"
+                  f" - {pool['total_tambores']} tambores - {estado}")
         opciones_pools.append(opcion)
-        pools_dict[opcion] = pool['id_pool']
+        pools_dict[opcion] = pool
     
     # Selector de pool
     pool_seleccionado = st.selectbox(
@@ -95,10 +120,10 @@ elif opcion == "Realizar Análisis":
     if not pool_seleccionado:
         st.stop()
     
-    pool_id = pools_dict[pool_seleccionado]
+    pool_info = pools_dict[pool_seleccionado]
+    pool_id = pool_info['id_pool']
     
     # Mostrar información del pool seleccionado
-    pool_info = pool_model.get_pool_with_details(pool_id)
     if pool_info:
         st.info(f"**Pool seleccionado:** #{pool_info['id_pool']} - Analista: {pool_info['analista_nombres']} {pool_info['analista_apellidos']} - Fecha: {formatear_fecha_simple(pool_info['fecha_analisis'])}")
     
@@ -107,35 +132,34 @@ elif opcion == "Realizar Análisis":
     # Paso 2: Seleccionar especies
     st.subheader("🌿 Paso 2: Seleccionar Especies")
     
-    # Obtener especies disponibles con manejo de errores
+    # Obtener especies disponibles (desde el caché de catálogos) con manejo de errores
     try:
-        especies = especie_model.get_all_especies()
+        opciones_especies = especie_model.get_opciones_especies()
         
-        if not especies:
+        if not opciones_especies:
             st.error("No hay especies disponibles. Por favor, agregue especies primero.")
             st.stop()
     except Exception as e:
         st.error(f"Error al cargar especies: {str(e)}")
         st.stop()
     
-    # Crear opciones para el multiselector
-    opciones_especies = []
-    especies_dict = {}
-    
-    for especie in especies:
-        opcion = f"{especie['nombre_comun']} ({especie['nombre_cientifico']})"
-        opciones_especies.append(opcion)
-        especies_dict[opcion] = especie
-    
-    # Multiselector de especies
-    especies_seleccionadas_opciones = st.multiselect(
+    # Multiselector de especies con búsqueda (sin distinguir acentos, por relevancia)
+    selector_especies = SelectorBusqueda(
+        "especies_analisis",
+        buscar=especie_model.buscar_opciones_especies,
+        todas=lambda: opciones_especies
+    )
+    selector_especies.render_multiselect(
         "Seleccione las especies a analizar:",
-        options=opciones_especies,
-        help="Puede seleccionar múltiples especies para el análisis"
+        help="Escriba parte del nombre común o científico para filtrar. Puede seleccionar múltiples especies.",
+        placeholder="Ej: eucalipto, trebol, Prosopis..."
     )
     
-    # Obtener datos de especies seleccionadas
-    especies_seleccionadas = [especies_dict[opcion] for opcion in especies_seleccionadas_opciones]
+    # Obtener datos de especies seleccionadas por ID (las eliminadas mientras tanto se omiten)
+    especies_ids = selector_especies.seleccion_ids()
+    especies_seleccionadas = especie_model.get_especies_by_ids(especies_ids)
+    if len(especies_seleccionadas) < len(especies_ids):
+        st.warning("Algunas especies seleccionadas ya no existen y se omitieron.")
     
     if not especies_seleccionadas:
         st.info("Seleccione al menos una especie para continuar.")
@@ -185,14 +209,21 @@ elif opcion == "Realizar Análisis":
                     especies_con_granos = [esp for esp in especies_data if esp.get('cantidad_granos', 0) > 0]
                     
                     if especies_con_granos:
-                        # Guardar análisis
-                        success = analisis_model.save_analisis_completo(pool_id, especies_con_granos)
+                        # Guardar análisis y leer el resumen en una sola transacción
+                        analisis_completo = None
+                        try:
+                            with analisis_model.transaction():
+                                success = analisis_model.save_analisis_completo(pool_id, especies_con_granos)
+                                if success:
+                                    analisis_completo = analisis_model.get_analisis_completo(pool_id)
+                        except Exception as e:
+                            success = False
+                            st.error(f"❌ Error al guardar el análisis: {str(e)}")
                         
                         if success:
                             st.success("✅ Análisis guardado exitosamente!")
                             
                             # Mostrar resumen final
-                            analisis_completo = analisis_model.get_analisis_completo(pool_id)
                             if analisis_completo:
                                 st.markdown("### 📊 Resumen Final del Análisis")
                                 st.markdown(formatear_resumen_analisis(analisis_completo))
@@ -210,6 +241,7 @@ elif opcion == "Realizar Análisis":
                             # Limpiar selección de especies
                             if 'especies_seleccionadas' in st.session_state:
                                 del st.session_state['especies_seleccionadas']
+                            selector_especies.limpiar()
                             
                             st.rerun()
                         else:
@@ -259,38 +291,26 @@ elif opcion == "Ver Análisis Existentes":
     
     # Usar st.cache_data para evitar recargas innecesarias
     @st.cache_data(ttl=300)  # Cache por 5 minutos
-    def cargar_analisis_existentes():
+    def cargar_analisis_existentes(cursor, page_size):
         try:
-            analisis_completos = []
-            pools = pool_model.get_all_pools()
+            # Una página de pools por vez, del más reciente al más antiguo
+            pagina = pool_model.get_pools_page(after=cursor, page_size=page_size, columns=['id_pool'])
+            pool_ids = [pool['id_pool'] for pool in pagina['rows']]
             
-            for pool in pools:
-                try:
-                    analisis = analisis_model.get_analisis_completo(pool['id_pool'])
-                    if analisis:
-                        analisis_completos.append(analisis)
-                except Exception as e:
-                    st.session_state.error_count += 1
-                    if st.session_state.error_count <= 3:  # Limitar mensajes de error
-                        st.warning(f"Error al cargar análisis del pool {pool['id_pool']}: {str(e)}")
-                    continue
+            # Un número fijo de consultas para todos los pools de la página
+            analisis_por_pool = analisis_model.get_analisis_completo_bulk(pool_ids)
             
-            return analisis_completos
+            analisis = [analisis_por_pool[pool_id] for pool_id in pool_ids if pool_id in analisis_por_pool]
+            return analisis, pagina
         except Exception as e:
             st.error(f"Error al cargar análisis existentes: {str(e)}")
-            return []
+            return [], {'rows': [], 'next_cursor': None, 'has_more': False}
     
     # Cargar análisis con cache
-    analisis_completos = cargar_analisis_existentes()
-    
-    # Debug: Mostrar información de pools disponibles
-    try:
-        pools = pool_model.get_all_pools()
-        st.info(f"Pools disponibles en la base de datos: {len(pools)}")
-        for pool in pools:
-            st.write(f"- Pool #{pool['id_pool']} - Analista: {pool.get('id_analista', 'N/A')}")
-    except Exception as e:
-        st.warning(f"Error al obtener pools: {str(e)}")
+    paginador_pools = Paginador("analisis_existentes", page_size=20)
+    analisis_completos, pagina_pools = cargar_analisis_existentes(
+        paginador_pools.cursor_actual, paginador_pools.page_size
+    )
     
     if not analisis_completos:
         st.info("No hay análisis realizados aún.")
@@ -345,6 +365,9 @@ elif opcion == "Ver Análisis Existentes":
                 except Exception as e:
                     st.error(f"Error al mostrar análisis {i+1}: {str(e)}")
                     continue
+    
+    if pagina_pools['rows']:
+        paginador_pools.render_controles(pagina_pools)
 
 # Footer
 st.markdown("---")
@@ -2,15 +2,21 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import io
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from models.analisis_palinologico import AnalisisPalinologico
 from models.pool import Pool
 from models.analista import Analista
 from models.apicultor import Apicultor
-from utils.calculators import calcular_estadisticas_analisis
-from utils.formatters import formatear_fecha, crear_dataframe_analisis
+from components.selector_busqueda import SelectorBusqueda
+from config.async_database import get_async_db
+from utils.calculators import MatrizConteos
+from utils.diversidad import INDICES, indices_por_pool
+from utils.formatters import (
+    formatear_fecha, formatear_fechas, formatear_especies, formatear_nombres_completos,
+    crear_dataframe_analisis, configuracion_columnas
+)
+from utils.exporters import exportar_a_archivo_temporal, ExportacionTemporal
 
 # Configurar página
 st.set_page_config(
@@ -48,17 +54,17 @@ fecha_fin = st.sidebar.date_input(
 
 # Filtro por analista
 st.sidebar.subheader("👨‍🔬 Analista")
-analistas = analista_model.get_all_analistas()
-opciones_analistas = ["Todos los analistas"] + [f"{a['nombres']} {a['apellidos']}" for a in analistas]
+analistas_por_nombre = analista_model.get_opciones_analistas()
+opciones_analistas = ["Todos los analistas"] + list(analistas_por_nombre.keys())
 analista_seleccionado = st.sidebar.selectbox(
     "Seleccionar analista:",
     options=opciones_analistas,
     help="Filtrar por analista específico"
 )
 
-# Filtro por pool
+# Filtro por pool (solo pools del rango de fechas)
 st.sidebar.subheader("🛢️ Pool")
-pools = pool_model.get_all_pools()
+pools = pool_model.get_pools_by_date_range(fecha_inicio.strftime("%Y-%m-%d"), fecha_fin.strftime("%Y-%m-%d"))
 opciones_pools = ["Todos los pools"] + [f"Pool #{p['id_pool']}" for p in pools]
 pool_seleccionado = st.sidebar.selectbox(
     "Seleccionar pool:",
@@ -68,76 +74,58 @@ pool_seleccionado = st.sidebar.selectbox(
 
 # Filtro por apicultor
 st.sidebar.subheader("👨‍🌾 Apicultor")
-apicultores = apicultor_model.get_all_apicultores()
-opciones_apicultores = ["Todos los apicultores"] + [f"{a['nombre']} {a['apellido']}" for a in apicultores]
-apicultor_seleccionado = st.sidebar.selectbox(
+selector_apicultor = SelectorBusqueda(
+    "reporte_apicultor",
+    buscar=apicultor_model.buscar_opciones_apicultores,
+    todas=apicultor_model.get_opciones_apicultores
+)
+apicultor_id = selector_apicultor.render_selectbox(
     "Seleccionar apicultor:",
-    options=opciones_apicultores,
-    help="Filtrar por apicultor específico"
+    opcion_todos="Todos los apicultores",
+    help="Filtrar por apicultor específico; escriba parte del nombre para buscarlo",
+    contenedor=st.sidebar
 )
 
 # Botón para aplicar filtros
 aplicar_filtros = st.sidebar.button("🔍 Aplicar Filtros", type="primary")
 
+# Guardar los filtros aplicados para que el reporte se mantenga entre interacciones
+# (por ejemplo, al generar una exportación)
+if aplicar_filtros or 'filtros_reporte' not in st.session_state:
+    # Todos los filtros se resuelven en la base de datos
+    st.session_state['filtros_reporte'] = {
+        'fecha_inicio': fecha_inicio.strftime("%Y-%m-%d"),
+        'fecha_fin': fecha_fin.strftime("%Y-%m-%d"),
+        'analista_id': analistas_por_nombre.get(analista_seleccionado),
+        'pool_id': int(pool_seleccionado.split("#")[1]) if pool_seleccionado != "Todos los pools" else None,
+        'apicultor_id': apicultor_id,
+    }
+
 # Contenido principal
-if aplicar_filtros or 'filtros_aplicados' not in st.session_state:
-    st.session_state['filtros_aplicados'] = True
-    
-    # Aplicar filtros
-    fecha_inicio_str = fecha_inicio.strftime("%Y-%m-%d")
-    fecha_fin_str = fecha_fin.strftime("%Y-%m-%d")
-    
-    # Obtener análisis filtrados
-    analisis_filtrados = analisis_model.get_analisis_by_date_range(fecha_inicio_str, fecha_fin_str)
+if st.session_state.get('filtros_reporte'):
+    filtros_reporte = st.session_state['filtros_reporte']
     
-    # Debug: Mostrar información de los datos obtenidos
-    st.info(f"Análisis obtenidos por fecha: {len(analisis_filtrados)}")
-    if analisis_filtrados:
-        st.info(f"Primer análisis - Analista ID: {analisis_filtrados[0].get('analista_id')}, Nombre: {analisis_filtrados[0].get('analista_nombres')} {analisis_filtrados[0].get('analista_apellidos')}")
-    
-    # Aplicar filtros adicionales
-    if analista_seleccionado != "Todos los analistas":
-        analista_id = None
-        for analista in analistas:
-            if f"{analista['nombres']} {analista['apellidos']}" == analista_seleccionado:
-                analista_id = analista['id_analista']
-                break
-        
-        if analista_id:
-            # Debug: Mostrar información del filtro
-            st.info(f"Filtrando por analista: {analista_seleccionado} (ID: {analista_id})")
-            analisis_filtrados = [a for a in analisis_filtrados if a.get('analista_id') == analista_id]
-            st.info(f"Análisis encontrados después del filtro: {len(analisis_filtrados)}")
-    
-    if pool_seleccionado != "Todos los pools":
-        pool_id = int(pool_seleccionado.split("#")[1])
-        analisis_filtrados = [a for a in analisis_filtrados if a.get('id_pool') == pool_id]
-    
-    if apicultor_seleccionado != "Todos los apicultores":
-        apicultor_id = None
-        for apicultor in apicultores:
-            if f"{apicultor['nombre']} {apicultor['apellido']}" == apicultor_seleccionado:
-                apicultor_id = apicultor['id_apicultor']
-                break
-        
-        if apicultor_id:
-            # Filtrar por apicultor (necesitamos obtener los pools del apicultor)
-            pools_apicultor = pool_model.get_pools_by_apicultor(apicultor_id)
-            pool_ids = [p['id_pool'] for p in pools_apicultor]
-            analisis_filtrados = [a for a in analisis_filtrados if a.get('id_pool') in pool_ids]
+    # Agregados para métricas y gráficos (calculados en la base de datos) y filas de
+    # detalle: son independientes, por lo que se consultan a la vez. Las filas de
+    # detalle llegan por columnas y se convierten a DataFrame sin copiarlas
+    agregados, reporte = get_async_db().gather(
+        analisis_model.get_reporte_agregados_async(top_n=10, **filtros_reporte),
+        analisis_model.get_reporte_async(columnar=True, **filtros_reporte)
+    )
+    metricas = agregados['metricas']
     
     # Mostrar resultados
     st.header("📈 Resultados del Reporte")
     
-    if not analisis_filtrados:
+    if not metricas['total_analisis']:
         st.info("No se encontraron análisis con los filtros aplicados.")
     else:
         # Métricas generales
         st.subheader("📊 Métricas Generales")
         
-        total_analisis = len(set(a['id_pool'] for a in analisis_filtrados))
-        total_especies = len(set(a['id_especie'] for a in analisis_filtrados))
-        total_granos = sum(a.get('cantidad_granos', 0) for a in analisis_filtrados)
+        total_analisis = metricas['total_analisis']
+        total_especies = metricas['total_especies']
+        total_granos = metricas['total_granos']
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -162,20 +150,21 @@ if aplicar_filtros or 'filtros_aplicados' not in st.session_state:
         # Tabla de resumen
         st.subheader("📋 Tabla de Resumen")
         
-        # Crear DataFrame para mostrar
-        df_data = []
-        for analisis in analisis_filtrados:
-            df_data.append({
-                'Pool ID': analisis.get('id_pool'),
-                'Fecha': formatear_fecha(analisis.get('fecha_analisis', '')),
-                'Analista': f"{analisis.get('analista_nombres', '')} {analisis.get('analista_apellidos', '')}",
-                'Especie': f"{analisis.get('nombre_comun', '')} ({analisis.get('nombre_cientifico', '')})",
-                'Granos': analisis.get('cantidad_granos', 0),
-                'Porcentaje': f"{analisis.get('porcentaje', 0):.2f}%"
+        # Crear DataFrame para mostrar, columna por columna. Fecha, Granos y
+        # Porcentaje quedan tipados (se ordenan bien) y Streamlit les da formato
+        df_reporte = reporte.to_dataframe()
+        if reporte:
+            df = pd.DataFrame({
+                'Pool ID': df_reporte['id_pool'],
+                'Fecha': df_reporte['fecha_analisis'],
+                'Analista': formatear_nombres_completos(df_reporte['analista_nombres'], df_reporte['analista_apellidos']),
+                'Especie': formatear_especies(df_reporte['nombre_comun'], df_reporte['nombre_cientifico']),
+                'Granos': df_reporte['cantidad_granos'].fillna(0),
+                'Porcentaje': df_reporte['porcentaje'].fillna(0)
             })
-        
-        df = pd.DataFrame(df_data)
-        st.dataframe(df, use_container_width=True, hide_index=True)
+        else:
+            df = pd.DataFrame(columns=['Pool ID', 'Fecha', 'Analista', 'Especie', 'Granos', 'Porcentaje'])
+        st.dataframe(df, use_container_width=True, hide_index=True, column_config=configuracion_columnas())
         
         st.markdown("---")
         
@@ -183,14 +172,11 @@ if aplicar_filtros or 'filtros_aplicados' not in st.session_state:
         st.subheader("📊 Visualizaciones")
         
         # Gráfico 1: Distribución de especies
-        if analisis_filtrados:
-            # Agrupar por especie
-            especies_data = {}
-            for analisis in analisis_filtrados:
-                especie_key = f"{analisis.get('nombre_comun', '')} ({analisis.get('nombre_cientifico', '')})"
-                if especie_key not in especies_data:
-                    especies_data[especie_key] = 0
-                especies_data[especie_key] += analisis.get('cantidad_granos', 0)
+        if agregados['por_especie']:
+            especies_data = {
+                f"{esp['nombre_comun']} ({esp['nombre_cientifico']})": esp['total_granos']
+                for esp in agregados['por_especie']
+            }
             
             # Crear gráfico de pastel
             if especies_data:
@@ -203,14 +189,8 @@ if aplicar_filtros or 'filtros_aplicados' not in st.session_state:
                 st.plotly_chart(fig_pie, use_container_width=True)
         
         # Gráfico 2: Análisis por fecha MEJORAR EL GRAFICO PARA QUE SE MUESTRE EN X FECHAS  EN Y ESPECIES Y EN EL CENTRO PUNTOS O SEGMENTOS DE CANTIDADES DE GRANOS
-        if analisis_filtrados:
-            # Agrupar por fecha
-            fechas_data = {}
-            for analisis in analisis_filtrados:
-                fecha = analisis.get('fecha_analisis', '')
-                if fecha not in fechas_data:
-                    fechas_data[fecha] = 0
-                fechas_data[fecha] += analisis.get('cantidad_granos', 0)
+        if agregados['por_fecha']:
+            fechas_data = {f['fecha_analisis']: f['total_granos'] for f in agregados['por_fecha']}
             
             if fechas_data:
                 fig_line = px.line(
@@ -222,17 +202,12 @@ if aplicar_filtros or 'filtros_aplicados' not in st.session_state:
                 st.plotly_chart(fig_line, use_container_width=True)
         
         # Gráfico 3: Top 10 especies TENEMOS QUE CAMBIARLO PARA QUE SEA UN GRAFICO DE BARRAS APILADAS
-        if analisis_filtrados:
-            # Agrupar por especie y calcular totales
-            especies_totales = {}
-            for analisis in analisis_filtrados:
-                especie_key = f"{analisis.get('nombre_comun', '')} ({analisis.get('nombre_cientifico', '')})"
-                if especie_key not in especies_totales:
-                    especies_totales[especie_key] = 0
-                especies_totales[especie_key] += analisis.get('cantidad_granos', 0)
-            
-            # Obtener top 10
-            top_especies = sorted(especies_totales.items(), key=lambda x: x[1], reverse=True)[:10]
+        if agregados['top_especies']:
+            # Top 10 ya ordenado por la base de datos
+            top_especies = [
+                (f"{esp['nombre_comun']} ({esp['nombre_cientifico']})", esp['total_granos'])
+                for esp in agregados['top_especies']
+            ]
             
             if top_especies:
                 fig_bar = px.bar(
@@ -249,15 +224,19 @@ if aplicar_filtros or 'filtros_aplicados' not in st.session_state:
         # Análisis detallado por pool
         st.subheader("🔍 Análisis Detallado por Pool")
         
-        # Obtener pools únicos
-        pools_unicos = list(set(a['id_pool'] for a in analisis_filtrados))
+        # Matriz pools × especies: agrupa las filas por pool y calcula las
+        # estadísticas de todos los pools en una sola pasada
+        matriz_pools = MatrizConteos.desde_filas(reporte)
+        pools_unicos = matriz_pools.claves
+        estadisticas_pools = matriz_pools.estadisticas()
+        filas_por_pool = dict(tuple(df_reporte.groupby('id_pool', sort=False))) if reporte else {}
         
-        for pool_id in pools_unicos:
-            analisis_pool = [a for a in analisis_filtrados if a['id_pool'] == pool_id]
-            
+        # Información de todos los pools en una sola consulta
+        pools_info = pool_model.get_pools_with_details_bulk(pools_unicos)
+        
+        for pool_id, analisis_pool, estadisticas in zip(pools_unicos, matriz_pools.grupos, estadisticas_pools):
             if analisis_pool:
-                # Obtener información del pool
-                pool_info = pool_model.get_pool_with_details(pool_id)
+                pool_info = pools_info.get(pool_id)
                 
                 with st.expander(f"Pool #{pool_id} - {analisis_pool[0].get('fecha_analisis', '')}"):
                     if pool_info:
@@ -266,11 +245,11 @@ if aplicar_filtros or 'filtros_aplicados' not in st.session_state:
                         st.markdown(f"**Total de Tambores:** {pool_info['total_tambores']}")
                     
                     # Mostrar análisis de especies
-                    df_pool = crear_dataframe_analisis(analisis_pool)
-                    st.dataframe(df_pool, use_container_width=True, hide_index=True)
+                    df_pool = crear_dataframe_analisis(filas_por_pool[pool_id], mantener_numericos=True)
+                    st.dataframe(df_pool, use_container_width=True, hide_index=True,
+                                 column_config=configuracion_columnas())
                     
-                    # Calcular estadísticas del pool
-                    estadisticas = calcular_estadisticas_analisis(analisis_pool)
+                    # Estadísticas del pool
                     if estadisticas:
                         st.markdown("**Estadísticas del Pool:**")
                         st.markdown(f"- Total de Granos: {estadisticas['total_granos']:,}")
@@ -283,49 +262,112 @@ if aplicar_filtros or 'filtros_aplicados' not in st.session_state:
         
         st.markdown("---")
         
+        # Índices de diversidad de todos los pools (cacheados por vector de conteos)
+        st.subheader("🧬 Índices de Diversidad por Pool")
+        
+        indices_pools = indices_por_pool(matriz_pools.cantidades, claves=pools_unicos)
+        for indices, analisis_pool in zip(indices_pools, matriz_pools.grupos):
+            indices['fecha_analisis'] = analisis_pool[0].get('fecha_analisis')
+        df_indices = pd.DataFrame(indices_pools, columns=['id_pool', 'fecha_analisis', 'especies_observadas',
+                                                          'total_granos'] + list(INDICES.keys()))
+        
+        col1, col2, col3 = st.columns([2, 1, 3])
+        
+        with col1:
+            indice_orden = st.selectbox(
+                "Ordenar por:",
+                options=list(INDICES.keys()),
+                format_func=INDICES.get,
+                key="diversidad_orden"
+            )
+        
+        with col2:
+            descendente = st.checkbox("Mayor a menor", value=True, key="diversidad_descendente")
+        
+        with col3:
+            valores_indice = df_indices[indice_orden].dropna()
+            if not valores_indice.empty and valores_indice.min() < valores_indice.max():
+                limites = (float(valores_indice.min()), float(valores_indice.max()))
+                clave_rango = f"diversidad_rango_{indice_orden}"
+                # Con otros filtros de reporte cambian los límites: se vuelve al rango completo
+                if st.session_state.get(f"{clave_rango}_limites") != limites:
+                    st.session_state[f"{clave_rango}_limites"] = limites
+                    st.session_state[clave_rango] = limites
+                rango = st.slider(
+                    f"Filtrar por {INDICES[indice_orden]}:",
+                    min_value=limites[0], max_value=limites[1],
+                    key=clave_rango
+                )
+                df_indices = df_indices[df_indices[indice_orden].between(*rango)]
+        
+        df_indices = df_indices.sort_values(indice_orden, ascending=not descendente, na_position='last')
+        df_indices['fecha_analisis'] = formatear_fechas(df_indices['fecha_analisis'])
+        df_indices = df_indices[['id_pool', 'fecha_analisis', 'especies_observadas', 'total_granos'] + list(INDICES.keys())]
+        df_indices.columns = ['Pool ID', 'Fecha', 'Especies', 'Granos'] + list(INDICES.values())
+        st.dataframe(df_indices.round(3), use_container_width=True, hide_index=True)
+        st.caption(f"{len(df_indices)} de {len(indices_pools)} pools")
+        
+        st.markdown("---")
+        
         # Botones de exportación
         st.subheader("📤 Exportar Datos")
         
         col1, col2 = st.columns(2)
         
         with col1:
-            # Crear DataFrame para exportar
-            df_export = pd.DataFrame(df_data)
-            
-            # Generar nombre de archivo para Excel
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            excel_filename = f"reporte_palinologico_{timestamp}.xlsx"
-            
-            # Exportar a Excel usando BytesIO
-            import io
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                df_export.to_excel(writer, index=False, sheet_name='Reporte Palinológico')
-            
-            # Descargar archivo Excel
-            st.download_button(
-                label="📊 Descargar Excel",
-                data=buffer.getvalue(),
-                file_name=excel_filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
+            formato_exportacion = st.radio(
+                "Formato:",
+                options=["Excel (.xlsx)", "CSV (.csv)"],
+                horizontal=True
             )
         
         with col2:
-            # Generar nombre de archivo para CSV
-            csv_filename = f"reporte_palinologico_{timestamp}.csv"
+            generar_exportacion = st.button("⚙️ Generar Archivo", use_container_width=True)
+        
+        if generar_exportacion:
+            formato = 'xlsx' if formato_exportacion.startswith("Excel") else 'csv'
             
-            # Exportar a CSV
-            csv_data = df_export.to_csv(index=False, encoding='utf-8-sig')
+            # Eliminar la exportación anterior de esta sesión
+            exportacion_anterior = st.session_state.pop('exportacion_reporte', None)
+            if exportacion_anterior:
+                exportacion_anterior.eliminar()
             
-            # Descargar archivo CSV
-            st.download_button(
-                label="📄 Descargar CSV",
-                data=csv_data,
-                file_name=csv_filename,
-                mime="text/csv",
-                use_container_width=True
-            )
+            with st.spinner("Generando archivo de exportación..."):
+                try:
+                    # Las filas se leen en bloques desde un cursor del servidor y se escriben
+                    # a un archivo temporal, sin materializar el reporte completo en memoria
+                    ruta = exportar_a_archivo_temporal(
+                        analisis_model.iterar_reporte_exportacion(**filtros_reporte),
+                        AnalisisPalinologico.COLUMNAS_EXPORTACION,
+                        formato,
+                        prefijo="reporte_palinologico"
+                    )
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    # El archivo se elimina al generar otro o al cerrarse la sesión
+                    st.session_state['exportacion_reporte'] = ExportacionTemporal(
+                        ruta,
+                        f"reporte_palinologico_{timestamp}.{formato}",
+                        ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                         if formato == 'xlsx' else "text/csv")
+                    )
+                except Exception as e:
+                    st.error(f"Error al generar la exportación: {str(e)}")
+        
+        exportacion = st.session_state.get('exportacion_reporte')
+        if exportacion and exportacion.disponible:
+            tamano_mb = exportacion.tamano / (1024 * 1024)
+            
+            # Descargar archivo generado
+            with open(exportacion.ruta, 'rb') as archivo:
+                st.download_button(
+                    label=f"📥 Descargar {exportacion.nombre} ({tamano_mb:.1f} MB)",
+                    data=archivo,
+                    file_name=exportacion.nombre,
+                    mime=exportacion.mime,
+                    use_container_width=True
+                )
+        elif exportacion:
+            st.session_state.pop('exportacion_reporte', None)
 
 # Footer
 st.markdown("---")
@@ -4,6 +4,13 @@ from models.apicultor import Apicultor
 from models.analista import Analista
 from models.especie import Especie
 from models.muestra_tambor import MuestraTambor
+from models.estadistica_especie import EstadisticaEspecie
+from models.counter_store import TABLAS_ESTADISTICAS_RAPIDAS
+from config.database import get_db
+from config.async_database import get_async_db
+from config.columnar_result import ColumnarResult
+from components.paginador import Paginador
+from components.selector_busqueda import SelectorBusqueda
 
 # Configurar página
 st.set_page_config(
@@ -22,8 +29,19 @@ analista_model = Analista()
 especie_model = Especie()
 tambor_model = MuestraTambor()
 
+# Consultas independientes de las pestañas y del sidebar, ejecutadas a la vez
+paginador_tambores = Paginador("admin_tambores")
+pagina_tambores, conteos = get_async_db().gather(
+    tambor_model.get_tambores_page_async(
+        after=paginador_tambores.cursor_actual,
+        page_size=paginador_tambores.page_size,
+        columns=['id_tambor', 'num_registro', 'id_apicultor', 'fecha_extraccion']
+    ),
+    tambor_model.get_counts_async(TABLAS_ESTADISTICAS_RAPIDAS)
+)
+
 # Crear pestañas
-tab1, tab2, tab3, tab4 = st.tabs(["👨‍🌾 Apicultores", "👨‍🔬 Analistas", "🌿 Especies", "🍯 Tambores"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["👨‍🌾 Apicultores", "👨‍🔬 Analistas", "🌿 Especies", "🍯 Tambores", "📈 Rendimiento"])
 
 # Pestaña 1: Apicultores
 with tab1:
@@ -59,8 +77,8 @@ with tab1:
     apicultores = apicultor_model.get_all_apicultores()
     
     if apicultores:
-        # Crear DataFrame
-        df_apicultores = pd.DataFrame(apicultores)
+        # DataFrame armado por columnas desde el caché de catálogos
+        df_apicultores = apicultor_model.get_all_apicultores_df()
         df_apicultores['Nombre Completo'] = df_apicultores['nombre'] + ' ' + df_apicultores['apellido']
         df_apicultores = df_apicultores[['id_apicultor', 'Nombre Completo', 'nombre', 'apellido']]
         df_apicultores.columns = ['ID', 'Nombre Completo', 'Nombre', 'Apellido']
@@ -121,8 +139,8 @@ with tab2:
     analistas = analista_model.get_all_analistas()
     
     if analistas:
-        # Crear DataFrame
-        df_analistas = pd.DataFrame(analistas)
+        # DataFrame armado por columnas desde el caché de catálogos
+        df_analistas = analista_model.get_all_analistas_df()
         df_analistas['Nombre Completo'] = df_analistas['nombres'] + ' ' + df_analistas['apellidos']
         df_analistas = df_analistas[['id_analista', 'Nombre Completo', 'nombres', 'apellidos', 'contacto']]
         df_analistas.columns = ['ID', 'Nombre Completo', 'Nombres', 'Apellidos', 'Contacto']
@@ -177,8 +195,8 @@ with tab3:
     especies = especie_model.get_all_especies()
     
     if especies:
-        # Crear DataFrame
-        df_especies = pd.DataFrame(especies)
+        # DataFrame armado por columnas desde el caché de catálogos
+        df_especies = especie_model.get_all_especies_df()
         df_especies = df_especies[['id_especie', 'nombre_cientifico', 'nombre_comun', 'familia']]
         df_especies.columns = ['ID', 'Nombre Científico', 'Nombre Común', 'Familia']
         
@@ -210,14 +228,13 @@ with tab4:
     with st.expander("➕ Agregar Nuevo Tambor", expanded=False):
         with st.form("agregar_tambor"):
             # Obtener apicultores para el selector
-            apicultores = apicultor_model.get_all_apicultores()
+            opciones_apicultores = apicultor_model.get_opciones_apicultores()
             
-            if apicultores:
+            if opciones_apicultores:
                 col1, col2 = st.columns(2)
                 
                 with col1:
                     # Selector de apicultor
-                    opciones_apicultores = {f"{a['nombre']} {a['apellido']}": a['id_apicultor'] for a in apicultores}
                     apicultor_seleccionado = st.selectbox(
                         "Apicultor *",
                         options=list(opciones_apicultores.keys())
@@ -249,44 +266,189 @@ with tab4:
     # Mostrar tambores existentes
     st.subheader("📋 Tambores Registrados")
     
-    tambores = tambor_model.get_all_tambores()
+    # Una página de tambores por vez (consultada al inicio junto con el resto)
+    tambores = pagina_tambores['rows']
     
     if tambores:
-        # Obtener información de apicultores para mostrar
-        tambores_con_apicultor = []
-        for tambor in tambores:
-            apicultor = apicultor_model.get_apicultor_by_id(tambor['id_apicultor'])
-            if apicultor:
-                tambor['apicultor_nombre'] = f"{apicultor['nombre']} {apicultor['apellido']}"
-            else:
-                tambor['apicultor_nombre'] = "N/A"
-            tambores_con_apicultor.append(tambor)
-        
-        # Crear DataFrame
-        df_tambores = pd.DataFrame(tambores_con_apicultor)
+        # Crear DataFrame por columnas y resolver los nombres de apicultores
+        # desde el caché de catálogos, una vez por apicultor
+        df_tambores = ColumnarResult.desde_filas(tambores).to_dataframe()
+        nombres_apicultores = {
+            id_apicultor: apicultor_model.get_apicultor_full_name(id_apicultor)
+            for id_apicultor in df_tambores['id_apicultor'].unique()
+        }
+        df_tambores['apicultor_nombre'] = df_tambores['id_apicultor'].map(nombres_apicultores)
         df_tambores = df_tambores[['id_tambor', 'num_registro', 'apicultor_nombre', 'fecha_extraccion']]
         df_tambores.columns = ['ID', 'Número de Registro', 'Apicultor', 'Fecha de Extracción']
         
-        st.dataframe(df_tambores, use_container_width=True, hide_index=True)
+        st.dataframe(
+            df_tambores, use_container_width=True, hide_index=True,
+            column_config={'Fecha de Extracción': st.column_config.DateColumn(format="YYYY-MM-DD")}
+        )
+        paginador_tambores.render_controles(pagina_tambores)
         
         # Funcionalidad de eliminación
         with st.expander("🗑️ Eliminar Tambor"):
-            tambor_a_eliminar = st.selectbox(
+            # Sin búsqueda se ofrecen los tambores de esta página; la búsqueda recorre todos
+            selector_eliminar = SelectorBusqueda(
+                "admin_eliminar_tambor",
+                buscar=tambor_model.buscar_opciones_tambores,
+                todas=lambda: {MuestraTambor.etiqueta_tambor(t): t['id_tambor'] for t in tambores}
+            )
+            tambor_id = selector_eliminar.render_selectbox(
                 "Seleccione el tambor a eliminar:",
-                options=[f"{t['id_tambor']} - {t['num_registro']}" for t in tambores]
+                opcion_todos="Seleccione un tambor...",
+                help="Se listan los tambores de esta página; escriba el ID o el número de registro para buscar entre todos",
+                placeholder="Ej: 125, TB-2024..."
             )
             
             if st.button("Eliminar Tambor", type="secondary"):
-                if tambor_a_eliminar:
-                    tambor_id = int(tambor_a_eliminar.split(' - ')[0])
+                if tambor_id is not None:
                     if tambor_model.delete_tambor(tambor_id):
                         st.success("✅ Tambor eliminado exitosamente!")
+                        selector_eliminar.limpiar()
+                        paginador_tambores.reiniciar()
                         st.rerun()
                     else:
                         st.error("❌ Error al eliminar el tambor")
     else:
         st.info("📝 No hay tambores registrados. Agregue el primer tambor usando el formulario de arriba.")
 
+# Pestaña 5: Rendimiento de la base de datos
+with tab5:
+    st.header("📈 Rendimiento de la Base de Datos")
+    
+    db = get_db()
+    
+    # Estado del pool de conexiones
+    st.subheader("🔌 Pool de Conexiones")
+    pool_stats = db.get_pool_stats()
+    
+    if pool_stats:
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("En Uso", f"{pool_stats['in_use']} / {pool_stats['max_connections']}")
+        
+        with col2:
+            st.metric("Libres", pool_stats['idle'])
+        
+        with col3:
+            st.metric("En Espera", pool_stats['waiters'])
+        
+        with col4:
+            st.metric("Espera Promedio", f"{pool_stats['avg_wait_time'] * 1000:.1f} ms")
+        
+        st.caption(
+            f"Checkouts: {pool_stats['checkouts']} - Timeouts: {pool_stats['timeouts']} - "
+            f"Espera máxima: {pool_stats['max_wait_time'] * 1000:.1f} ms - "
+            f"Conexiones descartadas: {pool_stats['connections_discarded']}"
+        )
+    else:
+        st.warning("⚠️ El pool de conexiones no está disponible")
+    
+    read_pool_stats = db.get_read_pool_stats()
+    if read_pool_stats:
+        st.caption(
+            f"Pool de lectura (autocommit): {read_pool_stats['in_use']} / {read_pool_stats['max_connections']} en uso - "
+            f"{read_pool_stats['idle']} libres - Checkouts: {read_pool_stats['checkouts']} - "
+            f"Espera promedio: {read_pool_stats['avg_wait_time'] * 1000:.1f} ms"
+        )
+    
+    async_stats = get_async_db().get_stats()
+    detalle_async = (
+        f"{async_stats['pool_size']} conexiones ({async_stats['idle']} libres, {async_stats['waiters']} en espera)"
+        if async_stats['backend'] == 'psycopg3'
+        else f"hasta {async_stats['max_connections']} consultas simultáneas en hilos"
+    )
+    st.caption(f"Consultas concurrentes ({async_stats['backend']}): {detalle_async}")
+    
+    # Resumen de consultas
+    st.subheader("⏱️ Consultas")
+    totales = db.metrics.get_totals()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Ejecuciones", totales['calls'])
+    
+    with col2:
+        st.metric("Tiempo Promedio", f"{totales['avg_ms']:.1f} ms")
+    
+    with col3:
+        st.metric("Errores", totales['errors'])
+    
+    with col4:
+        st.metric("Consultas Lentas", totales['slow_queries'])
+    
+    st.caption(
+        f"Métricas desde {totales['since']} - Umbral de consulta lenta: {db.metrics.slow_query_threshold_ms:.0f} ms - "
+        f"Lecturas en autocommit: {totales['readonly_calls']} "
+        f"({totales['roundtrips_saved']} idas y vueltas BEGIN/COMMIT ahorradas)"
+    )
+    
+    # Sentencias más costosas
+    criterios_orden = {
+        "Tiempo total": 'total_ms',
+        "Tiempo promedio": 'avg_ms',
+        "Percentil 95": 'p95_ms',
+        "Ejecuciones": 'calls',
+        "Filas promedio": 'avg_rows',
+    }
+    criterio = st.selectbox("Ordenar sentencias por:", options=list(criterios_orden.keys()))
+    
+    top_sentencias = db.metrics.get_top_statements(order_by=criterios_orden[criterio], limit=20)
+    
+    if top_sentencias:
+        df_sentencias = pd.DataFrame(top_sentencias)
+        df_sentencias = df_sentencias[['query', 'calls', 'total_ms', 'avg_ms', 'p95_ms', 'max_ms',
+                                       'avg_rows', 'avg_checkout_wait_ms', 'roundtrips_saved', 'errors']]
+        df_sentencias.columns = ['Sentencia', 'Ejecuciones', 'Total (ms)', 'Promedio (ms)', 'P95 (ms)',
+                                 'Máximo (ms)', 'Filas Prom.', 'Espera Conexión (ms)', 'Idas y Vueltas Ahorradas',
+                                 'Errores']
+        st.dataframe(df_sentencias, use_container_width=True, hide_index=True)
+        
+        # Histograma de la sentencia más costosa
+        with st.expander("📊 Histograma de latencia de la primera sentencia"):
+            st.code(top_sentencias[0]['query'], language='sql')
+            st.bar_chart(pd.Series(top_sentencias[0]['histogram']))
+    else:
+        st.info("📝 Aún no se registraron consultas.")
+    
+    # Registro de consultas lentas
+    st.subheader("🐢 Consultas Lentas Recientes")
+    consultas_lentas = db.metrics.get_slow_queries(limit=50)
+    
+    if consultas_lentas:
+        df_lentas = pd.DataFrame(consultas_lentas)
+        df_lentas = df_lentas[['timestamp', 'page', 'duration_ms', 'rows', 'checkout_wait_ms', 'query', 'error']]
+        df_lentas.columns = ['Fecha', 'Página', 'Duración (ms)', 'Filas', 'Espera Conexión (ms)', 'Sentencia', 'Error']
+        st.dataframe(df_lentas, use_container_width=True, hide_index=True)
+        
+        # Páginas que más consultas lentas generan
+        st.markdown("**Consultas lentas por página:**")
+        st.bar_chart(df_lentas['Página'].value_counts())
+    else:
+        st.info("✅ No hay consultas lentas registradas.")
+    
+    if st.button("🔄 Reiniciar Métricas", type="secondary"):
+        db.metrics.reset()
+        st.rerun()
+    
+    # Totales por especie mantenidos incrementalmente
+    st.subheader("🌿 Estadísticas por Especie")
+    st.caption(
+        "Los totales de análisis y granos por especie se actualizan con cada análisis guardado. "
+        "Recalcularlos solo es necesario si la tabla de análisis se modificó por fuera de la aplicación."
+    )
+    
+    if st.button("🧮 Recalcular Estadísticas por Especie", type="secondary"):
+        try:
+            especies_actualizadas = EstadisticaEspecie().refrescar()
+            st.success(f"✅ Estadísticas recalculadas para {especies_actualizadas} especies")
+        except Exception as e:
+            st.error(f"❌ Error al recalcular las estadísticas: {str(e)}")
+
 # Sidebar con información
 st.sidebar.title("ℹ️ Información")
 st.sidebar.markdown("""
@@ -303,8 +465,8 @@ st.sidebar.markdown("""
 - Al eliminar registros, asegúrese de que no estén siendo utilizados en análisis
 - Los tambores solo pueden ser creados por apicultores registrados
 """.format(
-    len(apicultor_model.get_all_apicultores()),
-    len(analista_model.get_all_analistas()),
-    len(especie_model.get_all_especies()),
-    len(tambor_model.get_all_tambores())
+    conteos['apicultor'],
+    conteos['analista'],
+    conteos['especies'],
+    conteos['muestra_tambor']
 )) 
\ No newline at end of file
@@ -0,0 +1,113 @@
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Sequence, Set
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Normalizar texto para búsqueda: minúsculas y sin acentos
+
+    Equivale a f_unaccent(lower(texto)) en la base de datos.
+    """
+    if not texto:
+        return ""
+    descompuesto = unicodedata.normalize('NFKD', str(texto).lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+def escapar_like(texto: str) -> str:
+    """Escapar los comodines de LIKE/ILIKE (\\, % y _) para buscar el texto literal"""
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def trigramas(texto: str) -> Set[str]:
+    """
+    Obtener los trigramas de un texto normalizado, con el mismo criterio que pg_trgm
+
+    Cada palabra se completa con dos espacios al inicio y uno al final.
+    """
+    resultado = set()
+    for palabra in ''.join(c if c.isalnum() else ' ' for c in texto).split():
+        palabra = f"  {palabra} "
+        resultado.update(palabra[i:i + 3] for i in range(len(palabra) - 2))
+    return resultado
+
+def similitud(trigramas_a: Set[str], trigramas_b: Set[str]) -> float:
+    """Similitud de trigramas (trigramas compartidos / trigramas totales), como similarity() de pg_trgm"""
+    if not trigramas_a or not trigramas_b:
+        return 0.0
+    compartidos = len(trigramas_a & trigramas_b)
+    return compartidos / (len(trigramas_a) + len(trigramas_b) - compartidos)
+
+class IndiceNgramas:
+    """
+    Índice invertido de trigramas en memoria
+
+    Alternativa a los índices GIN de pg_trgm cuando la extensión no está
+    disponible. Ordena los resultados con el mismo criterio que la búsqueda
+    en la base: primero los que empiezan con el término, luego los que lo
+    contienen y por último los parecidos (tolerancia a errores de tipeo).
+    """
+
+    def __init__(self, registros: Iterable[Dict[str, Any]], campos: Sequence[str]):
+        """
+        Construir el índice
+
+        Args:
+            registros: Filas a indexar
+            campos: Columnas cuyo texto se concatena para buscar
+        """
+        self.registros: List[Dict[str, Any]] = []
+        self._documentos: List[str] = []
+        self._trigramas: List[Set[str]] = []
+        self._invertido: Dict[str, List[int]] = defaultdict(list)
+
+        for registro in registros:
+            documento = normalizar_texto(' '.join(str(registro.get(c) or '') for c in campos))
+            posicion = len(self.registros)
+            self.registros.append(registro)
+            self._documentos.append(documento)
+            trigramas_documento = trigramas(documento)
+            self._trigramas.append(trigramas_documento)
+            for trigrama in trigramas_documento:
+                self._invertido[trigrama].append(posicion)
+
+    def buscar(self, termino: str, limite: int = 20, umbral: float = 0.3) -> List[Dict[str, Any]]:
+        """
+        Buscar registros por texto
+
+        Args:
+            termino: Texto buscado (sin distinguir mayúsculas ni acentos)
+            limite: Cantidad máxima de resultados
+            umbral: Similitud mínima para los resultados que no contienen el término
+
+        Returns:
+            Registros ordenados por relevancia, cada uno con la clave 'relevancia'
+        """
+        buscado = normalizar_texto(termino).strip()
+        if not buscado:
+            return []
+
+        trigramas_buscados = trigramas(buscado)
+        if len(buscado) < 3:
+            # Términos muy cortos: se revisan todos los documentos buscando la subcadena
+            candidatos = range(len(self.registros))
+        else:
+            candidatos = set()
+            for trigrama in trigramas_buscados:
+                candidatos.update(self._invertido.get(trigrama, ()))
+
+        puntuados = []
+        for posicion in candidatos:
+            documento = self._documentos[posicion]
+            relevancia = similitud(trigramas_buscados, self._trigramas[posicion])
+            if documento.startswith(buscado) or f" {buscado}" in documento:
+                orden = 0
+            elif buscado in documento:
+                orden = 1
+            elif relevancia >= umbral:
+                orden = 2
+            else:
+                continue
+            puntuados.append((orden, -relevancia, documento, posicion, relevancia))
+
+        puntuados.sort()
+        return [dict(self.registros[posicion], relevancia=round(relevancia, 3))
+                for _, _, _, posicion, relevancia in puntuados[:limite]]
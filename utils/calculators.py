@@ -1,5 +1,225 @@
-from typing import List, Dict, Any
-import math
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+
+def _redondear(valores: np.ndarray, decimales: int) -> np.ndarray:
+    """
+    Redondear un arreglo con el mismo resultado que round() de Python
+
+    np.round escala, redondea y desescala, lo que puede diferir de round()
+    en los valores que quedan a medio camino; esos pocos se recalculan con
+    round() para que los resultados coincidan exactamente.
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    escala = 10.0 ** decimales
+    escalados = valores * escala
+    resultado = np.rint(escalados) / escala
+    dudosos = np.isfinite(escalados) & (np.abs(escalados - np.floor(escalados) - 0.5) < 1e-6)
+    for posicion in zip(*np.nonzero(dudosos)):
+        resultado[posicion] = round(float(valores[posicion]), decimales)
+    return resultado
+
+class MatrizConteos:
+    """
+    Cantidades de granos de muchos pools como matriz dispersa pools × especies
+
+    Cada fila guarda las especies de un pool en el orden en que llegaron
+    (formato ELLPACK: valores e IDs de especie por posición, completados con
+    huecos hasta la fila más larga). Porcentajes, totales, especie dominante,
+    diversidad de Shannon y validaciones se calculan para todos los pools a
+    la vez con operaciones de NumPy. Respetar el orden de cada pool hace que
+    los resultados coincidan exactamente con los de las funciones por pool
+    (desempates, orden de mensajes y sumas de punto flotante).
+    """
+
+    def __init__(self, grupos: Sequence[List[Dict[str, Any]]], claves: Sequence[Any] = None,
+                 campo_especie: str = 'id_especie'):
+        """
+        Construir la matriz
+
+        Args:
+            grupos: Una lista de registros (especies con 'cantidad_granos') por pool
+            claves: Identificador de cada grupo (por defecto, su posición)
+            campo_especie: Campo con el ID de especie de cada registro
+        """
+        self.grupos = [list(grupo) for grupo in grupos]
+        self.claves = list(claves) if claves is not None else list(range(len(self.grupos)))
+        filas = len(self.grupos)
+        columnas = max((len(grupo) for grupo in self.grupos), default=0)
+
+        self.presentes = np.zeros((filas, columnas), dtype=bool)
+        self.cantidades = np.zeros((filas, columnas), dtype=np.int64)
+        # Porcentajes ya presentes en los registros (los que usan las estadísticas)
+        self.porcentajes_informados = np.zeros((filas, columnas), dtype=np.float64)
+        self.especies = np.full((filas, columnas), -1, dtype=np.int64)
+
+        for i, grupo in enumerate(self.grupos):
+            for j, registro in enumerate(grupo):
+                self.presentes[i, j] = True
+                self.cantidades[i, j] = registro.get('cantidad_granos') or 0
+                self.porcentajes_informados[i, j] = registro.get('porcentaje') or 0
+                especie = registro.get(campo_especie)
+                if especie is not None:
+                    self.especies[i, j] = especie
+
+        self.totales = self.cantidades.sum(axis=1)
+        self.num_especies = self.presentes.sum(axis=1)
+
+    @classmethod
+    def desde_filas(cls, filas: Iterable[Dict[str, Any]], campo_grupo: str = 'id_pool',
+                    campo_especie: str = 'id_especie') -> 'MatrizConteos':
+        """
+        Construir la matriz agrupando filas de análisis por pool
+
+        Los pools quedan en el orden de su primera fila y las especies de cada
+        pool en el orden de las filas.
+        """
+        grupos: Dict[Any, List[Dict[str, Any]]] = {}
+        for fila in filas:
+            grupos.setdefault(fila[campo_grupo], []).append(fila)
+        return cls(list(grupos.values()), list(grupos.keys()), campo_especie)
+
+    def _proporciones(self) -> np.ndarray:
+        """Cantidad / total de cada posición (0 en los pools con total 0)"""
+        totales = self.totales[:, None].astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            proporciones = self.cantidades / totales
+        return np.where(totales != 0, proporciones, 0.0)
+
+    def porcentajes(self) -> np.ndarray:
+        """Porcentaje de cada especie sobre el total de su pool, redondeado a 2 decimales (0 en los huecos)"""
+        return np.where(self.presentes, _redondear(self._proporciones() * 100, 2), 0.0)
+
+    def diversidad_shannon(self) -> np.ndarray:
+        """Índice de Shannon (log2) de cada pool, sin redondear (0 en los pools sin granos)"""
+        proporciones = np.where(self.totales[:, None] > 0, self._proporciones(), 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            terminos = np.where(proporciones > 0, proporciones * np.log2(proporciones), 0.0)
+        if terminos.shape[1] == 0:
+            return np.zeros(len(self.grupos))
+        # Suma acumulada en el orden de las especies (igual que el bucle por pool); + 0.0 evita -0.0
+        return -np.cumsum(terminos, axis=1)[:, -1] + 0.0
+
+    def indices_dominantes(self) -> np.ndarray:
+        """Posición de la especie con mayor porcentaje informado de cada pool (la primera ante empates; -1 si está vacío)"""
+        if self.presentes.shape[1] == 0:
+            return np.full(len(self.grupos), -1)
+        valores = np.where(self.presentes, self.porcentajes_informados, -np.inf)
+        return np.where(self.num_especies > 0, np.argmax(valores, axis=1), -1)
+
+    def matriz_especies(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Expandir a una matriz densa pools × especies
+
+        Returns:
+            Tupla (IDs de especie de cada columna, cantidades con forma pools × especies)
+        """
+        validos = self.presentes & (self.especies >= 0)
+        ids, columnas = np.unique(self.especies[validos], return_inverse=True)
+        densa = np.zeros((len(self.grupos), len(ids)), dtype=np.int64)
+        filas = np.nonzero(validos)[0]
+        np.add.at(densa, (filas, columnas), self.cantidades[validos])
+        return ids, densa
+
+    def aplicar_porcentajes(self, pools: np.ndarray = None):
+        """
+        Agregar 'porcentaje' y 'total_granos' a cada registro de los pools con total distinto de 0
+
+        Args:
+            pools: Posiciones de los pools a actualizar (por defecto, todos los que tienen total)
+        """
+        porcentajes = self.porcentajes()
+        if pools is None:
+            pools = np.nonzero(self.totales != 0)[0]
+        for i in pools:
+            total = int(self.totales[i])
+            for j, registro in enumerate(self.grupos[i]):
+                registro['porcentaje'] = float(porcentajes[i, j])
+                registro['total_granos'] = total
+
+    def estadisticas(self) -> List[Dict[str, Any]]:
+        """Estadísticas de cada pool, con las mismas claves que calcular_estadisticas_analisis"""
+        diversidad = _redondear(self.diversidad_shannon(), 3)
+        dominantes = self.indices_dominantes()
+        importantes = self.presentes & (self.porcentajes_informados > 10)
+        informados = np.where(self.presentes, self.porcentajes_informados, 0.0)
+        if informados.shape[1] == 0:
+            sumas = np.zeros(len(self.grupos))
+        else:
+            # Suma acumulada en el orden de los registros, como sum() sobre la lista
+            sumas = np.cumsum(informados, axis=1)[:, -1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            promedios = _redondear(np.where(self.num_especies > 0, sumas / np.maximum(self.num_especies, 1), 0.0), 2)
+
+        resultados = []
+        for i, grupo in enumerate(self.grupos):
+            if not grupo:
+                resultados.append({})
+                continue
+            resultados.append({
+                'total_granos': int(self.totales[i]),
+                'total_especies': int(self.num_especies[i]),
+                'especie_dominante': grupo[dominantes[i]],
+                'especies_importantes': [grupo[j] for j in np.nonzero(importantes[i])[0]],
+                'diversidad_shannon': float(diversidad[i]) if self.totales[i] > 0 else 0,
+                'porcentaje_total': float(sumas[i]),
+                'promedio_porcentaje': float(promedios[i])
+            })
+        return resultados
+
+    def validaciones(self) -> List[Dict[str, Any]]:
+        """Validación de cada pool, con las mismas claves y mensajes que validar_analisis"""
+        negativas = self.presentes & (self.cantidades < 0)
+        altas = self.presentes & (self.cantidades > 10000)
+
+        # Los registros de los pools con granos reciben sus porcentajes, como en validar_analisis
+        self.aplicar_porcentajes(np.nonzero(self.totales > 0)[0])
+        porcentajes = self.porcentajes()
+        sumas = np.cumsum(porcentajes, axis=1)[:, -1] if porcentajes.shape[1] else np.zeros(len(self.grupos))
+        porcentaje_fuera_de_rango = (self.totales > 0) & (np.abs(sumas - 100) > 0.1)
+
+        resultados = []
+        for i in range(len(self.grupos)):
+            total_granos = int(self.totales[i])
+            errores = []
+            advertencias = []
+
+            if total_granos < 100:
+                advertencias.append("El total de granos es menor a 100. Para resultados más confiables, se recomienda contar al menos 100 granos.")
+
+            if self.num_especies[i] == 0:
+                errores.append("Debe seleccionar al menos una especie")
+
+            for j in np.nonzero(negativas[i] | altas[i])[0]:
+                if negativas[i, j]:
+                    errores.append(f"La cantidad de granos para la especie {j+1} no puede ser negativa")
+                else:
+                    advertencias.append(f"La cantidad de granos para la especie {j+1} es muy alta ({int(self.cantidades[i, j])})")
+
+            if porcentaje_fuera_de_rango[i]:
+                advertencias.append(f"Los porcentajes no suman 100% (suma: {sumas[i]:.1f}%)")
+
+            resultados.append({
+                'valido': len(errores) == 0,
+                'errores': errores,
+                'advertencias': advertencias,
+                'total_granos': total_granos
+            })
+        return resultados
+
+def calcular_estadisticas_lote(filas: Iterable[Dict[str, Any]], campo_grupo: str = 'id_pool') -> Dict[Any, Dict[str, Any]]:
+    """
+    Calcular las estadísticas de muchos pools a la vez
+
+    Args:
+        filas: Filas de análisis de uno o varios pools (con 'cantidad_granos' y 'porcentaje')
+        campo_grupo: Campo que identifica el pool de cada fila
+
+    Returns:
+        Diccionario pool -> estadísticas (mismas claves que calcular_estadisticas_analisis),
+        en el orden de la primera fila de cada pool
+    """
+    matriz = MatrizConteos.desde_filas(filas, campo_grupo)
+    return dict(zip(matriz.claves, matriz.estadisticas()))
 
 def calcular_porcentajes(especies_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
@@ -11,17 +231,7 @@ def calcular_porcentajes(especies_data: List[Dict[str, Any]]) -> List[Dict[str,
     Returns:
         Lista actualizada con porcentajes calculados
     """
-    total_granos = sum(especie.get('cantidad_granos', 0) for especie in especies_data)
-    
-    if total_granos == 0:
-        return especies_data
-    
-    for especie in especies_data:
-        cantidad = especie.get('cantidad_granos', 0)
-        porcentaje = (cantidad / total_granos) * 100
-        especie['porcentaje'] = round(porcentaje, 2)
-        especie['total_granos'] = total_granos
-    
+    MatrizConteos([especies_data]).aplicar_porcentajes()
     return especies_data
 
 def calcular_estadisticas_analisis(analisis_data: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -36,34 +246,7 @@ def calcular_estadisticas_analisis(analisis_data: List[Dict[str, Any]]) -> Dict[
     """
     if not analisis_data:
         return {}
-    
-    total_granos = sum(analisis.get('cantidad_granos', 0) for analisis in analisis_data)
-    total_especies = len(analisis_data)
-    porcentajes = [analisis.get('porcentaje', 0) for analisis in analisis_data]
-    
-    # Especie dominante (mayor porcentaje)
-    especie_dominante = max(analisis_data, key=lambda x: x.get('porcentaje', 0))
-    
-    # Especies con porcentaje > 10%
-    especies_importantes = [a for a in analisis_data if a.get('porcentaje', 0) > 10]
-    
-    # Diversidad (índice de Shannon)
-    diversidad = 0
-    if total_granos > 0:
-        for analisis in analisis_data:
-            p = analisis.get('cantidad_granos', 0) / total_granos
-            if p > 0:
-                diversidad -= p * math.log2(p)
-    
-    return {
-        'total_granos': total_granos,
-        'total_especies': total_especies,
-        'especie_dominante': especie_dominante,
-        'especies_importantes': especies_importantes,
-        'diversidad_shannon': round(diversidad, 3),
-        'porcentaje_total': sum(porcentajes),
-        'promedio_porcentaje': round(sum(porcentajes) / total_especies, 2) if total_especies > 0 else 0
-    }
+    return MatrizConteos([analisis_data]).estadisticas()[0]
 
 def validar_analisis(especies_data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -75,41 +258,7 @@ def validar_analisis(especies_data: List[Dict[str, Any]]) -> Dict[str, Any]:
     Returns:
         Diccionario con resultado de validación
     """
-    total_granos = sum(especie.get('cantidad_granos', 0) for especie in especies_data)
-    
-    errores = []
-    advertencias = []
-    
-    # Validar total mínimo de granos (advertencia opcional)
-    if total_granos < 100:
-        advertencias.append("El total de granos es menor a 100. Para resultados más confiables, se recomienda contar al menos 100 granos.")
-    
-    # Validar que haya al menos una especie
-    if len(especies_data) == 0:
-        errores.append("Debe seleccionar al menos una especie")
-    
-    # Validar cantidades individuales
-    for i, especie in enumerate(especies_data):
-        cantidad = especie.get('cantidad_granos', 0)
-        if cantidad < 0:
-            errores.append(f"La cantidad de granos para la especie {i+1} no puede ser negativa")
-        elif cantidad > 10000:
-            advertencias.append(f"La cantidad de granos para la especie {i+1} es muy alta ({cantidad})")
-    
-    # Validar porcentajes
-    if total_granos > 0:
-        porcentajes = calcular_porcentajes(especies_data)
-        total_porcentaje = sum(esp.get('porcentaje', 0) for esp in porcentajes)
-        
-        if abs(total_porcentaje - 100) > 0.1:  # Tolerancia de 0.1%
-            advertencias.append(f"Los porcentajes no suman 100% (suma: {total_porcentaje:.1f}%)")
-    
-    return {
-        'valido': len(errores) == 0,
-        'errores': errores,
-        'advertencias': advertencias,
-        'total_granos': total_granos
-    }
+    return MatrizConteos([especies_data]).validaciones()[0]
 
 def formatear_porcentaje(valor: float, decimales: int = 2) -> str:
     """
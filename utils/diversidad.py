@@ -0,0 +1,172 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from config.settings import CACHE_CONFIG
+
+# Índices que calcula este módulo, en el orden en que se presentan
+INDICES = {
+    'shannon': "Shannon (H')",
+    'simpson': "Simpson (1 - D)",
+    'pielou': "Equitatividad de Pielou (J')",
+    'berger_parker': "Dominancia de Berger-Parker",
+    'chao1': "Riqueza estimada (Chao1)",
+}
+
+
+def calcular_indices(conteos: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Calcular índices de diversidad para muchos pools a la vez
+
+    Cada fila es el vector de cantidades de granos de un pool (en cualquier
+    orden; los ceros y negativos no cuentan como especies observadas).
+
+    Args:
+        conteos: Matriz pools × especies de cantidades de granos
+
+    Returns:
+        Diccionario índice -> arreglo con un valor por pool:
+            'shannon': H' = -Σ p·log2(p), misma base que calcular_estadisticas_analisis
+            'simpson': 1 - Σ p² (probabilidad de que dos granos sean de especies distintas)
+            'pielou': H' / log2(S); NaN con menos de dos especies
+            'berger_parker': proporción de la especie más abundante
+            'chao1': S + F1² / (2·F2), o S + F1·(F1 - 1) / 2 si no hay doubletons
+            'especies_observadas': S, especies con al menos un grano
+            'total_granos': N
+    """
+    conteos = np.clip(np.asarray(conteos, dtype=np.float64), 0, None)
+    if conteos.ndim == 1:
+        conteos = conteos[None, :]
+
+    totales = conteos.sum(axis=1)
+    con_granos = totales > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        proporciones = np.where(con_granos[:, None], conteos / totales[:, None], 0.0)
+        log_proporciones = np.where(proporciones > 0, np.log2(proporciones), 0.0)
+
+    observadas = (conteos > 0).sum(axis=1)
+    singletons = (conteos == 1).sum(axis=1)
+    doubletons = (conteos == 2).sum(axis=1)
+
+    shannon = -(proporciones * log_proporciones).sum(axis=1) + 0.0
+    simpson = np.where(con_granos, 1.0 - (proporciones ** 2).sum(axis=1), 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pielou = np.where(observadas > 1, shannon / np.log2(np.maximum(observadas, 2)), np.nan)
+        chao1 = np.where(
+            doubletons > 0,
+            observadas + singletons ** 2 / (2.0 * np.maximum(doubletons, 1)),
+            observadas + singletons * (singletons - 1) / 2.0
+        )
+    berger_parker = proporciones.max(axis=1, initial=0.0)
+
+    return {
+        'shannon': shannon,
+        'simpson': simpson,
+        'pielou': pielou,
+        'berger_parker': berger_parker,
+        'chao1': chao1,
+        'especies_observadas': observadas,
+        'total_granos': totales.astype(np.int64),
+    }
+
+
+class CacheIndices:
+    """
+    Caché LRU de índices de diversidad por vector de conteos
+
+    La clave son los bytes de las cantidades positivas del pool ordenadas de
+    mayor a menor: los índices no dependen del orden ni de qué especie es
+    cuál, de modo que cualquier pool con la misma composición reutiliza el
+    resultado. Solo se calculan, en una única pasada vectorizada, los pools
+    que no están en el caché.
+    """
+
+    def __init__(self, max_entradas: int = 20000):
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._entradas: 'OrderedDict[bytes, Dict[str, float]]' = OrderedDict()
+        self.aciertos = 0
+        self.calculados = 0
+
+    @staticmethod
+    def _claves(ordenados: np.ndarray) -> List[bytes]:
+        """Clave de cada fila de una matriz ya ordenada de mayor a menor"""
+        positivos = (ordenados > 0).sum(axis=1)
+        return [fila[:n].tobytes() for fila, n in zip(ordenados, positivos)]
+
+    def indices(self, conteos: np.ndarray) -> List[Dict[str, float]]:
+        """
+        Obtener los índices de cada fila de una matriz pools × especies
+
+        Returns:
+            Una lista con un diccionario por pool (claves de calcular_indices)
+        """
+        conteos = np.clip(np.asarray(conteos, dtype=np.int64), 0, None)
+        if conteos.ndim == 1:
+            conteos = conteos[None, :]
+        ordenados = -np.sort(-conteos, axis=1)
+        claves = self._claves(ordenados)
+
+        resultados: List[Optional[Dict[str, float]]] = [None] * len(claves)
+        faltantes = []
+        with self._lock:
+            for i, clave in enumerate(claves):
+                entrada = self._entradas.get(clave)
+                if entrada is None:
+                    faltantes.append(i)
+                else:
+                    self._entradas.move_to_end(clave)
+                    resultados[i] = entrada
+            self.aciertos += len(claves) - len(faltantes)
+
+        if faltantes:
+            calculados = calcular_indices(ordenados[faltantes])
+            nuevas = {}
+            for posicion, i in enumerate(faltantes):
+                entrada = nuevas.get(claves[i])
+                if entrada is None:
+                    entrada = nuevas[claves[i]] = {
+                        nombre: valores[posicion].item() for nombre, valores in calculados.items()
+                    }
+                resultados[i] = entrada
+
+            with self._lock:
+                self.calculados += len(nuevas)
+                self._entradas.update(nuevas)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+
+        # Copias: el llamador puede agregar claves sin alterar el caché
+        return [dict(resultado) for resultado in resultados]
+
+    def limpiar(self):
+        """Vaciar el caché"""
+        with self._lock:
+            self._entradas.clear()
+
+
+_cache = CacheIndices(max_entradas=CACHE_CONFIG['diversidad_cache_size'])
+
+
+def indices_por_pool(conteos: np.ndarray, claves: Sequence = None) -> List[Dict[str, float]]:
+    """
+    Calcular (o recuperar del caché) los índices de diversidad de cada pool
+
+    Args:
+        conteos: Matriz pools × especies de cantidades de granos
+                 (por ejemplo, MatrizConteos.cantidades o MatrizConteos.matriz_especies()[1])
+        claves: Identificador de cada pool; si se indica, se agrega como 'id_pool'
+
+    Returns:
+        Un diccionario de índices por pool, en el orden de las filas
+    """
+    resultados = _cache.indices(conteos)
+    if claves is not None:
+        for resultado, clave in zip(resultados, claves):
+            resultado['id_pool'] = clave
+    return resultados
+
+
+def get_cache_indices() -> CacheIndices:
+    """Obtener el caché de índices compartido por todas las sesiones"""
+    return _cache
@@ -0,0 +1,135 @@
+import csv
+import os
+import tempfile
+import weakref
+from typing import Iterable, List, Sequence
+from openpyxl import Workbook
+from config.settings import REPORT_CONFIG
+
+def escribir_csv(bloques: Iterable[List[tuple]], encabezados: Sequence[str], ruta: str) -> int:
+    """
+    Escribir un CSV de forma incremental, un bloque de filas por vez
+
+    Args:
+        bloques: Iterable de listas de filas (tuplas)
+        encabezados: Nombres de las columnas
+        ruta: Archivo de destino
+
+    Returns:
+        Cantidad de filas escritas
+    """
+    total_filas = 0
+    # utf-8-sig para que Excel reconozca los acentos al abrir el CSV
+    with open(ruta, 'w', newline='', encoding='utf-8-sig') as archivo:
+        writer = csv.writer(archivo)
+        writer.writerow(encabezados)
+        for bloque in bloques:
+            writer.writerows(bloque)
+            total_filas += len(bloque)
+    return total_filas
+
+def escribir_xlsx(bloques: Iterable[List[tuple]], encabezados: Sequence[str], ruta: str,
+                  nombre_hoja: str = None, max_filas_hoja: int = None) -> int:
+    """
+    Escribir un XLSX en modo streaming (openpyxl write_only) con memoria constante
+
+    Si se supera el límite de filas por hoja se continúa en una hoja nueva.
+
+    Args:
+        bloques: Iterable de listas de filas (tuplas)
+        encabezados: Nombres de las columnas
+        ruta: Archivo de destino
+        nombre_hoja: Nombre base de la hoja
+        max_filas_hoja: Filas de datos por hoja
+
+    Returns:
+        Cantidad de filas escritas
+    """
+    nombre_hoja = (nombre_hoja or REPORT_CONFIG['excel_sheet_name'])[:25]
+    max_filas_hoja = max_filas_hoja or REPORT_CONFIG['excel_max_rows_per_sheet']
+
+    workbook = Workbook(write_only=True)
+    hoja = workbook.create_sheet(nombre_hoja)
+    hoja.append(list(encabezados))
+    numero_hoja = 1
+    filas_hoja = 0
+    total_filas = 0
+
+    for bloque in bloques:
+        for fila in bloque:
+            if filas_hoja >= max_filas_hoja:
+                numero_hoja += 1
+                hoja = workbook.create_sheet(f"{nombre_hoja} {numero_hoja}")
+                hoja.append(list(encabezados))
+                filas_hoja = 0
+            hoja.append(fila)
+            filas_hoja += 1
+        total_filas += len(bloque)
+
+    workbook.save(ruta)
+    return total_filas
+
+def exportar_a_archivo_temporal(bloques: Iterable[List[tuple]], encabezados: Sequence[str],
+                                formato: str, prefijo: str = None) -> str:
+    """
+    Exportar filas a un archivo temporal en disco
+
+    Args:
+        bloques: Iterable de listas de filas (tuplas)
+        encabezados: Nombres de las columnas
+        formato: 'csv' o 'xlsx'
+        prefijo: Prefijo del nombre del archivo
+
+    Returns:
+        Ruta del archivo generado (el llamador es responsable de eliminarlo)
+    """
+    if formato not in ('csv', 'xlsx'):
+        raise ValueError(f"Formato de exportación no soportado: {formato}")
+
+    prefijo = prefijo or REPORT_CONFIG['default_filename']
+    descriptor, ruta = tempfile.mkstemp(prefix=f"{prefijo}_", suffix=f".{formato}")
+    os.close(descriptor)
+
+    try:
+        if formato == 'csv':
+            escribir_csv(bloques, encabezados, ruta)
+        else:
+            escribir_xlsx(bloques, encabezados, ruta)
+    except Exception:
+        os.remove(ruta)
+        raise
+
+    return ruta
+
+class ExportacionTemporal:
+    """
+    Archivo de exportación generado en disco para una sesión
+
+    Se guarda en st.session_state: el archivo se elimina al llamar a eliminar()
+    o cuando Streamlit libera el estado de la sesión al cerrarse ésta.
+    """
+
+    def __init__(self, ruta: str, nombre: str, mime: str):
+        self.ruta = ruta
+        self.nombre = nombre
+        self.mime = mime
+        self._eliminar = weakref.finalize(self, _eliminar_archivo, ruta)
+
+    @property
+    def disponible(self) -> bool:
+        """Indicar si el archivo todavía existe en disco"""
+        return self._eliminar.alive and os.path.exists(self.ruta)
+
+    @property
+    def tamano(self) -> int:
+        """Tamaño del archivo en bytes"""
+        return os.path.getsize(self.ruta)
+
+    def eliminar(self):
+        """Eliminar el archivo"""
+        self._eliminar()
+
+def _eliminar_archivo(ruta: str):
+    """Eliminar un archivo temporal si todavía existe"""
+    if os.path.exists(ruta):
+        os.remove(ruta)
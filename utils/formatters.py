@@ -1,6 +1,8 @@
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
+import numpy as np
 import pandas as pd
+import streamlit as st
 
 def formatear_fecha(fecha, formato_entrada: str = "%Y-%m-%d", formato_salida: str = "%d/%m/%Y") -> str:
     """
@@ -90,34 +92,116 @@ def formatear_especie(nombre_comun: str, nombre_cientifico: str) -> str:
     else:
         return nombre_cientifico
 
-def crear_dataframe_analisis(analisis_data: List[Dict[str, Any]]) -> pd.DataFrame:
+def configuracion_columnas() -> Dict[str, Any]:
+    """
+    Obtener la configuración de columnas de st.dataframe para las tablas numéricas
+    
+    Con mantener_numericos=True las columnas conservan su tipo (se ordenan
+    y filtran como números o fechas) y el formato lo aplica Streamlit al
+    mostrarlas.
+    """
+    return {
+        'Granos': st.column_config.NumberColumn("Granos", format="%d"),
+        'Porcentaje': st.column_config.NumberColumn("Porcentaje", format="%.2f%%"),
+        'Fecha': st.column_config.DateColumn("Fecha", format="DD/MM/YYYY"),
+        'Fecha Extracción': st.column_config.DateColumn("Fecha Extracción", format="DD/MM/YYYY"),
+    }
+
+def formatear_fechas(fechas: pd.Series, formato_entrada: str = "%Y-%m-%d",
+                     formato_salida: str = "%d/%m/%Y", vacio: str = "") -> pd.Series:
+    """
+    Formatear una columna de fechas de una vez (versión vectorizada de formatear_fecha)
+    
+    Args:
+        fechas: Serie de fechas (datetime64, o textos / datetime.date mezclados)
+        formato_entrada: Formato de los textos
+        formato_salida: Formato de salida
+        vacio: Texto para los valores nulos
+    
+    Returns:
+        Serie de textos; los textos que no respetan formato_entrada se dejan tal cual
+    """
+    if pd.api.types.is_datetime64_any_dtype(fechas):
+        return fechas.dt.strftime(formato_salida).fillna(vacio)
+    
+    valores = fechas.astype(object)
+    es_texto = valores.map(type).eq(str)
+    convertidas = pd.to_datetime(valores.where(~es_texto), errors='coerce')
+    if es_texto.any():
+        convertidas = convertidas.fillna(
+            pd.to_datetime(valores.where(es_texto), format=formato_entrada, errors='coerce')
+        )
+    resultado = convertidas.dt.strftime(formato_salida)
+    
+    # Valores que no son fechas: se muestran como texto (o vacío si son nulos)
+    sin_fecha = resultado.isna()
+    if sin_fecha.any():
+        originales = valores[sin_fecha]
+        nulos = originales.isna() | originales.eq("")
+        resultado[sin_fecha] = originales.astype(str).where(~nulos, vacio)
+    return resultado
+
+def formatear_miles(cantidades: pd.Series, separador: str = ".") -> pd.Series:
+    """Formatear una columna de enteros con separador de miles (1200 -> '1.200'); nulos como '0'"""
+    textos = cantidades.fillna(0).astype('int64').astype(str)
+    return textos.str.replace(r"\B(?=(\d{3})+(?!\d))", separador, regex=True)
+
+def formatear_porcentajes(porcentajes: pd.Series, decimales: int = 2) -> pd.Series:
+    """Formatear una columna de porcentajes (12.345 -> '12.35%'); nulos como 0"""
+    valores = porcentajes.astype('float64').fillna(0).to_numpy()
+    return pd.Series(np.char.mod(f"%.{decimales}f%%", valores), index=porcentajes.index, dtype=object)
+
+def formatear_especies(nombres_comunes: pd.Series, nombres_cientificos: pd.Series) -> pd.Series:
+    """Versión vectorizada de formatear_especie: 'común (científico)', o solo el científico"""
+    cientificos = nombres_cientificos.fillna("").astype(str)
+    comunes = nombres_comunes.fillna("").astype(str)
+    return (comunes + " (" + cientificos + ")").where(comunes.ne(""), cientificos)
+
+def formatear_nombres_completos(nombres: pd.Series, apellidos: pd.Series) -> pd.Series:
+    """Versión vectorizada de formatear_nombre_completo"""
+    return (nombres.fillna("").astype(str) + " " + apellidos.fillna("").astype(str)).str.strip()
+
+def _como_dataframe(datos: Union[List[Dict[str, Any]], pd.DataFrame]) -> pd.DataFrame:
+    """Aceptar tanto una lista de diccionarios como un DataFrame (ej. de un método *_df)"""
+    if isinstance(datos, pd.DataFrame):
+        # Copia superficial: las columnas de formato no alteran el DataFrame recibido
+        return datos.copy(deep=False)
+    return pd.DataFrame(datos)
+
+def crear_dataframe_analisis(analisis_data: Union[List[Dict[str, Any]], pd.DataFrame],
+                             mantener_numericos: bool = False) -> pd.DataFrame:
     """
     Crear DataFrame para mostrar análisis palinológico
     
     Args:
-        analisis_data: Lista de análisis
+        analisis_data: Lista de análisis o DataFrame
+        mantener_numericos: Si es True, Granos y Porcentaje quedan numéricos
+                            (mostrar con column_config=configuracion_columnas())
     
     Returns:
         DataFrame formateado
     """
     try:
-        if not analisis_data:
+        if analisis_data is None or len(analisis_data) == 0:
             return pd.DataFrame()
         
-        df = pd.DataFrame(analisis_data)
+        df = _como_dataframe(analisis_data)
         
-        # Formatear columnas de manera segura
+        # Formatear columnas completas de una vez
         if 'nombre_comun' in df.columns and 'nombre_cientifico' in df.columns:
-            df['Especie'] = df.apply(lambda x: formatear_especie(
-                x.get('nombre_comun', ''), 
-                x.get('nombre_cientifico', '')
-            ), axis=1)
+            df['Especie'] = formatear_especies(df['nombre_comun'], df['nombre_cientifico'])
         
         if 'cantidad_granos' in df.columns:
-            df['Granos'] = df['cantidad_granos'].apply(lambda x: f"{x:,}".replace(",", ".") if x is not None else "0")
+            if mantener_numericos:
+                df['Granos'] = df['cantidad_granos'].fillna(0).astype('int64')
+            else:
+                df['Granos'] = formatear_miles(df['cantidad_granos'])
         
         if 'porcentaje' in df.columns:
-            df['Porcentaje'] = df['porcentaje'].apply(lambda x: f"{x:.2f}%" if x is not None else "0.00%")
+            if mantener_numericos:
+                df['Porcentaje'] = df['porcentaje'].astype('float64').fillna(0)
+            else:
+                df['Porcentaje'] = formatear_porcentajes(df['porcentaje'])
         
         # Seleccionar columnas para mostrar
         columnas_mostrar = []
@@ -135,27 +219,33 @@ def crear_dataframe_analisis(analisis_data: List[Dict[str, Any]]) -> pd.DataFram
         # En caso de error, retornar un DataFrame vacío
         return pd.DataFrame()
 
-def crear_dataframe_tambores(tambores_data: List[Dict[str, Any]]) -> pd.DataFrame:
+def crear_dataframe_tambores(tambores_data: Union[List[Dict[str, Any]], pd.DataFrame],
+                             mantener_numericos: bool = False) -> pd.DataFrame:
     """
     Crear DataFrame para mostrar tambores
     
     Args:
-        tambores_data: Lista de tambores
+        tambores_data: Lista de tambores o DataFrame
+        mantener_numericos: Si es True, la fecha de extracción queda como fecha
+                            (mostrar con column_config=configuracion_columnas())
     
     Returns:
         DataFrame formateado
     """
-    if not tambores_data:
+    if tambores_data is None or len(tambores_data) == 0:
         return pd.DataFrame()
     
-    df = pd.DataFrame(tambores_data)
+    df = _como_dataframe(tambores_data)
     
     # Formatear columnas
     if 'apicultor_nombre' in df.columns and 'apicultor_apellido' in df.columns:
-        df['Apicultor'] = df.apply(lambda x: formatear_nombre_completo(x['apicultor_nombre'], x['apicultor_apellido']), axis=1)
+        df['Apicultor'] = formatear_nombres_completos(df['apicultor_nombre'], df['apicultor_apellido'])
     
     if 'fecha_extraccion' in df.columns:
-        df['Fecha Extracción'] = df['fecha_extraccion'].apply(lambda x: formatear_fecha(x) if x else 'N/A')
+        if mantener_numericos:
+            df['Fecha Extracción'] = pd.to_datetime(df['fecha_extraccion'], format="%Y-%m-%d", errors='coerce')
+        else:
+            df['Fecha Extracción'] = formatear_fechas(df['fecha_extraccion'], vacio='N/A')
     
     # Seleccionar columnas para mostrar
     columnas_mostrar = []